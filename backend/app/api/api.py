@@ -1,12 +1,33 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from app.api.compression import CompressionMiddleware
 from app.api.v1.endpoints import router as api_v1_router
 from app.core.config import settings
+from app.core.metrics import registry as metrics_registry
+from app.services.http_client import client_registry
+from app.services.metar_ingest import metar_ingester
+from app.services.report_hub import report_hub
+from app.services.summary_precompute import summary_precomputer
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pooled upstream sessions are opened lazily on first use and shared by all requests
+    if settings.METAR_BULK_INGEST_ENABLED:
+        metar_ingester.start()
+    if settings.SUMMARY_PRECOMPUTE_ENABLED:
+        summary_precomputer.start()
+    yield
+    await report_hub.stop()
+    await summary_precomputer.stop()
+    await metar_ingester.stop()
+    await client_registry.close()
 
 app = FastAPI(
     title="Aviation Weather API Hub",
     description="A master API to manage and reference aviation weather APIs",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -18,6 +39,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (gzip, or brotli when installed)
+if settings.RESPONSE_COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.RESPONSE_COMPRESSION_MIN_SIZE,
+        gzip_level=settings.RESPONSE_GZIP_LEVEL,
+        brotli_quality=settings.RESPONSE_BROTLI_QUALITY,
+    )
+
 # Include routers
 app.include_router(api_v1_router, prefix=settings.API_V1_STR)
 
@@ -29,3 +59,8 @@ async def root():
         "redoc_url": "/redoc",
         "version": "0.1.0"
     }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
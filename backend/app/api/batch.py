@@ -0,0 +1,103 @@
+"""
+Batched GET sub-requests
+
+POST /batch runs many GET requests against this API concurrently inside the server and
+returns their results in request order, so a client pays one round trip instead of one per
+report. Sub-requests go through the whole application (middleware, validation, routes) over
+an in-process ASGI transport, sharing upstream coalescing, caches and rate limits with each
+other and with regular traffic: a METAR requested twice in one batch is fetched once.
+
+One deadline covers the whole batch. Sub-requests still running when it passes are cancelled
+and reported with status 504; the others keep their results.
+"""
+import asyncio
+import time
+from typing import Any, List, Optional
+
+import httpx
+from starlette.types import ASGIApp
+
+from app.core.config import settings
+from app.schemas.batch import SubRequest, SubResponse
+from app.services import json_codec
+
+# Sub-response headers passed back to the client (for revalidation and freshness)
+FORWARDED_HEADERS = ("etag", "age")
+
+def _target(path: str) -> str:
+    if path == settings.API_V1_STR or path.startswith(settings.API_V1_STR + "/"):
+        return path
+    return settings.API_V1_STR + path
+
+def _rejection(path: str) -> Optional[str]:
+    """Why the path cannot be part of a batch, or None"""
+    if not path.startswith("/") or "://" in path:
+        return "path must start with / and be relative to the API prefix"
+    # The client would resolve dot segments and percent-escapes into another route than the one checked
+    segments = _target(path).split("?", 1)[0].split("/")
+    if "%" in "/".join(segments) or any(segment in (".", "..") for segment in segments):
+        return "path must not contain dot segments or percent-escapes"
+    # The route without API prefix and query string, as the client will request it
+    route = httpx.URL("http://batch" + _target(path)).path[len(settings.API_V1_STR):].rstrip("/")
+    # Server-Sent Event streams never complete, and batches do not nest
+    if route.endswith("/stream") or route in ("/subscribe", "/batch"):
+        return f"{route} cannot be batched"
+    return None
+
+def _decode(response: httpx.Response) -> Any:
+    if not response.content:
+        return None
+    if response.headers.get("content-type", "").startswith("application/json"):
+        return json_codec.loads(response.content)
+    return response.text
+
+async def _run(client: httpx.AsyncClient, item: SubRequest) -> SubResponse:
+    started = time.perf_counter()
+    # Nothing to gain from compressing a response that never leaves the process
+    headers = {**item.headers, "accept-encoding": "identity"}
+    response = await client.get(_target(item.path), headers=headers)
+    return SubResponse(
+        path=item.path,
+        status=response.status_code,
+        headers={name: response.headers[name] for name in FORWARDED_HEADERS if name in response.headers},
+        body=_decode(response),
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+    )
+
+async def run_batch(app: ASGIApp, items: List[SubRequest], deadline: float) -> List[SubResponse]:
+    """
+    Run the sub-requests concurrently against the application
+
+    Args:
+        app: The ASGI application serving the sub-requests (this API)
+        items: GET sub-requests
+        deadline: Seconds allowed for the whole batch
+
+    Returns:
+        One result per sub-request, in request order
+    """
+    results: List[Optional[SubResponse]] = [None] * len(items)
+    tasks = {}
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://batch") as client:
+        for index, item in enumerate(items):
+            reason = _rejection(item.path)
+            if reason is not None:
+                results[index] = SubResponse(path=item.path, status=400, body={"detail": reason})
+            else:
+                tasks[asyncio.create_task(_run(client, item))] = index
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=deadline)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        for task, index in tasks.items():
+            if task.cancelled():
+                results[index] = SubResponse(
+                    path=items[index].path, status=504, body={"detail": f"Batch deadline of {deadline}s exceeded"}
+                )
+            elif task.exception() is not None:
+                results[index] = SubResponse(path=items[index].path, status=500, body={"detail": str(task.exception())})
+            else:
+                results[index] = task.result()
+    return results
@@ -0,0 +1,105 @@
+"""
+Negotiated response compression
+
+Bodies of at least RESPONSE_COMPRESSION_MIN_SIZE bytes are compressed with brotli when the
+client accepts it and the `brotli` package is installed, otherwise with gzip. Encodings are
+chosen by their Accept-Encoding q-values, preferring brotli on ties. Server-Sent Events and
+already encoded bodies are passed through (Starlette's GZip responder rules).
+
+A strong ETag describes one exact byte sequence, so the encoding is appended to the ETag of a
+compressed response ("<hash>-gzip"); app.api.etag ignores the suffix when comparing
+If-None-Match.
+"""
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Preferred first when q-values are equal
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q}"""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+def negotiate_encoding(header: Optional[str]) -> Optional[str]:
+    """The supported encoding the client prefers, or None for an uncompressed response"""
+    accepted = _accepted_encodings(header or "")
+    best, best_quality = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int = 4):
+        super().__init__(app, minimum_size)
+        self.quality = quality
+        self._compressor = None
+
+    @property
+    def compressor(self):
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=self.quality)
+        return self._compressor
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if more_body:
+            return self.compressor.process(body) + self.compressor.flush()
+        return self.compressor.process(body) + self.compressor.finish()
+
+class CompressionMiddleware:
+    """gzip/brotli compression of responses above a size threshold"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding == "br":
+            responder = BrotliResponder(self.app, self.minimum_size, quality=self.brotli_quality)
+        elif encoding == "gzip":
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            # Still adds Vary: Accept-Encoding to responses that could have been compressed
+            responder = IdentityResponder(self.app, self.minimum_size)
+
+        async def send_with_etag(message: Message) -> None:
+            if message["type"] == "http.response.start" and encoding:
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("etag")
+                if etag and headers.get("content-encoding") == encoding and not etag.startswith("W/"):
+                    headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+            await send(message)
+
+        await responder(scope, receive, send_with_etag)
@@ -0,0 +1,33 @@
+"""
+FastAPI dependencies that hand out upstream service clients backed by the shared
+connection pool registry.
+"""
+from fastapi import Depends
+
+from app.services.http_client import UpstreamClientRegistry, client_registry
+from app.services.pirep_service import PirepService
+from app.services.metar_service import AWCMetarService
+from app.services.taf_service import AWCTafService, FailoverTafService
+from app.services.sigmet_service import AWCSigmetService, FailoverSigmetService
+
+def get_client_registry() -> UpstreamClientRegistry:
+    """Return the process-wide upstream client registry"""
+    return client_registry
+
+def get_pirep_service(registry: UpstreamClientRegistry = Depends(get_client_registry)) -> PirepService:
+    return PirepService(registry=registry)
+
+def get_metar_service(registry: UpstreamClientRegistry = Depends(get_client_registry)) -> AWCMetarService:
+    return AWCMetarService(registry=registry)
+
+def get_taf_service(registry: UpstreamClientRegistry = Depends(get_client_registry)) -> AWCTafService:
+    return AWCTafService(registry=registry)
+
+def get_sigmet_service(registry: UpstreamClientRegistry = Depends(get_client_registry)) -> AWCSigmetService:
+    return AWCSigmetService(registry=registry)
+
+def get_failover_taf_service(registry: UpstreamClientRegistry = Depends(get_client_registry)) -> FailoverTafService:
+    return FailoverTafService(registry=registry)
+
+def get_failover_sigmet_service(registry: UpstreamClientRegistry = Depends(get_client_registry)) -> FailoverSigmetService:
+    return FailoverSigmetService(registry=registry)
@@ -0,0 +1,104 @@
+"""
+Strong ETags for the product routes
+
+A product response is determined by the request (path and query string) and by the reports it
+is built from, so its ETag is a hash of the request target and each report's identity: source,
+station or id, observation/issue time and raw text. Summaries follow from the reports, so
+instead of the summary text the routes add what it depends on (resolved summary mode, prompt
+version and model). Routes compute the tag as soon as the reports are fetched (usually from
+cache) and answer a matching If-None-Match with 304 before generating summaries, serializing
+or compressing anything; a regenerated summary therefore keeps the tag of its reports. That only
+holds for the summary the mode calls for: a response whose summaries are degraded (an AI summary
+that missed its budget, failed or fell back; see summary_policy.degraded) is sent without an
+ETag (`withhold_etag`), so a later request gets a full response instead of a 304 pinning it.
+
+`timestamp`, `data_age_seconds` and the Age header say when the copy was fetched, not what it
+contains, and are left out of the hash.
+"""
+import hashlib
+from typing import Any, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.services import json_codec
+
+# Fields giving a report's observation or issue time; AWC records carry obsTime in raw_data
+_TIME_FIELDS = ("issue_time", "valid_from", "valid_to")
+
+def _value(report: Any, name: str) -> Any:
+    if isinstance(report, dict):
+        return report.get(name)
+    return getattr(report, name, None)
+
+def report_identity(report: Any) -> Tuple[Any, ...]:
+    """What distinguishes one report (model or dumped dict) from another"""
+    if report is None:
+        return (None,)
+    raw_data = _value(report, "raw_data")
+    observed = raw_data.get("obsTime") if isinstance(raw_data, dict) else None
+    return (
+        _value(report, "source"),
+        _value(report, "station") or _value(report, "id") or _value(report, "location"),
+        observed,
+        *(_value(report, name) for name in _TIME_FIELDS),
+        _value(report, "raw_text"),
+    )
+
+def compute_etag(request: Request, reports: Iterable[Any], *extra: Any) -> str:
+    """Strong ETag of a response built from the reports (plus extra values such as the summary mode)"""
+    query = sorted(request.query_params.multi_items())
+    content = [request.url.path, query, [report_identity(report) for report in reports], list(extra)]
+    return '"' + hashlib.sha256(json_codec.dumps(content)).hexdigest()[:32] + '"'
+
+def _opaque(tag: str) -> str:
+    """An entity tag without the weak prefix, quotes and compression suffix"""
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    return tag.strip('"').split("-", 1)[0]
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    The If-None-Match entry that matches the ETag (weak comparison, as RFC 9110 specifies),
+    which may carry a compression suffix; the ETag itself for "*"; None if nothing matches
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    for tag in if_none_match.split(","):
+        if _opaque(tag) == _opaque(etag):
+            return tag.strip()
+    return None
+
+def revalidate(request: Request, response: Response, reports: Iterable[Any], *extra: Any) -> Optional[Response]:
+    """
+    Set the ETag header for the reports, and return a 304 if the client already has them
+
+    Args:
+        request: The incoming request (If-None-Match, path and query string)
+        response: The route's injected Response; its headers (ETag, Age) are copied to the 304
+        reports: Reports the response body is built from
+        extra: Other values the body depends on
+
+    Returns:
+        A 304 response to return from the route, or None to build the full response
+    """
+    if not settings.RESPONSE_ETAGS_ENABLED:
+        return None
+    etag = compute_etag(request, reports, *extra)
+    response.headers["ETag"] = etag
+    matched = matching_etag(request.headers.get("if-none-match"), etag)
+    if matched is None:
+        return None
+    # Echo the client's tag so a compressed representation keeps its "-gzip"/"-br" suffix
+    not_modified = Response(status_code=304)
+    not_modified.raw_headers.extend(response.raw_headers)
+    not_modified.headers["ETag"] = matched
+    return not_modified
+
+def withhold_etag(response: Response) -> None:
+    """Remove the ETag set by revalidate, for a body a later request should not revalidate"""
+    if "etag" in response.headers:
+        del response.headers["etag"]
@@ -0,0 +1,134 @@
+"""
+Request instrumentation for the API routers
+
+TimedRoute records request counts and latency per route template, split into time spent in
+the handler itself and the remainder (request validation, dependency resolution and response
+serialization). Service-level gauges (caches, upstream limiters, coalescing, breakers) are
+read from the existing stats() methods at scrape time, so they cost nothing per request.
+"""
+import asyncio
+import functools
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Coroutine, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+from app.core.metrics import (
+    HTTP_HANDLER_DURATION, HTTP_REQUEST_DURATION, HTTP_REQUESTS, HTTP_SERIALIZE_DURATION, registry,
+)
+from app.services.base_client import upstream_flights
+from app.services.cache import all_cache_stats
+from app.services.provider_router import all_router_stats
+from app.services.rate_limit import rate_limiters
+
+# Seconds the current request spent inside its endpoint function, set by the endpoint wrapper
+_handler_seconds: ContextVar[Optional[List[float]]] = ContextVar("handler_seconds", default=None)
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    """Wrap an async endpoint so its own run time is reported to the enclosing TimedRoute"""
+    if getattr(endpoint, "__timed_endpoint__", False) or not asyncio.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            holder = _handler_seconds.get()
+            if holder is not None:
+                holder.append(time.perf_counter() - started)
+
+    wrapper.__timed_endpoint__ = True
+    return wrapper
+
+class TimedRoute(APIRoute):
+    """APIRoute recording request rate and latency metrics under the route template"""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+        self._metric_route: Optional[str] = None
+
+    def metric_route(self, request: Request) -> str:
+        """Full route template including the prefix the router was included under"""
+        if self._metric_route is None:
+            # The route only knows its own path, so recover the include prefix once from the
+            # first concrete request path
+            local = self.path_format
+            for name, value in request.path_params.items():
+                local = local.replace("{" + name + "}", str(value))
+            path = request.url.path
+            prefix = path[:-len(local)] if local and path.endswith(local) else ""
+            self._metric_route = prefix + self.path_format
+        return self._metric_route
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            route = self.metric_route(request)
+            holder: List[float] = []
+            token = _handler_seconds.set(holder)
+            status = 500
+            started = time.perf_counter()
+            try:
+                response = await handler(request)
+                status = response.status_code
+                return response
+            except HTTPException as e:
+                status = e.status_code
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                _handler_seconds.reset(token)
+                HTTP_REQUESTS.inc(route, request.method, str(status))
+                HTTP_REQUEST_DURATION.observe(elapsed, route, request.method)
+                if holder:
+                    HTTP_HANDLER_DURATION.observe(holder[0], route)
+                    HTTP_SERIALIZE_DURATION.observe(max(0.0, elapsed - holder[0]), route)
+
+        return timed_handler
+
+def _cache_samples(field: str) -> Callable[[], Iterable[Tuple[Tuple, float]]]:
+    def collect():
+        return [((name,), stats[field]) for name, stats in all_cache_stats().items()]
+    return collect
+
+def _limiter_samples(field: str) -> Callable[[], Iterable[Tuple[Tuple, float]]]:
+    def collect():
+        return [((host,), stats[field]) for host, stats in rate_limiters.stats().items()]
+    return collect
+
+_BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+def _breaker_samples() -> Iterable[Tuple[Tuple, float]]:
+    for product, stats in all_router_stats().items():
+        for provider, health in stats["providers"].items():
+            yield (product, provider), _BREAKER_STATES.get(health["breaker"]["state"], 0)
+
+for _name, _field, _kind, _doc in (
+    ("cache_hits_total", "hits", "counter", "Fresh cache hits"),
+    ("cache_stale_hits_total", "stale_hits", "counter", "Stale-while-revalidate cache hits"),
+    ("cache_misses_total", "misses", "counter", "Cache misses"),
+    ("cache_hit_ratio", "hit_ratio", "gauge", "Share of lookups served from cache (fresh or stale)"),
+    ("cache_size", "size", "gauge", "Entries currently cached"),
+):
+    registry.gauge_callback(_name, _doc, ("cache",), _cache_samples(_field), kind=_kind)
+
+for _name, _field, _kind, _doc in (
+    ("upstream_concurrency_limit", "concurrency_limit", "gauge", "Current adaptive concurrency limit per upstream host"),
+    ("upstream_inflight", "inflight", "gauge", "Upstream requests in flight per host"),
+    ("upstream_queue_depth", "queue_depth", "gauge", "Requests waiting for an upstream slot per host"),
+    ("upstream_queue_wait_seconds_total", "wait_seconds_total", "counter", "Seconds spent waiting for an upstream slot per host"),
+    ("upstream_throttled_total", "throttled_429", "counter", "429 responses received per upstream host"),
+):
+    registry.gauge_callback(_name, _doc, ("host",), _limiter_samples(_field), kind=_kind)
+
+registry.gauge_callback(
+    "upstream_coalesced_total", "Upstream calls served by joining an identical in-flight call", (),
+    lambda: [((), upstream_flights.stats()["coalesced"])], kind="counter")
+registry.gauge_callback(
+    "provider_breaker_state", "Circuit breaker state per product and provider (0 closed, 1 half-open, 2 open)",
+    ("product", "provider"), _breaker_samples)
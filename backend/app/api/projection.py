@@ -0,0 +1,68 @@
+"""
+Sparse fieldsets for the product routes
+
+`fields=station,raw_text,flight_category` returns only the listed top-level fields of each
+report, and `exclude=raw_data,parsed_metar` returns every field except those. Unknown names
+are rejected with 400. Projected reports are serialized straight from the model attributes,
+and routes skip per-request work whose only output is a field that was not requested (AI
+summaries).
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+
+def _split(names: Optional[str]) -> List[str]:
+    return [name.strip() for name in (names or "").split(",") if name.strip()]
+
+class Projection:
+    """Top-level fields of a report model selected by the fields/exclude query parameters"""
+
+    def __init__(self, model: Type[BaseModel], fields: Optional[str] = None, exclude: Optional[str] = None):
+        available = list(model.model_fields)
+        wanted, unwanted = _split(fields), _split(exclude)
+        unknown = [name for name in wanted + unwanted if name not in model.model_fields]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown field(s) {', '.join(unknown)}; available: {', '.join(available)}"
+            )
+        # None means every field, unprojected
+        self.names: Optional[Tuple[str, ...]] = None
+        if wanted or unwanted:
+            selected = set(wanted or available) - set(unwanted)
+            self.names = tuple(name for name in available if name in selected)
+
+    @property
+    def active(self) -> bool:
+        return self.names is not None
+
+    def includes(self, name: str) -> bool:
+        """True if the field is part of the response (decides whether to compute it)"""
+        return self.names is None or name in self.names
+
+    def apply(self, report: Any) -> Any:
+        """The report's selected fields as a dict (the report itself when not projecting)"""
+        if self.names is None or report is None:
+            return report
+        return {name: getattr(report, name) for name in self.names}
+
+    def apply_all(self, reports: Any) -> Any:
+        """apply() over a list of reports or the values of a dict of reports"""
+        if self.names is None:
+            return reports
+        if isinstance(reports, dict):
+            return {key: self.apply(report) for key, report in reports.items()}
+        return [self.apply(report) for report in reports]
+
+def projection(model: Type[BaseModel]) -> Callable[..., Projection]:
+    """Dependency reading the fields/exclude query parameters for reports of the given model"""
+    names = ", ".join(model.model_fields)
+
+    def dependency(
+        fields: Optional[str] = Query(None, description=f"Comma-separated report fields to return ({names})"),
+        exclude: Optional[str] = Query(None, description="Comma-separated report fields to leave out (e.g. raw_data)")
+    ) -> Projection:
+        return Projection(model, fields, exclude)
+
+    return dependency
@@ -0,0 +1,46 @@
+"""
+Fast JSON responses for large list and cockpit routes
+
+Routes declare response_model for the OpenAPI schema, but FastAPI then validates every
+returned model against it again before serializing. The service models are built by this
+application and already valid, so fast_response() serializes them directly with
+json_codec.dumps and returns the Response itself, which FastAPI passes through untouched.
+"""
+from typing import Any, Optional
+
+from fastapi import Response
+
+from app.core.config import settings
+from app.services import json_codec
+
+class FastJSONResponse(Response):
+    """JSON response rendered with json_codec.dumps"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return json_codec.dumps(content)
+
+# Headers the new response computes itself
+_OWN_HEADERS = {b"content-length", b"content-type"}
+
+def fast_response(content: Any, response: Optional[Response] = None, force: bool = False) -> Any:
+    """
+    Response for trusted route content, or the content unchanged if FAST_JSON_RESPONSES is off
+
+    Args:
+        content: Models, dicts and lists to serialize
+        response: The route's injected Response, whose status code and headers (e.g. Age) are kept
+        force: Serialize directly even when FAST_JSON_RESPONSES is off, for content that no
+            longer matches the route's response_model (projected reports)
+    """
+    if not settings.FAST_JSON_RESPONSES and not force:
+        return content
+    fast = FastJSONResponse(content)
+    if response is not None:
+        if response.status_code:
+            fast.status_code = response.status_code
+        fast.raw_headers.extend(
+            (name, value) for name, value in response.raw_headers if name not in _OWN_HEADERS
+        )
+    return fast
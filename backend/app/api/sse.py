@@ -0,0 +1,43 @@
+"""
+Server-Sent Events helpers for the streaming routes
+
+Each event is a named SSE event with a JSON payload. The response disables caching and proxy
+buffering so events reach the client as soon as they are produced. When the client
+disconnects, Starlette cancels the response; the event generator is then closed, which closes
+any upstream LLM stream it was reading.
+"""
+import json
+from typing import Any, AsyncIterator
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop nginx and similar proxies from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+def sse_message(event: str, data: str) -> str:
+    """Encode one SSE event whose JSON data is already encoded (on a single line)"""
+    return f"event: {event}\ndata: {data}\n\n"
+
+def sse_event(event: str, data: Any) -> str:
+    """Encode one SSE event with a JSON data line"""
+    return sse_message(event, json.dumps(jsonable_encoder(data), separators=(',', ':')))
+
+# Comment line that keeps idle connections open through proxies; clients ignore it
+SSE_KEEPALIVE = ": keepalive\n\n"
+
+def event_stream(events: AsyncIterator[str]) -> StreamingResponse:
+    """StreamingResponse for an async iterator of encoded events"""
+
+    async def body() -> AsyncIterator[str]:
+        try:
+            async for event in events:
+                yield event
+        finally:
+            # Runs on completion and on client disconnect (cancellation)
+            await events.aclose()
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -1,26 +1,92 @@
-from fastapi import APIRouter, Query, HTTPException, Depends
-from typing import List, Optional, Dict, Any
+from fastapi import APIRouter, Query, Path, HTTPException, Depends, Request, Response
+from typing import List, Optional, Dict, Any, Tuple, Awaitable
 import asyncio
+import math
 import time
 import re
 import logging
 
 from app.schemas.weather import PirepResponse, EnhancedPirepResponse, MetarResponse, TafResponse, SigmetResponse
+from app.schemas.batch import BatchRequest, BatchResponse
+from app.schemas.route import RouteBriefingRequest
 from app.services.pirep_service import PirepService
+from app.services.pirep_filter import filter_pireps
 from app.services.metar_service import AWCMetarService
-from app.services.taf_service import AWCTafService
-from app.services.sigmet_service import AWCSigmetService
-from app.services.openai_service import openai_service
+from app.services.taf_service import AWCTafService, FailoverTafService
+from app.services.sigmet_service import AWCSigmetService, FailoverSigmetService
+from app.services.openai_service import PROMPT_VERSION, openai_service
+from app.services.summary_cache import summary_cache
+from app.services.summary_policy import (
+    SUMMARY_MODE_PATTERN, degraded, local_summary, resolve_mode, summarize, summarize_many
+)
+from app.services.metar_parser import parse_metar
+from app.services.taf_parser import parse_taf
+from app.core.config import settings
+from app.services.http_client import UpstreamClientRegistry
+from app.services.base_client import upstream_flights, normalize_station_ids, is_error_response
+from app.services.cache import all_cache_stats
+from app.services.provider_router import all_router_stats
+from app.services.rate_limit import rate_limiters
+from app.services.conditional_get import upstream_validators
+from app.services.metar_ingest import metar_ingester
+from app.services.summary_precompute import summary_precomputer
+from app.services.report_hub import REPORT_KINDS, report_hub
+from app.services.geo import area_points, polygon_within_nm, report_position
+from app.services.flight_plan import RouteTrack, Waypoint, parse_flight_plan
+from app.api.batch import run_batch
+from app.api.etag import revalidate, withhold_etag
+from app.api.instrumentation import TimedRoute
+from app.api.projection import Projection, projection
+from app.api.responses import fast_response
+from app.api.sse import SSE_KEEPALIVE, event_stream, sse_event, sse_message
+from app.api.deps import (
+    get_client_registry,
+    get_pirep_service,
+    get_metar_service,
+    get_taf_service,
+    get_sigmet_service,
+    get_failover_taf_service,
+    get_failover_sigmet_service,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 logger = logging.getLogger(__name__)
 
+def _set_age_header(response: Response, reports: List[Any]) -> None:
+    """Set the Age header (whole seconds) from the oldest report served from cache"""
+    ages = [report.data_age_seconds for report in reports if report.data_age_seconds is not None]
+    if ages:
+        response.headers["Age"] = str(int(max(ages)))
+
+def _dump_report(report: Any) -> Optional[Dict[str, Any]]:
+    if report is None:
+        return None
+    return report.model_dump() if hasattr(report, "model_dump") else report.dict()
+
+def _summary_variant(include_summary: Optional[bool], summary_mode: Optional[str]) -> Tuple[Any, ...]:
+    """What the summaries in a response depend on besides its reports (part of its ETag)"""
+    if not include_summary:
+        return ()
+    return (resolve_mode(summary_mode), PROMPT_VERSION, openai_service.model)
+
+def _withhold_degraded_etag(response: Response, report_type: str, reports: List[Dict[str, Any]],
+                            summaries: List[Tuple[Optional[str], str]], summary_mode: Optional[str]) -> None:
+    """Send the response without an ETag if any summary fell back or is missing"""
+    if any(degraded(report_type, report, summary_mode, summary, source)
+           for report, (summary, source) in zip(reports, summaries)):
+        withhold_etag(response)
+
 @router.get("/pirep/{station}", response_model=List[PirepResponse], summary="Fetch PIREP data")
 async def get_pirep(
+    request: Request,
+    response: Response,
     station: str,
     distance: Optional[int] = Query(200, description="Search radius in nautical miles"),
     age: Optional[float] = Query(1.5, description="Maximum age of reports in hours"),
-    include_summary: Optional[bool] = Query(False, description="Include AI-generated pilot-friendly summary")
+    include_summary: Optional[bool] = Query(False, description="Include AI-generated pilot-friendly summary"),
+    summary_mode: Optional[str] = Query(None, pattern=SUMMARY_MODE_PATTERN, description="local (parser summary), llm or auto (LLM only for significant weather); defaults to the server setting"),
+    fieldset: Projection = Depends(projection(PirepResponse)),
+    service: PirepService = Depends(get_pirep_service)
 ):
     """
     Retrieve PIREP data for a specific station.
@@ -29,30 +95,74 @@ async def get_pirep(
     - **distance**: Search radius in nautical miles
     - **age**: Maximum age of reports in hours
     - **include_summary**: Include AI-generated pilot-friendly summary
+    - **summary_mode**: `local`, `llm` or `auto`; defaults to the SUMMARY_MODE server setting
+    - **fields** / **exclude**: Comma-separated report fields to return / leave out
     """
-    service = PirepService()
-    try:
-        pireps = await service.get_pireps(station, distance, age)
-        
-        # Generate summaries if requested
-        if include_summary and pireps:
-            for pirep in pireps:
-                # Convert to dict for the OpenAI service
-                pirep_dict = pirep.model_dump() if hasattr(pirep, "model_dump") else pirep.dict()
-                summary = await openai_service.generate_summary("pirep", pirep_dict)
-                if summary:
-                    # Add the summary to the response
-                    pirep.hazard_summary = summary
-        
-        return pireps
-    finally:
-        await service.close()
+    pireps = await service.get_pireps(station, distance, age)
+    _set_age_header(response, pireps)
+    not_modified = revalidate(request, response, pireps, *_summary_variant(include_summary, summary_mode))
+    if not_modified is not None:
+        return not_modified
+
+    # Generate summaries if requested (concurrently, within the batch time budget)
+    if include_summary and pireps and fieldset.includes("hazard_summary"):
+        dumped = [_dump_report(pirep) for pirep in pireps]
+        summaries = await summarize_many("pirep", dumped, summary_mode)
+        _withhold_degraded_etag(response, "pirep", dumped, summaries, summary_mode)
+        for pirep, (summary, _) in zip(pireps, summaries):
+            if summary:
+                # Add the summary to the response
+                pirep.hazard_summary = summary
+
+    return fast_response(fieldset.apply_all(pireps), response, force=fieldset.active)
+
+def _parse_station_ids(ids: str) -> List[str]:
+    """Split and validate a comma-separated station id list for batch routes"""
+    stations = normalize_station_ids(ids.split(","))
+    if not stations:
+        raise HTTPException(status_code=400, detail="Query parameter 'ids' must list at least one station")
+    if len(stations) > settings.BATCH_MAX_STATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many stations requested ({len(stations)}); the limit is {settings.BATCH_MAX_STATIONS}"
+        )
+    return stations
+
+@router.get("/metar", response_model=Dict[str, MetarResponse], summary="Fetch METAR data for many stations")
+async def get_metar_batch(
+    request: Request,
+    response: Response,
+    ids: str = Query(..., description="Comma-separated ICAO station codes (e.g., KJFK,KLGA,KEWR)"),
+    hours: Optional[int] = Query(1, description="Hours of history to search"),
+    fieldset: Projection = Depends(projection(MetarResponse)),
+    service: AWCMetarService = Depends(get_metar_service)
+):
+    """
+    Retrieve the latest METAR for many stations in one request.
+    
+    - **ids**: Comma-separated ICAO airport codes
+    - **hours**: Hours of history to search (default: 1)
+    - **fields** / **exclude**: Comma-separated report fields to return / leave out
+    
+    Returns a map of station code to METAR.
+    """
+    metars = await service.get_metars(_parse_station_ids(ids), hours)
+    _set_age_header(response, list(metars.values()))
+    not_modified = revalidate(request, response, metars.values())
+    if not_modified is not None:
+        return not_modified
+    return fast_response(fieldset.apply_all(metars), response, force=fieldset.active)
 
 @router.get("/metar/{station}", response_model=MetarResponse, summary="Fetch METAR data")
 async def get_metar(
+    request: Request,
+    response: Response,
     station: str,
     hours: Optional[int] = Query(1, description="Hours of history to include"),
-    include_summary: Optional[bool] = Query(False, description="Include AI-generated pilot-friendly summary")
+    include_summary: Optional[bool] = Query(False, description="Include AI-generated pilot-friendly summary"),
+    summary_mode: Optional[str] = Query(None, pattern=SUMMARY_MODE_PATTERN, description="local (parser summary), llm or auto (LLM only for significant weather); defaults to the server setting"),
+    fieldset: Projection = Depends(projection(MetarResponse)),
+    service: AWCMetarService = Depends(get_metar_service)
 ):
     """
     Retrieve METAR data for a specific station.
@@ -60,29 +170,62 @@ async def get_metar(
     - **station**: ICAO airport code (e.g., KATL)
     - **hours**: Hours of history to include (default: 1)
     - **include_summary**: Include AI-generated pilot-friendly summary
+    - **summary_mode**: `local`, `llm` or `auto`; defaults to the SUMMARY_MODE server setting
+    - **fields** / **exclude**: Comma-separated report fields to return / leave out
     """
-    service = AWCMetarService()
-    try:
-        metar = await service.get_metar(station, hours)
-        
-        # Generate summary if requested
-        if include_summary and metar and metar.raw_text:
-            # Convert to dict for the OpenAI service
-            metar_dict = metar.model_dump() if hasattr(metar, "model_dump") else metar.dict()
-            summary = await openai_service.generate_summary("metar", metar_dict)
-            if summary:
-                # Add the summary to the response
-                metar.pilot_summary = summary
-        
-        return metar
-    finally:
-        await service.close()
+    metar = await service.get_metar(station, hours)
+    _set_age_header(response, [metar])
+    not_modified = revalidate(request, response, [metar], *_summary_variant(include_summary, summary_mode))
+    if not_modified is not None:
+        return not_modified
+
+    # Generate summary if requested
+    if include_summary and metar and metar.raw_text and fieldset.includes("pilot_summary"):
+        dumped = _dump_report(metar)
+        summary, summary_source = await summarize("metar", dumped, summary_mode)
+        _withhold_degraded_etag(response, "metar", [dumped], [(summary, summary_source)], summary_mode)
+        if summary:
+            # Add the summary to the response
+            metar.pilot_summary = summary
+
+    return fast_response(fieldset.apply(metar), response, force=fieldset.active)
+
+@router.get("/taf", response_model=Dict[str, TafResponse], summary="Fetch TAF data for many stations")
+async def get_taf_batch(
+    request: Request,
+    response: Response,
+    ids: str = Query(..., description="Comma-separated ICAO station codes (e.g., KJFK,KLGA,KEWR)"),
+    hours: Optional[int] = Query(6, description="Hours of forecast to include"),
+    fieldset: Projection = Depends(projection(TafResponse)),
+    service: AWCTafService = Depends(get_taf_service)
+):
+    """
+    Retrieve the current TAF for many stations in one request.
+    
+    - **ids**: Comma-separated ICAO airport codes
+    - **hours**: Hours of forecast to include (default: 6)
+    - **fields** / **exclude**: Comma-separated report fields to return / leave out
+    
+    Returns a map of station code to TAF.
+    """
+    tafs = await service.get_tafs(_parse_station_ids(ids), hours)
+    _set_age_header(response, list(tafs.values()))
+    not_modified = revalidate(request, response, tafs.values())
+    if not_modified is not None:
+        return not_modified
+    return fast_response(fieldset.apply_all(tafs), response, force=fieldset.active)
 
 @router.get("/taf/{station}", response_model=TafResponse, summary="Fetch TAF data")
 async def get_taf(
+    request: Request,
+    response: Response,
     station: str,
     hours: Optional[int] = Query(6, description="Hours of forecast to include"),
-    include_summary: Optional[bool] = Query(False, description="Include AI-generated pilot-friendly summary")
+    include_summary: Optional[bool] = Query(False, description="Include AI-generated pilot-friendly summary"),
+    summary_mode: Optional[str] = Query(None, pattern=SUMMARY_MODE_PATTERN, description="local (parser summary), llm or auto (LLM only for significant weather); defaults to the server setting"),
+    source: str = Query("auto", pattern="^(auto|awc|avwx)$", description="Provider: auto (AWC with AVWX failover), awc or avwx"),
+    fieldset: Projection = Depends(projection(TafResponse)),
+    service: FailoverTafService = Depends(get_failover_taf_service)
 ):
     """
     Retrieve TAF data for a specific station.
@@ -90,56 +233,93 @@ async def get_taf(
     - **station**: ICAO airport code (e.g., KATL)
     - **hours**: Hours of forecast to include (default: 6)
     - **include_summary**: Include AI-generated pilot-friendly summary
+    - **summary_mode**: `local`, `llm` or `auto`; defaults to the SUMMARY_MODE server setting
+    - **source**: Provider selection; `auto` fails over to AVWX when AWC is failing or slow
+    - **fields** / **exclude**: Comma-separated report fields to return / leave out
     """
-    service = AWCTafService()
+    taf = await service.get_taf(station, hours, source)
+    _set_age_header(response, [taf])
+    not_modified = revalidate(request, response, [taf], *_summary_variant(include_summary, summary_mode))
+    if not_modified is not None:
+        return not_modified
+
+    # Generate summary if requested
+    if include_summary and taf and taf.raw_text and fieldset.includes("pilot_summary"):
+        dumped = _dump_report(taf)
+        summary, summary_source = await summarize("taf", dumped, summary_mode)
+        _withhold_degraded_etag(response, "taf", [dumped], [(summary, summary_source)], summary_mode)
+        if summary:
+            # Add the summary to the response
+            taf.pilot_summary = summary
+
+    return fast_response(fieldset.apply(taf), response, force=fieldset.active)
+
+def _parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """Parse 'min_lat,min_lon,max_lat,max_lon'"""
     try:
-        taf = await service.get_taf(station, hours)
-        
-        # Generate summary if requested
-        if include_summary and taf and taf.raw_text:
-            # Convert to dict for the OpenAI service
-            taf_dict = taf.model_dump() if hasattr(taf, "model_dump") else taf.dict()
-            summary = await openai_service.generate_summary("taf", taf_dict)
-            if summary:
-                # Add the summary to the response
-                taf.pilot_summary = summary
-        
-        return taf
-    finally:
-        await service.close()
+        min_lat, min_lon, max_lat, max_lon = (float(part) for part in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be 'min_lat,min_lon,max_lat,max_lon'")
+    return min_lat, min_lon, max_lat, max_lon
+
+def _filter_sigmets_by_bbox(sigmets: List[SigmetResponse], bbox: Tuple[float, float, float, float]) -> List[SigmetResponse]:
+    """Keep SIGMETs whose area overlaps the bounding box (and those without an area)"""
+    min_lat, min_lon, max_lat, max_lon = bbox
+    kept = []
+    for sigmet in sigmets:
+        points = [point for point in (sigmet.area or []) if "lat" in point and "lon" in point]
+        if not points:
+            kept.append(sigmet)
+            continue
+        lats = [point["lat"] for point in points]
+        lons = [point["lon"] for point in points]
+        if min(lats) <= max_lat and max(lats) >= min_lat and min(lons) <= max_lon and max(lons) >= min_lon:
+            kept.append(sigmet)
+    return kept
 
 @router.get("/sigmet", response_model=List[SigmetResponse], summary="Fetch SIGMET data")
 async def get_sigmet(
+    request: Request,
+    response: Response,
     bbox: Optional[str] = Query(None, description="Bounding box (e.g., '24.5,-100.0,36.5,-80.0')"),
-    include_summary: Optional[bool] = Query(False, description="Include AI-generated pilot-friendly summary")
+    include_summary: Optional[bool] = Query(False, description="Include AI-generated pilot-friendly summary"),
+    summary_mode: Optional[str] = Query(None, pattern=SUMMARY_MODE_PATTERN, description="local (parser summary), llm or auto (LLM only for significant weather); defaults to the server setting"),
+    source: str = Query("auto", pattern="^(auto|awc|avwx)$", description="Provider: auto (AWC with AVWX failover), awc or avwx"),
+    fieldset: Projection = Depends(projection(SigmetResponse)),
+    service: FailoverSigmetService = Depends(get_failover_sigmet_service)
 ):
     """
     Retrieve SIGMET data for a specific area.
     
     - **bbox**: Bounding box coordinates (e.g., '24.5,-100.0,36.5,-80.0')
     - **include_summary**: Include AI-generated pilot-friendly summary
+    - **summary_mode**: `local`, `llm` or `auto`; defaults to the SUMMARY_MODE server setting
+    - **source**: Provider selection; `auto` fails over to AVWX when AWC is failing or slow
+    - **fields** / **exclude**: Comma-separated report fields to return / leave out
     """
-    service = AWCSigmetService()
-    try:
-        sigmets = await service.get_sigmets(bbox=bbox)
-        
-        # Generate summaries if requested
-        if include_summary and sigmets:
-            for sigmet in sigmets:
-                # Convert to dict for the OpenAI service
-                sigmet_dict = sigmet.model_dump() if hasattr(sigmet, "model_dump") else sigmet.dict()
-                summary = await openai_service.generate_summary("sigmet", sigmet_dict)
-                if summary:
-                    # Add a pilot_summary field to the sigmet
-                    if not hasattr(sigmet, "pilot_summary"):
-                        sigmet.pilot_summary = summary
-        
-        return sigmets
-    finally:
-        await service.close()
+    sigmets = await service.get_sigmets(source=source)
+    if bbox:
+        sigmets = _filter_sigmets_by_bbox(sigmets, _parse_bbox(bbox))
+    _set_age_header(response, sigmets)
+    not_modified = revalidate(request, response, sigmets, *_summary_variant(include_summary, summary_mode))
+    if not_modified is not None:
+        return not_modified
+
+    # Generate summaries if requested (concurrently, within the batch time budget)
+    if include_summary and sigmets and fieldset.includes("pilot_summary"):
+        dumped = [_dump_report(sigmet) for sigmet in sigmets]
+        summaries = await summarize_many("sigmet", dumped, summary_mode)
+        _withhold_degraded_etag(response, "sigmet", dumped, summaries, summary_mode)
+        for sigmet, (summary, _) in zip(sigmets, summaries):
+            if summary:
+                sigmet.pilot_summary = summary
+
+    return fast_response(fieldset.apply_all(sigmets), response, force=fieldset.active)
 
 @router.get("/cockpit/pirep/{station}", response_model=Dict[str, Any], summary="Fetch enhanced PIREP data for cockpit display")
 async def get_cockpit_pirep(
+    request: Request,
+    response: Response,
     station: str,
     distance: Optional[int] = Query(200, description="Search radius in nautical miles"),
     age: Optional[float] = Query(1.5, description="Maximum age of reports in hours"),
@@ -147,7 +327,10 @@ async def get_cockpit_pirep(
     flight_level_max: Optional[int] = Query(None, description="Maximum flight level filter"),
     hazard_type: Optional[str] = Query(None, description="Filter by hazard type (turbulence, icing, both, any)"),
     severity: Optional[str] = Query(None, description="Filter by severity (light, moderate, severe)"),
-    include_summaries: Optional[bool] = Query(True, description="Include AI-generated pilot-friendly summaries")
+    include_summaries: Optional[bool] = Query(True, description="Include AI-generated pilot-friendly summaries"),
+    summary_mode: Optional[str] = Query(None, pattern=SUMMARY_MODE_PATTERN, description="local (parser summary), llm or auto (LLM only for significant weather); defaults to the server setting"),
+    fieldset: Projection = Depends(projection(PirepResponse)),
+    service: PirepService = Depends(get_pirep_service)
 ):
     """
     Retrieve enhanced PIREP data for cockpit display with additional filtering options.
@@ -160,131 +343,67 @@ async def get_cockpit_pirep(
     - **hazard_type**: Filter by type of hazard (turbulence, icing, both, any)
     - **severity**: Filter by severity level
     - **include_summaries**: Include AI-generated pilot-friendly summaries
+    - **summary_mode**: `local`, `llm` or `auto`; defaults to the SUMMARY_MODE server setting
+    - **fields** / **exclude**: Comma-separated PIREP fields to return / leave out
     """
-    service = PirepService()
-    try:
-        pireps = await service.get_pireps(station, distance, age)
-        
-        # Apply additional filtering if specified
-        if flight_level_min is not None or flight_level_max is not None or hazard_type or severity:
-            filtered_pireps = []
-            for pirep in pireps:
-                # Handle altitude filtering
-                if flight_level_min is not None or flight_level_max is not None:
-                    # Skip if altitude is not a number
-                    if not isinstance(pirep.altitude, (int, float)):
-                        continue
-                        
-                    altitude = pirep.altitude
-                    # Convert flight level to altitude if needed
-                    flight_level = altitude / 100
-                    
-                    if flight_level_min is not None and flight_level < flight_level_min:
-                        continue
-                    if flight_level_max is not None and flight_level > flight_level_max:
-                        continue
-                
-                # Handle hazard type filtering
-                if hazard_type:
-                    has_turbulence = pirep.turbulence is not None and pirep.turbulence.get("intensity")
-                    has_icing = pirep.icing is not None and pirep.icing.get("intensity")
-                    
-                    if hazard_type == "turbulence" and not has_turbulence:
-                        continue
-                    elif hazard_type == "icing" and not has_icing:
-                        continue
-                    elif hazard_type == "both" and not (has_turbulence and has_icing):
-                        continue
-                    elif hazard_type == "any" and not (has_turbulence or has_icing):
-                        continue
-                
-                # Handle severity filtering
-                if severity:
-                    severity_match = False
-                    if pirep.turbulence and pirep.turbulence.get("intensity"):
-                        turb_intensity = pirep.turbulence["intensity"].lower()
-                        if (severity == "light" and ("lgt" in turb_intensity or "light" in turb_intensity)) or \
-                           (severity == "moderate" and ("mod" in turb_intensity or "moderate" in turb_intensity)) or \
-                           (severity == "severe" and ("sev" in turb_intensity or "severe" in turb_intensity)):
-                            severity_match = True
-                    
-                    if pirep.icing and pirep.icing.get("intensity"):
-                        ice_intensity = pirep.icing["intensity"].lower()
-                        if (severity == "light" and ("lgt" in ice_intensity or "light" in ice_intensity or "trc" in ice_intensity)) or \
-                           (severity == "moderate" and ("mod" in ice_intensity or "moderate" in ice_intensity)) or \
-                           (severity == "severe" and ("sev" in ice_intensity or "severe" in ice_intensity)):
-                            severity_match = True
-                    
-                    if not severity_match:
-                        continue
-                
-                filtered_pireps.append(pirep)
-            
-            pireps = filtered_pireps
-        
-        # Generate summaries if requested
-        if include_summaries and pireps:
-            for pirep in pireps:
-                # Convert to dict for the OpenAI service
-                pirep_dict = pirep.model_dump() if hasattr(pirep, "model_dump") else pirep.dict()
-                summary = await openai_service.generate_summary("pirep", pirep_dict)
-                if summary:
-                    # Add the summary to the response
-                    pirep.hazard_summary = summary
-        
-        # Group PIREPs by general location areas for better organization
-        grouped_pireps = {}
-        for pirep in pireps:
-            # Extract first part of location (usually airport code)
-            location_key = pirep.location.split()[0] if pirep.location and ' ' in pirep.location else pirep.location
-            
-            if location_key not in grouped_pireps:
-                grouped_pireps[location_key] = []
-            
-            grouped_pireps[location_key].append(pirep)
-        
-        # Add statistics for the retrieved PIREPs
-        stats = {
-            "total_count": len(pireps),
-            "turbulence_count": sum(1 for p in pireps if p.turbulence and p.turbulence.get("intensity")),
-            "icing_count": sum(1 for p in pireps if p.icing and p.icing.get("intensity")),
-            "urgent_count": sum(1 for p in pireps if p.report_type == "UUA"),
-            "altitude_distribution": {}
+    pireps = await service.get_pireps(station, distance, age)
+
+    # Filter, group by location and count hazards in one pass over the numeric hazard fields
+    pireps, grouped_pireps, stats = filter_pireps(pireps, flight_level_min, flight_level_max, hazard_type, severity)
+    _set_age_header(response, pireps)
+    not_modified = revalidate(request, response, pireps, *_summary_variant(include_summaries, summary_mode))
+    if not_modified is not None:
+        return not_modified
+
+    # Generate summaries if requested (concurrently, within the batch time budget)
+    summary_status = None
+    if include_summaries and pireps and fieldset.includes("hazard_summary"):
+        dumped = [_dump_report(pirep) for pirep in pireps]
+        summaries = await summarize_many("pirep", dumped, summary_mode)
+        _withhold_degraded_etag(response, "pirep", dumped, summaries, summary_mode)
+        for pirep, (summary, _) in zip(pireps, summaries):
+            if summary:
+                # Add the summary to the response
+                pirep.hazard_summary = summary
+        completed = sum(1 for summary, _ in summaries if summary)
+        summary_status = {
+            "requested": len(pireps),
+            "completed": completed,
+            "partial": completed < len(pireps),
+            "llm": sum(1 for _, source in summaries if source == "llm"),
         }
-        
-        # Create altitude distribution
-        for pirep in pireps:
-            if isinstance(pirep.altitude, (int, float)):
-                # Group by 5,000 ft intervals
-                altitude_group = f"{(pirep.altitude // 5000) * 5}-{((pirep.altitude // 5000) * 5) + 5}k"
-                if altitude_group not in stats["altitude_distribution"]:
-                    stats["altitude_distribution"][altitude_group] = 0
-                stats["altitude_distribution"][altitude_group] += 1
-        
-        return {
-            "pireps": pireps,
-            "grouped_pireps": grouped_pireps,
-            "stats": stats,
-            "query_params": {
-                "station": station,
-                "distance": distance,
-                "age": age,
-                "filters_applied": {
-                    "flight_level_min": flight_level_min,
-                    "flight_level_max": flight_level_max,
-                    "hazard_type": hazard_type,
-                    "severity": severity
-                }
+
+    if fieldset.active:
+        grouped_pireps = {key: fieldset.apply_all(items) for key, items in grouped_pireps.items()}
+
+    return fast_response({
+        "pireps": fieldset.apply_all(pireps),
+        "grouped_pireps": grouped_pireps,
+        "stats": stats,
+        "summary_status": summary_status,
+        "query_params": {
+            "station": station,
+            "distance": distance,
+            "age": age,
+            "filters_applied": {
+                "flight_level_min": flight_level_min,
+                "flight_level_max": flight_level_max,
+                "hazard_type": hazard_type,
+                "severity": severity
             }
         }
-    finally:
-        await service.close()
+    }, response)
 
 @router.get("/cockpit/metar/{station}", response_model=Dict[str, Any], summary="Fetch enhanced METAR data for cockpit display")
 async def get_cockpit_metar(
+    request: Request,
+    response: Response,
     station: str,
     hours: Optional[int] = Query(1, description="Hours of history to include"),
-    include_summary: Optional[bool] = Query(True, description="Include AI-generated pilot-friendly summary")
+    include_summary: Optional[bool] = Query(True, description="Include AI-generated pilot-friendly summary"),
+    summary_mode: Optional[str] = Query(None, pattern=SUMMARY_MODE_PATTERN, description="local (parser summary), llm or auto (LLM only for significant weather); defaults to the server setting"),
+    fieldset: Projection = Depends(projection(MetarResponse)),
+    service: AWCMetarService = Depends(get_metar_service)
 ):
     """
     Retrieve enhanced METAR data for cockpit display.
@@ -292,45 +411,54 @@ async def get_cockpit_metar(
     - **station**: ICAO airport code (e.g., KATL)
     - **hours**: Hours of history to include (default: 1)
     - **include_summary**: Include AI-generated pilot-friendly summary
+    - **summary_mode**: `local`, `llm` or `auto`; defaults to the SUMMARY_MODE server setting
+    - **fields** / **exclude**: Comma-separated report fields to return / leave out
     """
-    service = AWCMetarService()
-    try:
-        metar = await service.get_metar(station, hours)
-        
-        # Generate summary if requested
-        if include_summary and metar and metar.raw_text:
-            # Convert to dict for the OpenAI service
-            metar_dict = metar.model_dump() if hasattr(metar, "model_dump") else metar.dict()
-            summary = await openai_service.generate_summary("metar", metar_dict)
-            if summary:
-                # Add the summary to the response
-                metar.pilot_summary = summary
-        
-        # Enhance the response for cockpit display
-        enhanced_data = {
-            "metar": metar,
-            "display_data": {
-                "flight_category": metar.flight_category,
-                "ceiling": metar.ceiling,
-                "visibility": metar.visibility,
-                "wind": {
-                    "direction": metar.wind_direction,
-                    "speed": metar.wind_speed
-                },
-                "temperature": metar.temperature,
-                "dewpoint": metar.dewpoint
-            }
+    metar = await service.get_metar(station, hours)
+    _set_age_header(response, [metar])
+    not_modified = revalidate(request, response, [metar], *_summary_variant(include_summary, summary_mode))
+    if not_modified is not None:
+        return not_modified
+
+    # Generate summary if requested
+    summary_source = None
+    if include_summary and metar and metar.raw_text and fieldset.includes("pilot_summary"):
+        dumped = _dump_report(metar)
+        summary, summary_source = await summarize("metar", dumped, summary_mode)
+        _withhold_degraded_etag(response, "metar", [dumped], [(summary, summary_source)], summary_mode)
+        if summary:
+            # Add the summary to the response
+            metar.pilot_summary = summary
+
+    # Enhance the response for cockpit display
+    enhanced_data = {
+        "metar": fieldset.apply(metar),
+        "summary_source": summary_source,
+        "display_data": {
+            "flight_category": metar.flight_category,
+            "ceiling": metar.ceiling,
+            "visibility": metar.visibility,
+            "wind": {
+                "direction": metar.wind_direction,
+                "speed": metar.wind_speed
+            },
+            "temperature": metar.temperature,
+            "dewpoint": metar.dewpoint
         }
-        
-        return enhanced_data
-    finally:
-        await service.close()
+    }
+
+    return fast_response(enhanced_data, response)
 
 @router.get("/cockpit/taf/{station}", response_model=Dict[str, Any], summary="Fetch enhanced TAF data for cockpit display")
 async def get_cockpit_taf(
+    request: Request,
+    response: Response,
     station: str,
     hours: Optional[int] = Query(12, description="Hours of forecast to include"),
-    include_summary: Optional[bool] = Query(True, description="Include AI-generated pilot-friendly summary")
+    include_summary: Optional[bool] = Query(True, description="Include AI-generated pilot-friendly summary"),
+    summary_mode: Optional[str] = Query(None, pattern=SUMMARY_MODE_PATTERN, description="local (parser summary), llm or auto (LLM only for significant weather); defaults to the server setting"),
+    fieldset: Projection = Depends(projection(TafResponse)),
+    service: FailoverTafService = Depends(get_failover_taf_service)
 ):
     """
     Retrieve enhanced TAF data for cockpit display.
@@ -338,33 +466,37 @@ async def get_cockpit_taf(
     - **station**: ICAO airport code (e.g., KATL)
     - **hours**: Hours of forecast to include (default: 12)
     - **include_summary**: Include AI-generated pilot-friendly summary
+    - **summary_mode**: `local`, `llm` or `auto`; defaults to the SUMMARY_MODE server setting
+    - **fields** / **exclude**: Comma-separated report fields to return / leave out
     """
-    service = AWCTafService()
-    try:
-        taf = await service.get_taf(station, hours)
-        
-        # Generate summary if requested
-        if include_summary and taf and taf.raw_text:
-            # Convert to dict for the OpenAI service
-            taf_dict = taf.model_dump() if hasattr(taf, "model_dump") else taf.dict()
-            summary = await openai_service.generate_summary("taf", taf_dict)
-            if summary:
-                # Add the summary to the response
-                taf.pilot_summary = summary
-        
-        # Enhance the response for cockpit display
-        enhanced_data = {
-            "taf": taf,
-            "display_data": {
-                "valid_from": taf.valid_from,
-                "valid_to": taf.valid_to,
-                "forecast_periods": taf.forecast if taf.forecast else []
-            }
+    taf = await service.get_taf(station, hours)
+    _set_age_header(response, [taf])
+    not_modified = revalidate(request, response, [taf], *_summary_variant(include_summary, summary_mode))
+    if not_modified is not None:
+        return not_modified
+
+    # Generate summary if requested
+    summary_source = None
+    if include_summary and taf and taf.raw_text and fieldset.includes("pilot_summary"):
+        dumped = _dump_report(taf)
+        summary, summary_source = await summarize("taf", dumped, summary_mode)
+        _withhold_degraded_etag(response, "taf", [dumped], [(summary, summary_source)], summary_mode)
+        if summary:
+            # Add the summary to the response
+            taf.pilot_summary = summary
+
+    # Enhance the response for cockpit display
+    enhanced_data = {
+        "taf": fieldset.apply(taf),
+        "summary_source": summary_source,
+        "display_data": {
+            "valid_from": taf.valid_from,
+            "valid_to": taf.valid_to,
+            "forecast_periods": taf.forecast if taf.forecast else []
         }
-        
-        return enhanced_data
-    finally:
-        await service.close()
+    }
+
+    return fast_response(enhanced_data, response)
 
 @router.get("/catalog", response_model=Dict[str, Any], summary="Get API catalog")
 async def get_api_catalog():
@@ -385,6 +517,7 @@ async def get_api_catalog():
                 "description": "METARs",
                 "endpoints": [
                     {"path": "/metar/{station}", "method": "GET", "description": "Get METAR for a station"},
+                    {"path": "/metar?ids=...", "method": "GET", "description": "Get METARs for many stations in one call"},
                     {"path": "/cockpit/metar/{station}", "method": "GET", "description": "Get enhanced METAR for cockpit display"}
                 ]
             },
@@ -392,6 +525,7 @@ async def get_api_catalog():
                 "description": "TAFs",
                 "endpoints": [
                     {"path": "/taf/{station}", "method": "GET", "description": "Get TAF for a station"},
+                    {"path": "/taf?ids=...", "method": "GET", "description": "Get TAFs for many stations in one call"},
                     {"path": "/cockpit/taf/{station}", "method": "GET", "description": "Get enhanced TAF for cockpit display"}
                 ]
             },
@@ -400,10 +534,31 @@ async def get_api_catalog():
                 "endpoints": [
                     {"path": "/sigmet", "method": "GET", "description": "Get SIGMETs for an area"}
                 ]
+            },
+            "route": {
+                "description": "Route briefings",
+                "endpoints": [
+                    {"path": "/route-briefing", "method": "POST", "description": "Get METAR/TAF, PIREPs and SIGMETs along a flight-plan corridor"}
+                ]
+            },
+            "push": {
+                "description": "Report updates pushed over Server-Sent Events",
+                "endpoints": [
+                    {"path": "/subscribe?ids=...", "method": "GET", "description": "Receive new METAR/SPECI, TAF amendments and nearby urgent PIREPs for a station list"}
+                ]
+            },
+            "system": {
+                "description": "Operational endpoints",
+                "endpoints": [
+                    {"path": "/batch", "method": "POST", "description": "Run many GET requests in one round trip"},
+                    {"path": "/health", "method": "GET", "description": "Health check"},
+                    {"path": "/stats", "method": "GET", "description": "Upstream coalescing, pool and cache statistics"}
+                ]
             }
         },
         "features": {
-            "ai_summaries": "AI-generated pilot-friendly summaries available by adding include_summary=true"
+            "ai_summaries": "AI-generated pilot-friendly summaries available by adding include_summary=true",
+            "sparse_fieldsets": "Trim reports with fields=a,b,c or exclude=raw_data,parsed_metar on product routes"
         },
         "sources": [
             {"id": "awc", "name": "Aviation Weather Center", "url": "https://aviationweather.gov/"}
@@ -412,7 +567,10 @@ async def get_api_catalog():
     }
 
 @router.get("/health", response_model=Dict[str, Any], summary="Health check")
-async def health_check():
+async def health_check(
+    service: PirepService = Depends(get_pirep_service),
+    registry: UpstreamClientRegistry = Depends(get_client_registry)
+):
     """
     Check the health of the API and its dependencies.
     """
@@ -424,7 +582,6 @@ async def health_check():
     }
     
     # Check AWC API
-    service = PirepService()
     try:
         # Try a simple API call
         await service.get_pireps("KJFK", distance=200, age=1.5)
@@ -438,8 +595,8 @@ async def health_check():
             "error": str(e)
         }
         health_status["status"] = "degraded"
-    finally:
-        await service.close()
+    
+    health_status["upstream_pools"] = registry.stats()
     
     # Check OpenAI API
     if openai_service.api_key:
@@ -473,6 +630,28 @@ async def health_check():
     health_status["response_time"] = round((time.time() - start_time) * 1000, 2)  # Convert to ms
     return health_status
 
+@router.get("/stats", response_model=Dict[str, Any], summary="Upstream and cache statistics")
+async def get_stats(registry: UpstreamClientRegistry = Depends(get_client_registry)):
+    """
+    Report counters for upstream request coalescing, connection pools, provider failover,
+    rate limiting (queue depth, wait time, concurrency limit) and caches.
+    """
+    return {
+        "timestamp": time.time(),
+        "upstream": {
+            "coalescing": upstream_flights.stats(),
+            "pools": registry.stats(),
+            "providers": all_router_stats(),
+            "rate_limits": rate_limiters.stats(),
+            "conditional_get": upstream_validators.stats()
+        },
+        "caches": all_cache_stats(),
+        "summary_cache": summary_cache.stats(),
+        "summary_precompute": summary_precomputer.stats(),
+        "report_push": report_hub.stats(),
+        "metar_bulk_ingest": metar_ingester.stats()
+    }
+
 @router.post("/weather-summary/metar", response_model=Dict[str, Any], summary="Generate METAR summary")
 async def generate_metar_summary(request: Dict[str, Any]):
     """
@@ -687,13 +866,178 @@ async def generate_pirep_summary(request: Dict[str, Any]):
             "hazard_assessment": "Consider all available pilot reports when planning your flight."
         }
 
+def _decode_report(report_type: str, request: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode the raw report text of a /weather-summary request"""
+    text = request["text"].strip()
+    if report_type == "metar":
+        parsed = parse_metar(text)
+        return {"raw_text": text, "station": text.split()[0], "parsed_metar": parsed,
+                "pilot_summary": parsed.get("pilot_summary")}
+    if report_type == "taf":
+        parsed = parse_taf(text)
+        parts = text.split()
+        station = parts[1] if parts[0].upper() == "TAF" and len(parts) > 1 else parts[0]
+        return {"raw_text": text, "station": station, "parsed_taf": parsed,
+                "pilot_summary": parsed.get("pilot_summary")}
+    pirep = PirepResponse(source="request", raw_text=text, location=request.get("location", "Unknown location"))
+    PirepService()._extract_pirep_fields(pirep, text)
+    return _dump_report(pirep)
+
+@router.post("/weather-summary/{report_type}/stream", summary="Stream an AI report summary (Server-Sent Events)")
+async def stream_weather_summary(
+    request: Dict[str, Any],
+    report_type: str = Path(..., pattern="^(metar|taf|pirep)$", description="metar, taf or pirep")
+):
+    """
+    Stream a pilot-friendly AI summary of a METAR, TAF or PIREP as Server-Sent Events.
+    
+    Request body should contain:
+    - text: The raw report text to summarize
+    - location: The location code associated with the PIREP (PIREPs only)
+    
+    Events, in order:
+    - `report`: the decoded report, sent immediately
+    - `token`: `{"text": ...}` for each piece of the summary as the model produces it
+    - `error`: `{"detail": ...}` if the AI summary failed (the `summary` event then carries the fallback)
+    - `summary`: `{"summary": ..., "source": "llm" | "local"}` with the complete text
+    - `done`
+    
+    Closing the connection cancels the AI request.
+    """
+    if not request.get("text") or not str(request["text"]).strip():
+        raise HTTPException(status_code=400, detail="Missing required field 'text'")
+    
+    try:
+        report = _decode_report(report_type, request)
+    except Exception as e:
+        logger.error(f"Error decoding {report_type.upper()} for streaming summary: {str(e)}")
+        report = {"raw_text": request["text"].strip(), "location": request.get("location")}
+    
+    async def events():
+        yield sse_event("report", report)
+        summary, source = None, "llm"
+        if openai_service.api_key:
+            parts = []
+            try:
+                async for delta in openai_service.stream_summary(report_type, report):
+                    parts.append(delta)
+                    yield sse_event("token", {"text": delta})
+                summary = "".join(parts).strip() or None
+            except Exception as e:
+                logger.error(f"Error streaming {report_type.upper()} summary: {str(e)}")
+                yield sse_event("error", {"detail": str(e)})
+        if not summary:
+            summary, source = local_summary(report_type, report), "local"
+        yield sse_event("summary", {"summary": summary, "source": source})
+        yield sse_event("done", {})
+    
+    return event_stream(events())
+
+async def _fetch_source(name: str, call: Awaitable[Any], timeout: float) -> Tuple[str, Any, Dict[str, Any]]:
+    """
+    Await one report source within its deadline
+    
+    Returns:
+        (name, result or None, status) where status["status"] is ok, error or timeout
+    """
+    started = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(call, timeout=timeout)
+        status = {"status": "ok"}
+        if is_error_response(result):
+            items = result if isinstance(result, list) else [result]
+            status = {"status": "error", "error": next(
+                item.raw_text for item in items if (item.raw_text or "").startswith("Error fetching")
+            )}
+    except asyncio.TimeoutError:
+        logger.warning(f"Airport summary source {name} missed its {timeout}s deadline")
+        result, status = None, {"status": "timeout", "error": f"No response within {timeout}s"}
+    except Exception as e:
+        logger.error(f"Error fetching {name}: {str(e)}")
+        result, status = None, {"status": "error", "error": str(e)}
+    status["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return name, result, status
+
+def _station_position(*reports: Any) -> Optional[Tuple[float, float]]:
+    """Station lat/lon from the first METAR/TAF record that carries it"""
+    for report in reports:
+        position = report_position(getattr(report, "raw_data", None))
+        if position is not None:
+            return position
+    return None
+
+def _filter_sigmets_near(sigmets: List[SigmetResponse], position: Tuple[float, float], radius_nm: float) -> List[SigmetResponse]:
+    """Keep SIGMETs whose area contains or passes within radius_nm of the position (and those without an area)"""
+    lat, lon = position
+    kept = []
+    for sigmet in sigmets:
+        points = area_points(sigmet.area)
+        if not points or polygon_within_nm(lat, lon, points, radius_nm):
+            kept.append(sigmet)
+    return kept
+
+async def _collect_airport_reports(
+    station: str,
+    distance: int,
+    age: float,
+    taf_hours: int,
+    metar_hours: int,
+    metar_service: AWCMetarService,
+    taf_service: FailoverTafService,
+    pirep_service: PirepService,
+    sigmet_service: FailoverSigmetService
+) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """
+    Fetch every report source for an airport summary concurrently
+    
+    Returns:
+        (reports, sources, errors) where sources holds ok/error/timeout per source and errors
+        maps each failed source to its error message
+    """
+    deadline = settings.AIRPORT_SUMMARY_SOURCE_TIMEOUT
+    
+    # Fetch every source concurrently; a source that misses its deadline is reported as
+    # timed out while the others are still used
+    results = await asyncio.gather(
+        _fetch_source("metar", metar_service.get_metar(station, metar_hours), deadline),
+        _fetch_source("taf", taf_service.get_taf(station, taf_hours), deadline),
+        _fetch_source("pireps", pirep_service.get_pireps(station, distance, age), deadline),
+        _fetch_source("sigmets", sigmet_service.get_sigmets(), deadline),
+    )
+    fetched = {name: value for name, value, _ in results}
+    sources = {name: status for name, _, status in results}
+    errors = {name: status["error"] for name, status in sources.items() if "error" in status}
+    
+    # Keep only SIGMETs near the station so the prompt does not carry the whole country
+    sigmets = fetched["sigmets"] or []
+    position = _station_position(fetched["metar"], fetched["taf"])
+    if position is not None:
+        sigmets = _filter_sigmets_near(sigmets, position, settings.SIGMET_VICINITY_NM)
+        sources["sigmets"]["vicinity_nm"] = settings.SIGMET_VICINITY_NM
+    elif sigmets:
+        sources["sigmets"]["note"] = "Station position unknown; SIGMETs not filtered by distance"
+    
+    reports = {
+        "metar": _dump_report(fetched["metar"]),
+        "taf": _dump_report(fetched["taf"]),
+        "pireps": [_dump_report(p) for p in fetched["pireps"] or []],
+        "sigmets": [_dump_report(s) for s in sigmets],
+    }
+    return reports, sources, errors
+
 @router.get("/airport-summary/{station}", response_model=Dict[str, Any], summary="Get comprehensive airport weather summary")
 async def get_airport_summary(
+    request: Request,
+    response: Response,
     station: str,
     distance: Optional[int] = Query(200, description="Search radius for PIREPs in nautical miles"),
     age: Optional[float] = Query(1.5, description="Maximum age of PIREPs in hours"),
     taf_hours: Optional[int] = Query(12, description="Hours of TAF forecast to include"),
-    metar_hours: Optional[int] = Query(1, description="Hours of METAR history to include")
+    metar_hours: Optional[int] = Query(1, description="Hours of METAR history to include"),
+    metar_service: AWCMetarService = Depends(get_metar_service),
+    taf_service: FailoverTafService = Depends(get_failover_taf_service),
+    pirep_service: PirepService = Depends(get_pirep_service),
+    sigmet_service: FailoverSigmetService = Depends(get_failover_sigmet_service)
 ):
     """
     Retrieve all weather reports for an airport and generate a comprehensive AI-powered summary.
@@ -705,59 +1049,24 @@ async def get_airport_summary(
     - **metar_hours**: Hours of METAR history to include
     
     Returns a comprehensive summary with all reports (METAR, TAF, PIREP, SIGMET) and an AI-generated analysis.
+    Sources are fetched concurrently, each within AIRPORT_SUMMARY_SOURCE_TIMEOUT; `sources` reports
+    ok/error/timeout per source so partial results can be recognised. Only SIGMETs within
+    SIGMET_VICINITY_NM of the station are included.
     """
     try:
-        # Fetch all reports concurrently
-        metar_service = AWCMetarService()
-        taf_service = AWCTafService()
-        pirep_service = PirepService()
-        sigmet_service = AWCSigmetService()
-        
-        reports = {}
-        errors = {}
-        
-        try:
-            # Fetch METAR
-            metar = await metar_service.get_metar(station, metar_hours)
-            reports["metar"] = metar.model_dump() if hasattr(metar, "model_dump") else metar.dict()
-        except Exception as e:
-            logger.error(f"Error fetching METAR: {str(e)}")
-            errors["metar"] = str(e)
-            reports["metar"] = None
-        
-        try:
-            # Fetch TAF
-            taf = await taf_service.get_taf(station, taf_hours)
-            reports["taf"] = taf.model_dump() if hasattr(taf, "model_dump") else taf.dict()
-        except Exception as e:
-            logger.error(f"Error fetching TAF: {str(e)}")
-            errors["taf"] = str(e)
-            reports["taf"] = None
-        
-        try:
-            # Fetch PIREPs
-            pireps = await pirep_service.get_pireps(station, distance, age)
-            reports["pireps"] = [p.model_dump() if hasattr(p, "model_dump") else p.dict() for p in pireps]
-        except Exception as e:
-            logger.error(f"Error fetching PIREPs: {str(e)}")
-            errors["pireps"] = str(e)
-            reports["pireps"] = []
-        
-        try:
-            # Fetch SIGMETs (using a bounding box around the station - simplified approach)
-            # For now, fetch all SIGMETs and filter client-side if needed
-            sigmets = await sigmet_service.get_sigmets()
-            reports["sigmets"] = [s.model_dump() if hasattr(s, "model_dump") else s.dict() for s in sigmets]
-        except Exception as e:
-            logger.error(f"Error fetching SIGMETs: {str(e)}")
-            errors["sigmets"] = str(e)
-            reports["sigmets"] = []
+        station = station.upper()
+        reports, sources, errors = await _collect_airport_reports(
+            station, distance, age, taf_hours, metar_hours, metar_service, taf_service, pirep_service, sigmet_service
+        )
         
-        finally:
-            await metar_service.close()
-            await taf_service.close()
-            await pirep_service.close()
-            await sigmet_service.close()
+        # Checked before the AI summary, which follows from the reports; timings in sources
+        # and the timestamp change on every request and are not hashed
+        not_modified = revalidate(
+            request, response, [reports["metar"], reports["taf"], *reports["pireps"], *reports["sigmets"]],
+            errors, PROMPT_VERSION, openai_service.model
+        )
+        if not_modified is not None:
+            return not_modified
         
         # Generate comprehensive AI summary
         ai_summary = None
@@ -771,11 +1080,15 @@ async def get_airport_summary(
                 "sigmets": reports.get("sigmets", [])
             }
             
-            # Use OpenAI to generate a comprehensive summary
-            ai_summary = await openai_service.generate_comprehensive_summary(summary_data)
+            # Use OpenAI to generate a comprehensive summary; the fallback one is not revalidated
+            ai_summary = await openai_service.generate_comprehensive_summary(summary_data, use_fallback=False)
+            if ai_summary is None:
+                withhold_etag(response)
+                ai_summary = openai_service._generate_fallback_comprehensive_summary(summary_data)
             
         except Exception as e:
             logger.error(f"Error generating AI summary: {str(e)}")
+            withhold_etag(response)
             # Fallback summary
             ai_summary = {
                 "overview": f"Comprehensive weather summary for {station}",
@@ -785,20 +1098,341 @@ async def get_airport_summary(
                 "recommendations": "Always verify current conditions before flight."
             }
         
-        return {
+        return fast_response({
             "station": station,
             "timestamp": time.time(),
             "reports": reports,
             "summary": ai_summary,
             "errors": errors if errors else None,
+            "sources": sources,
             "metadata": {
                 "distance": distance,
                 "age": age,
                 "taf_hours": taf_hours,
                 "metar_hours": metar_hours
             }
-        }
+        }, response)
         
     except Exception as e:
         logger.error(f"Error in get_airport_summary: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating airport summary: {str(e)}")
+
+
+@router.get("/airport-summary/{station}/stream", summary="Stream comprehensive airport weather summary (Server-Sent Events)")
+async def stream_airport_summary(
+    station: str,
+    distance: Optional[int] = Query(200, description="Search radius for PIREPs in nautical miles"),
+    age: Optional[float] = Query(1.5, description="Maximum age of PIREPs in hours"),
+    taf_hours: Optional[int] = Query(12, description="Hours of TAF forecast to include"),
+    metar_hours: Optional[int] = Query(1, description="Hours of METAR history to include"),
+    metar_service: AWCMetarService = Depends(get_metar_service),
+    taf_service: FailoverTafService = Depends(get_failover_taf_service),
+    pirep_service: PirepService = Depends(get_pirep_service),
+    sigmet_service: FailoverSigmetService = Depends(get_failover_sigmet_service)
+):
+    """
+    Streaming variant of `/airport-summary/{station}` using Server-Sent Events.
+    
+    Events, in order:
+    - `reports`: station, reports, sources, errors and metadata, sent as soon as the sources are fetched
+    - `token`: `{"text": ...}` for each piece of the AI summary (JSON text) as the model produces it
+    - `error`: `{"detail": ...}` if the AI summary failed (the `summary` event then carries the fallback)
+    - `summary`: the decoded summary, as in the `summary` field of the non-streaming route
+    - `done`
+    
+    Closing the connection cancels the AI request.
+    """
+    station = station.upper()
+    try:
+        reports, sources, errors = await _collect_airport_reports(
+            station, distance, age, taf_hours, metar_hours, metar_service, taf_service, pirep_service, sigmet_service
+        )
+    except Exception as e:
+        logger.error(f"Error in stream_airport_summary: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error generating airport summary: {str(e)}")
+    
+    async def events():
+        yield sse_event("reports", {
+            "station": station,
+            "timestamp": time.time(),
+            "reports": reports,
+            "errors": errors if errors else None,
+            "sources": sources,
+            "metadata": {
+                "distance": distance,
+                "age": age,
+                "taf_hours": taf_hours,
+                "metar_hours": metar_hours
+            }
+        })
+        summary_data = {"station": station, **reports}
+        summary = None
+        if openai_service.api_key:
+            parts = []
+            try:
+                async for delta in openai_service.stream_comprehensive_summary(summary_data):
+                    parts.append(delta)
+                    yield sse_event("token", {"text": delta})
+                if parts:
+                    summary = openai_service.parse_comprehensive_summary("".join(parts))
+            except Exception as e:
+                logger.error(f"Error streaming AI summary: {str(e)}")
+                yield sse_event("error", {"detail": str(e)})
+        if summary is None:
+            summary = openai_service._generate_fallback_comprehensive_summary(summary_data)
+        yield sse_event("summary", summary)
+        yield sse_event("done", {})
+    
+    return event_stream(events())
+
+async def _waypoint_positions(
+    stations: List[str],
+    metar_service: AWCMetarService,
+    taf_service: AWCTafService
+) -> Tuple[Dict[str, Tuple[float, float]], Dict[str, MetarResponse]]:
+    """
+    Waypoint positions from their METAR records, or their TAF records for stations without one
+    
+    Returns:
+        (position per resolved station, the waypoints' METARs)
+    """
+    metars = await metar_service.get_metars(stations)
+    positions = {}
+    for station, metar in metars.items():
+        position = report_position(metar.raw_data)
+        if position is not None:
+            positions[station] = position
+    unresolved = [station for station in stations if station not in positions]
+    if unresolved:
+        for station, taf in (await taf_service.get_tafs(unresolved)).items():
+            position = report_position(taf.raw_data)
+            if position is not None:
+                positions[station] = position
+    return positions, metars
+
+def _corridor_stations(
+    metars: Dict[str, MetarResponse],
+    track: RouteTrack,
+    corridor_nm: float,
+    waypoints: List[str]
+) -> List[Dict[str, Any]]:
+    """Stations within corridor_nm of the track (waypoints always), ordered along the route"""
+    stations = []
+    for station, metar in metars.items():
+        position = report_position(metar.raw_data)
+        if position is None:
+            continue
+        cross, along = track.locate(*position)
+        if cross <= corridor_nm or station in waypoints:
+            stations.append({
+                "station": station,
+                "lat": position[0],
+                "lon": position[1],
+                "along_track_nm": round(along, 1),
+                "cross_track_nm": round(cross, 1),
+                "metar": metar,
+            })
+    if len(stations) > settings.ROUTE_MAX_STATIONS:
+        # Keep the waypoints and the stations closest to the track
+        stations.sort(key=lambda item: (item["station"] not in waypoints, item["cross_track_nm"]))
+        stations = stations[:settings.ROUTE_MAX_STATIONS]
+    stations.sort(key=lambda item: item["along_track_nm"])
+    return stations
+
+async def _route_pireps(
+    pirep_service: PirepService,
+    waypoints: List[str],
+    track: RouteTrack,
+    corridor_nm: float,
+    age: float
+) -> List[Dict[str, Any]]:
+    """
+    PIREPs within corridor_nm of the track, ordered along the route
+    
+    Each waypoint is queried with a radius reaching the middle of its legs plus the corridor,
+    which together cover the whole corridor; the results are then filtered by distance.
+    """
+    radii = []
+    for index in range(len(waypoints)):
+        adjacent = track.leg_lengths[max(0, index - 1):index + 1]
+        radii.append(int(math.ceil(corridor_nm + max(adjacent) / 2)))
+    results = await asyncio.gather(
+        *(pirep_service.get_pireps(station, radius, age) for station, radius in zip(waypoints, radii)),
+        return_exceptions=True
+    )
+    seen = set()
+    pireps = []
+    for result in results:
+        if isinstance(result, Exception) or is_error_response(result):
+            continue
+        for pirep in result:
+            position = report_position(pirep.raw_data)
+            if position is None or pirep.raw_text in seen:
+                continue
+            seen.add(pirep.raw_text)
+            cross, along = track.locate(*position)
+            if cross <= corridor_nm:
+                pireps.append({"along_track_nm": round(along, 1), "cross_track_nm": round(cross, 1), "report": pirep})
+    pireps.sort(key=lambda item: item["along_track_nm"])
+    return pireps
+
+def _filter_sigmets_along(sigmets: List[SigmetResponse], track: RouteTrack, corridor_nm: float) -> List[SigmetResponse]:
+    """Keep SIGMETs whose area comes within corridor_nm of the track (and those without an area)"""
+    points = track.points(corridor_nm)
+    min_lat, min_lon, max_lat, max_lon = track.bbox(corridor_nm)
+    kept = []
+    for sigmet in sigmets:
+        area = area_points(sigmet.area)
+        if not area:
+            kept.append(sigmet)
+            continue
+        lats = [lat for lat, _ in area]
+        lons = [lon for _, lon in area]
+        if min(lats) > max_lat or max(lats) < min_lat or min(lons) > max_lon or max(lons) < min_lon:
+            continue
+        if any(polygon_within_nm(lat, lon, area, corridor_nm) for lat, lon in points):
+            kept.append(sigmet)
+    return kept
+
+@router.post("/route-briefing", response_model=Dict[str, Any], summary="Weather briefing along a flight-plan route")
+async def get_route_briefing(
+    body: RouteBriefingRequest,
+    metar_service: AWCMetarService = Depends(get_metar_service),
+    taf_service: AWCTafService = Depends(get_taf_service),
+    pirep_service: PirepService = Depends(get_pirep_service),
+    sigmet_service: FailoverSigmetService = Depends(get_failover_sigmet_service)
+):
+    """
+    Retrieve the weather along a route in one request.
+    
+    Request body:
+    - **route**: Flight plan, ICAO waypoints each followed by a planned altitude in feet
+      (e.g. `KPHX,1500,KBXK,12000,KLAX,50`)
+    - **corridor_nm**: Half-width of the corridor around the great-circle track (default ROUTE_CORRIDOR_NM)
+    - **pirep_age**: Maximum age of PIREPs in hours
+    - **taf_hours**: Hours of TAF forecast to include
+    
+    Returns the route, every reporting station within the corridor ordered along the track
+    with its METAR and TAF, PIREPs within the corridor and SIGMETs whose area reaches it.
+    METARs come from one bounding-box query (or the bulk store) and TAFs from one batch query;
+    `sources` reports ok/error/timeout per source.
+    """
+    try:
+        waypoints: List[Waypoint] = parse_flight_plan(body.route)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    corridor = body.corridor_nm or settings.ROUTE_CORRIDOR_NM
+    deadline = settings.ROUTE_BRIEFING_SOURCE_TIMEOUT
+    idents = normalize_station_ids([waypoint.station for waypoint in waypoints])
+    
+    positions, waypoint_metars = await _waypoint_positions(idents, metar_service, taf_service)
+    unresolved = [station for station in idents if station not in positions]
+    if unresolved:
+        raise HTTPException(status_code=400, detail=f"No position known for waypoint(s) {', '.join(unresolved)}")
+    track = RouteTrack([positions[waypoint.station] for waypoint in waypoints])
+    
+    async def stations_with_tafs() -> List[Dict[str, Any]]:
+        metars = await metar_service.get_metars_in_bbox(track.bbox(corridor))
+        stations = _corridor_stations({**metars, **waypoint_metars}, track, corridor, idents)
+        tafs = await taf_service.get_tafs([item["station"] for item in stations], body.taf_hours)
+        for item in stations:
+            taf = tafs.get(item["station"])
+            item["taf"] = taf if taf is not None and taf.raw_data is not None else None
+        return stations
+    
+    # PIREPs and SIGMETs are fetched while the corridor stations are selected
+    route_pireps = _route_pireps(pirep_service, [waypoint.station for waypoint in waypoints], track, corridor, body.pirep_age)
+    results = await asyncio.gather(
+        _fetch_source("stations", stations_with_tafs(), deadline),
+        _fetch_source("pireps", route_pireps, deadline),
+        _fetch_source("sigmets", sigmet_service.get_sigmets(), deadline),
+    )
+    fetched = {name: value for name, value, _ in results}
+    sources = {name: status for name, _, status in results}
+    errors = {name: status["error"] for name, status in sources.items() if status["status"] != "ok"}
+    sigmets = fetched["sigmets"] if sources["sigmets"]["status"] == "ok" else []
+    
+    distance = 0.0
+    route = []
+    for index, waypoint in enumerate(waypoints):
+        if index:
+            distance += track.leg_lengths[index - 1]
+        lat, lon = positions[waypoint.station]
+        route.append({"station": waypoint.station, "altitude": waypoint.altitude, "lat": lat, "lon": lon,
+                      "distance_nm": round(distance, 1)})
+    
+    return fast_response({
+        "route": {"waypoints": route, "distance_nm": round(track.length_nm, 1), "corridor_nm": corridor},
+        "stations": fetched["stations"] or [],
+        "pireps": fetched["pireps"] or [],
+        "sigmets": _filter_sigmets_along(sigmets, track, corridor),
+        "errors": errors if errors else None,
+        "sources": sources,
+        "timestamp": time.time()
+    })
+
+@router.get("/subscribe", summary="Subscribe to new reports for a station list (Server-Sent Events)")
+async def subscribe_reports(
+    ids: str = Query(..., description="Comma-separated ICAO station codes (e.g., KJFK,KLGA,KEWR)"),
+    types: str = Query("metar,taf,pirep", description="Comma-separated report kinds: metar, taf, pirep")
+):
+    """
+    Push new reports for the stations instead of polling the product routes.
+    
+    - **ids**: Comma-separated ICAO airport codes
+    - **types**: Report kinds to receive (default: all)
+    
+    Events: `subscribed`, then `metar` (`type` METAR or SPECI), `taf` (`amendment` true for TAF AMD)
+    and `pirep` (urgent PIREPs within REPORT_PUSH_PIREP_DISTANCE nm), each with `station` and `report`.
+    The latest known METAR/TAF of each station are sent first. One server-side poller fetches
+    every subscribed station each REPORT_PUSH_POLL_INTERVAL seconds.
+    """
+    stations = _parse_station_ids(ids)
+    kinds = {kind.strip().lower() for kind in types.split(",") if kind.strip()}
+    if not kinds or not kinds <= set(REPORT_KINDS):
+        raise HTTPException(status_code=400, detail=f"types must list some of {', '.join(REPORT_KINDS)}")
+    if report_hub.is_full():
+        raise HTTPException(status_code=503, detail="Too many subscribers; try again later")
+    
+    async def events():
+        # Registered inside the stream so that a disconnect always unsubscribes
+        subscription = report_hub.subscribe(stations, kinds)
+        try:
+            yield sse_event("subscribed", {"stations": stations, "types": sorted(kinds)})
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=settings.REPORT_PUSH_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield SSE_KEEPALIVE
+                    continue
+                yield sse_message(event.event, event.data)
+        finally:
+            report_hub.unsubscribe(subscription)
+    
+    return event_stream(events())
+
+@router.post("/batch", response_model=BatchResponse, summary="Run many GET requests in one round trip")
+async def execute_batch(body: BatchRequest, request: Request):
+    """
+    Run GET sub-requests against this API concurrently and return their results in order.
+    
+    - **requests**: Sub-requests, each with a `path` relative to the API prefix including its
+      query string (e.g. `/metar/KPHX?hours=2`) and optional `headers` (e.g. `If-None-Match`)
+    - **timeout**: Deadline for the whole batch in seconds, capped by BATCH_TIMEOUT
+    
+    Each result has the sub-request's `status`, decoded `body`, `ETag`/`Age` headers and
+    `elapsed_ms`. Sub-requests unfinished at the deadline get status 504. Streaming routes
+    cannot be batched.
+    """
+    if len(body.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many sub-requests ({len(body.requests)}); the limit is {settings.BATCH_MAX_REQUESTS}"
+        )
+    deadline = min(body.timeout or settings.BATCH_TIMEOUT, settings.BATCH_TIMEOUT)
+    started = time.perf_counter()
+    responses = await run_batch(request.app, body.requests, deadline)
+    return fast_response({
+        "responses": responses,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    })
@@ -14,5 +14,133 @@ class Settings(BaseModel):
     CHECKWX_API_KEY: str = os.getenv("CHECKWX_API_KEY", "")
     AVWX_API_KEY: str = os.getenv("AVWX_API_KEY", "")
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    
+    # Upstream base URLs (point these at app.testing.fake_upstream for offline/load testing)
+    AWC_BASE_URL: str = os.getenv("AWC_BASE_URL", "https://aviationweather.gov").rstrip("/")
+    AVWX_BASE_URL: str = os.getenv("AVWX_BASE_URL", "https://avwx.rest/api").rstrip("/")
+    
+    # Shared upstream connection pool settings
+    UPSTREAM_POOL_LIMIT: int = int(os.getenv("UPSTREAM_POOL_LIMIT", "100"))
+    UPSTREAM_POOL_LIMIT_PER_HOST: int = int(os.getenv("UPSTREAM_POOL_LIMIT_PER_HOST", "32"))
+    UPSTREAM_DNS_CACHE_TTL: int = int(os.getenv("UPSTREAM_DNS_CACHE_TTL", "300"))
+    UPSTREAM_KEEPALIVE_TIMEOUT: float = float(os.getenv("UPSTREAM_KEEPALIVE_TIMEOUT", "60"))
+    UPSTREAM_REQUEST_TIMEOUT: float = float(os.getenv("UPSTREAM_REQUEST_TIMEOUT", "30"))
+    
+    # Report-cycle-aware METAR/TAF caches (TTLs in seconds)
+    METAR_CACHE_MAX_ENTRIES: int = int(os.getenv("METAR_CACHE_MAX_ENTRIES", "5000"))
+    METAR_CACHE_MIN_TTL: float = float(os.getenv("METAR_CACHE_MIN_TTL", "60"))
+    METAR_CACHE_MAX_TTL: float = float(os.getenv("METAR_CACHE_MAX_TTL", "900"))
+    METAR_PUBLISH_GRACE: float = float(os.getenv("METAR_PUBLISH_GRACE", "300"))
+    TAF_CACHE_MAX_ENTRIES: int = int(os.getenv("TAF_CACHE_MAX_ENTRIES", "2000"))
+    TAF_CACHE_MIN_TTL: float = float(os.getenv("TAF_CACHE_MIN_TTL", "120"))
+    TAF_CACHE_MAX_TTL: float = float(os.getenv("TAF_CACHE_MAX_TTL", "1800"))
+    TAF_PUBLISH_GRACE: float = float(os.getenv("TAF_PUBLISH_GRACE", "600"))
+    
+    # Stale-while-revalidate: serve expired entries for this long while refreshing in the background
+    SWR_ENABLED: bool = os.getenv("SWR_ENABLED", "true").lower() in ("1", "true", "yes")
+    METAR_SWR_STALE_TTL: float = float(os.getenv("METAR_SWR_STALE_TTL", "600"))
+    TAF_SWR_STALE_TTL: float = float(os.getenv("TAF_SWR_STALE_TTL", "1800"))
+    PIREP_CACHE_SOFT_TTL: float = float(os.getenv("PIREP_CACHE_SOFT_TTL", "60"))
+    PIREP_CACHE_HARD_TTL: float = float(os.getenv("PIREP_CACHE_HARD_TTL", "600"))
+    SIGMET_CACHE_SOFT_TTL: float = float(os.getenv("SIGMET_CACHE_SOFT_TTL", "120"))
+    SIGMET_CACHE_HARD_TTL: float = float(os.getenv("SIGMET_CACHE_HARD_TTL", "900"))
+    
+    # Conditional GET: remember ETag/Last-Modified per upstream call and reuse results on 304
+    CONDITIONAL_GET_ENABLED: bool = os.getenv("CONDITIONAL_GET_ENABLED", "true").lower() in ("1", "true", "yes")
+    CONDITIONAL_GET_MAX_ENTRIES: int = int(os.getenv("CONDITIONAL_GET_MAX_ENTRIES", "500"))
+    
+    # Upstream JSON decoder: auto (orjson, then msgspec, then stdlib), orjson, msgspec or json
+    JSON_BACKEND: str = os.getenv("JSON_BACKEND", "auto")
+    # Serialize large list and cockpit responses directly (orjson when installed), skipping
+    # response_model re-validation of the service models
+    FAST_JSON_RESPONSES: bool = os.getenv("FAST_JSON_RESPONSES", "true").lower() in ("1", "true", "yes")
+    
+    # Response compression (brotli when installed, else gzip) for bodies above a size threshold,
+    # and strong ETags on the product routes so unchanged reports are revalidated with 304
+    RESPONSE_COMPRESSION_ENABLED: bool = os.getenv("RESPONSE_COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+    RESPONSE_COMPRESSION_MIN_SIZE: int = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "1024"))
+    RESPONSE_GZIP_LEVEL: int = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+    RESPONSE_BROTLI_QUALITY: int = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+    RESPONSE_ETAGS_ENABLED: bool = os.getenv("RESPONSE_ETAGS_ENABLED", "true").lower() in ("1", "true", "yes")
+    
+    # Per-host upstream throttling: token bucket (0 rps disables) and AIMD concurrency limit
+    UPSTREAM_RATE_LIMIT_RPS: float = float(os.getenv("UPSTREAM_RATE_LIMIT_RPS", "1.6"))
+    UPSTREAM_RATE_LIMIT_BURST: float = float(os.getenv("UPSTREAM_RATE_LIMIT_BURST", "20"))
+    UPSTREAM_CONCURRENCY_INITIAL: int = int(os.getenv("UPSTREAM_CONCURRENCY_INITIAL", "8"))
+    UPSTREAM_CONCURRENCY_MIN: int = int(os.getenv("UPSTREAM_CONCURRENCY_MIN", "1"))
+    UPSTREAM_CONCURRENCY_MAX: int = int(os.getenv("UPSTREAM_CONCURRENCY_MAX", "32"))
+    UPSTREAM_LATENCY_SPIKE_SECONDS: float = float(os.getenv("UPSTREAM_LATENCY_SPIKE_SECONDS", "5"))
+    UPSTREAM_QUEUE_TIMEOUT: float = float(os.getenv("UPSTREAM_QUEUE_TIMEOUT", "10"))
+    
+    # Provider failover (AWC primary, AVWX fallback) with circuit breakers and hedged requests
+    PROVIDER_FAILOVER_ENABLED: bool = os.getenv("PROVIDER_FAILOVER_ENABLED", "true").lower() in ("1", "true", "yes")
+    PROVIDER_HEDGING_ENABLED: bool = os.getenv("PROVIDER_HEDGING_ENABLED", "true").lower() in ("1", "true", "yes")
+    HEDGE_LATENCY_PERCENTILE: float = float(os.getenv("HEDGE_LATENCY_PERCENTILE", "90"))
+    HEDGE_MIN_DELAY: float = float(os.getenv("HEDGE_MIN_DELAY", "0.5"))
+    HEDGE_MAX_DELAY: float = float(os.getenv("HEDGE_MAX_DELAY", "3.0"))
+    BREAKER_WINDOW: int = int(os.getenv("BREAKER_WINDOW", "50"))
+    BREAKER_MIN_CALLS: int = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+    BREAKER_FAILURE_RATE: float = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+    BREAKER_SLOW_CALL_SECONDS: float = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "5"))
+    BREAKER_SLOW_CALL_RATE: float = float(os.getenv("BREAKER_SLOW_CALL_RATE", "0.5"))
+    BREAKER_OPEN_SECONDS: float = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+    
+    # Pilot summaries: local (parser), llm or auto (LLM only for significant weather within the budget)
+    SUMMARY_MODE: str = os.getenv("SUMMARY_MODE", "auto")
+    SUMMARY_LLM_BUDGET_SECONDS: float = float(os.getenv("SUMMARY_LLM_BUDGET_SECONDS", "4"))
+    
+    # Batch LLM summarization: concurrent completions per process and time budget per request
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_BATCH_BUDGET_SECONDS: float = float(os.getenv("LLM_BATCH_BUDGET_SECONDS", "10"))
+    
+    # AI summary cache (memory LRU, plus a SQLite file when a path is configured; give an
+    # absolute path, as a relative one depends on the directory the server is started from)
+    SUMMARY_CACHE_ENABLED: bool = os.getenv("SUMMARY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    SUMMARY_CACHE_PATH: str = os.getenv("SUMMARY_CACHE_PATH", "")
+    SUMMARY_CACHE_MAX_ENTRIES: int = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "2000"))
+    SUMMARY_CACHE_DEFAULT_TTL: float = float(os.getenv("SUMMARY_CACHE_DEFAULT_TTL", "3600"))
+    SUMMARY_CACHE_MAX_TTL: float = float(os.getenv("SUMMARY_CACHE_MAX_TTL", "86400"))
+    
+    # Background summary precomputation for a watchlist of stations (comma-separated ids and/or
+    # a file with one id per line); capped in concurrency and tokens per rolling hour
+    SUMMARY_PRECOMPUTE_ENABLED: bool = os.getenv("SUMMARY_PRECOMPUTE_ENABLED", "false").lower() in ("1", "true", "yes")
+    SUMMARY_WATCHLIST: str = os.getenv("SUMMARY_WATCHLIST", "")
+    SUMMARY_WATCHLIST_FILE: str = os.getenv("SUMMARY_WATCHLIST_FILE", "")
+    SUMMARY_PRECOMPUTE_INTERVAL: float = float(os.getenv("SUMMARY_PRECOMPUTE_INTERVAL", "300"))
+    SUMMARY_PRECOMPUTE_CONCURRENCY: int = int(os.getenv("SUMMARY_PRECOMPUTE_CONCURRENCY", "2"))
+    SUMMARY_PRECOMPUTE_TOKENS_PER_HOUR: int = int(os.getenv("SUMMARY_PRECOMPUTE_TOKENS_PER_HOUR", "200000"))
+    
+    # Airport summary fan-out: per-source deadline and SIGMET vicinity radius
+    AIRPORT_SUMMARY_SOURCE_TIMEOUT: float = float(os.getenv("AIRPORT_SUMMARY_SOURCE_TIMEOUT", "5"))
+    SIGMET_VICINITY_NM: float = float(os.getenv("SIGMET_VICINITY_NM", "150"))
+    
+    # Route briefings: corridor half-width (nm), stations briefed per route and per-source deadline
+    ROUTE_CORRIDOR_NM: float = float(os.getenv("ROUTE_CORRIDOR_NM", "25"))
+    ROUTE_MAX_STATIONS: int = int(os.getenv("ROUTE_MAX_STATIONS", "100"))
+    ROUTE_BRIEFING_SOURCE_TIMEOUT: float = float(os.getenv("ROUTE_BRIEFING_SOURCE_TIMEOUT", "8"))
+    
+    # Multi-station batch requests
+    BATCH_MAX_STATIONS: int = int(os.getenv("BATCH_MAX_STATIONS", "500"))
+    AWC_BATCH_CHUNK_SIZE: int = int(os.getenv("AWC_BATCH_CHUNK_SIZE", "400"))
+    
+    # POST /batch: GET sub-requests per batch and the deadline for the whole batch (seconds)
+    BATCH_MAX_REQUESTS: int = int(os.getenv("BATCH_MAX_REQUESTS", "50"))
+    BATCH_TIMEOUT: float = float(os.getenv("BATCH_TIMEOUT", "10"))
+    
+    # Bulk METAR ingestion (feed may be an http(s) URL, file:// URL or local path)
+    METAR_BULK_INGEST_ENABLED: bool = os.getenv("METAR_BULK_INGEST_ENABLED", "false").lower() in ("1", "true", "yes")
+    METAR_BULK_FEED_URL: str = os.getenv(
+        "METAR_BULK_FEED_URL",
+        os.getenv("AWC_BASE_URL", "https://aviationweather.gov").rstrip("/") + "/data/cache/metars.cache.csv.gz"
+    )
+    METAR_BULK_INGEST_INTERVAL: float = float(os.getenv("METAR_BULK_INGEST_INTERVAL", "60"))
+    METAR_BULK_MAX_STALENESS: float = float(os.getenv("METAR_BULK_MAX_STALENESS", "600"))
+    
+    # Push subscriptions (/subscribe): one poller for all subscribed stations, fanned out over SSE
+    REPORT_PUSH_POLL_INTERVAL: float = float(os.getenv("REPORT_PUSH_POLL_INTERVAL", "60"))
+    REPORT_PUSH_PIREP_DISTANCE: int = int(os.getenv("REPORT_PUSH_PIREP_DISTANCE", "100"))
+    REPORT_PUSH_QUEUE_SIZE: int = int(os.getenv("REPORT_PUSH_QUEUE_SIZE", "100"))
+    REPORT_PUSH_MAX_SUBSCRIBERS: int = int(os.getenv("REPORT_PUSH_MAX_SUBSCRIBERS", "10000"))
+    REPORT_PUSH_HEARTBEAT: float = float(os.getenv("REPORT_PUSH_HEARTBEAT", "15"))
 
 settings = Settings()
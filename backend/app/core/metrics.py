@@ -0,0 +1,182 @@
+"""
+Prometheus-style metrics
+
+A small in-process implementation of counters, histograms and scrape-time gauges rendered
+in the Prometheus text exposition format. Recording is a dict lookup plus a bisect, with no
+locks (everything runs on the event loop), so it is cheap enough for every hot path.
+"""
+import functools
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond parses to multi-second upstream stalls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> Iterable[str]:
+        return []
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels: Any, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: Any) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, *labels: Any) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels: Any) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    @contextmanager
+    def time(self, *labels: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def samples(self) -> Iterable[str]:
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]!r}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+class CallbackGauge(Metric):
+    """Gauge whose samples are produced at scrape time by a callback"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 collect: Callable[[], Iterable[Tuple[Tuple, float]]], kind: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+        self.kind = kind
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self.collect():
+            if value is not None:
+                yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name: str, documentation: str, labelnames: Sequence[str],
+                       collect: Callable[[], Iterable[Tuple[Tuple, float]]], kind: str = "gauge") -> CallbackGauge:
+        return self.register(CallbackGauge(name, documentation, labelnames, collect, kind))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+def timed(histogram: Histogram, *labels: Any) -> Callable:
+    """Decorator recording a synchronous function's duration in histogram"""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, *labels)
+        return wrapper
+    return decorator
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "API requests by route template, method and status", ("route", "method", "status"))
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "API request latency by route template", ("route", "method"))
+HTTP_HANDLER_DURATION = registry.histogram(
+    "http_handler_duration_seconds", "Time spent in the route handler itself", ("route",))
+HTTP_SERIALIZE_DURATION = registry.histogram(
+    "http_serialization_duration_seconds",
+    "Request validation and response serialization time (request time minus handler time)", ("route",))
+
+UPSTREAM_REQUESTS = registry.counter(
+    "upstream_requests_total", "Upstream responses by provider, endpoint and status", ("provider", "endpoint", "status"))
+UPSTREAM_DURATION = registry.histogram(
+    "upstream_request_duration_seconds", "Upstream request latency by provider and endpoint", ("provider", "endpoint"))
+
+PARSER_DURATION = registry.histogram(
+    "parser_duration_seconds", "Report parsing time by product", ("product",))
+
+LLM_DURATION = registry.histogram(
+    "llm_request_duration_seconds", "LLM completion latency by model and summary kind", ("model", "kind"))
+LLM_REQUESTS = registry.counter(
+    "llm_requests_total", "LLM completions by model, summary kind and outcome", ("model", "kind", "outcome"))
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "LLM tokens used by model and token type", ("model", "type"))
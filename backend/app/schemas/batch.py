@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+from typing import List, Dict, Optional, Any
+
+class SubRequest(BaseModel):
+    path: str  # GET route relative to the API prefix, with its query string (e.g. /metar/KPHX?hours=2)
+    headers: Dict[str, str] = Field(default_factory=dict)  # e.g. If-None-Match
+
+class BatchRequest(BaseModel):
+    requests: List[SubRequest] = Field(..., min_length=1)
+    timeout: Optional[float] = Field(None, gt=0)  # Deadline for the whole batch in seconds, capped by BATCH_TIMEOUT
+
+class SubResponse(BaseModel):
+    path: str
+    status: int
+    headers: Dict[str, str] = Field(default_factory=dict)  # ETag and Age of the sub-response
+    body: Optional[Any] = None  # Decoded JSON body (text for other content types)
+    elapsed_ms: Optional[float] = None
+
+class BatchResponse(BaseModel):
+    responses: List[SubResponse]  # In request order
+    elapsed_ms: float
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class RouteBriefingRequest(BaseModel):
+    route: str  # ICAO waypoints each followed by a planned altitude in feet, e.g. KPHX,1500,KBXK,12000,KLAX,50
+    corridor_nm: Optional[float] = Field(None, gt=0, le=250)  # Half-width of the corridor (default ROUTE_CORRIDOR_NM)
+    pirep_age: float = Field(1.5, gt=0, le=24)  # Maximum age of PIREPs in hours
+    taf_hours: int = Field(12, gt=0, le=30)  # Hours of TAF forecast to include
@@ -6,6 +6,7 @@ class WeatherResponseBase(BaseModel):
     source: str
     timestamp: datetime = Field(default_factory=datetime.now)
     raw_data: Optional[Any] = None
+    data_age_seconds: Optional[float] = None  # Seconds since the data was fetched from the upstream provider
 
 class MetarResponse(WeatherResponseBase):
     station: str
@@ -42,6 +43,10 @@ class PirepResponse(WeatherResponseBase):
     sky_conditions: Optional[str] = None
     remarks: Optional[str] = None
     timestamp: Optional[str] = None
+    hazard_summary: Optional[str] = None  # Pilot-friendly summary of the report
+    hazard_flags: int = 0  # Bitmask of reported hazards (1 turbulence, 2 icing, 4 urgent)
+    turbulence_level: int = 0  # 0 none/unknown, 1 trace ... 6 severe
+    icing_level: int = 0  # 0 none/unknown, 1 trace ... 6 severe
 
 class EnhancedPirepResponse(PirepResponse):
     """Enhanced PIREP response with additional fields for cockpit display"""
@@ -60,6 +65,7 @@ class SigmetResponse(WeatherResponseBase):
     phenomenon: Optional[str] = None
     valid_from: Optional[datetime] = None
     valid_to: Optional[datetime] = None
+    pilot_summary: Optional[str] = None  # Pilot-friendly summary of the SIGMET
 
 class AirmetResponse(WeatherResponseBase):
     id: str
@@ -1,26 +1,95 @@
 import aiohttp
 import logging
-import json
-from typing import Dict, Any, Optional, Union
+import re
+import time
+from typing import Dict, Any, List, Optional, Union, Tuple, TYPE_CHECKING
+
+from app.core.metrics import UPSTREAM_DURATION, UPSTREAM_REQUESTS
+from app.services import json_codec
+from app.services.conditional_get import upstream_validators
+from app.services.single_flight import SingleFlight
+from app.services.rate_limit import rate_limiters, parse_retry_after, UpstreamThrottled
+
+if TYPE_CHECKING:
+    from app.services.http_client import UpstreamClientRegistry
 
 logger = logging.getLogger(__name__)
 
+# Shared by every client so identical concurrent upstream calls are coalesced process-wide
+upstream_flights = SingleFlight()
+
+def normalize_station_ids(stations: List[str]) -> List[str]:
+    """Upper-case, strip and de-duplicate station ids while keeping their order"""
+    seen = {}
+    for station in stations:
+        station = station.strip().upper()
+        if station:
+            seen.setdefault(station, None)
+    return list(seen)
+
+# First non-whitespace byte of a payload, found without copying or stripping the body
+_FIRST_NON_SPACE = re.compile(rb"\S")
+
+def decode_body(body: bytes, content_type: Optional[str], charset: Optional[str],
+                response_type: str = "json") -> Union[Dict[str, Any], str, list]:
+    """
+    Decode an upstream response body
+    
+    JSON is parsed straight from the bytes; text is decoded only when text is wanted or the
+    body turns out not to be JSON.
+    
+    Args:
+        body: Raw response bytes
+        content_type: MIME type from the Content-Type header (e.g. "application/json")
+        charset: Charset from the Content-Type header, if any
+        response_type: Expected response type ("json" or "text")
+        
+    Returns:
+        Parsed JSON (dict/list) or the decoded text
+    """
+    if response_type.lower() != "text":
+        first = _FIRST_NON_SPACE.search(body)
+        # Some AWC endpoints label JSON as text/plain, so sniff the first byte as well
+        if first is not None and (first.group() in (b"{", b"[") or "json" in (content_type or "")):
+            try:
+                return json_codec.loads(body)
+            except json_codec.JSONDecodeError:
+                logger.warning(f"Failed to parse JSON response ({content_type}), returning as text")
+    
+    return body.decode(charset or "utf-8", errors="replace")
+
+# Station ids in REST-style paths (e.g. AVWX /taf/KPHX), collapsed to keep metric labels bounded
+_STATION_SEGMENT = re.compile(r"/[A-Z][A-Z0-9]{2,3}(?=/|$)")
+
+def metric_endpoint(endpoint: str) -> str:
+    """Endpoint label for metrics with station ids replaced by {station}"""
+    return _STATION_SEGMENT.sub("/{station}", endpoint)
+
+def is_error_response(result: Any) -> bool:
+    """True if a service result (one response or a list) reports a failed upstream call"""
+    items = result if isinstance(result, list) else [result]
+    return any((getattr(item, "raw_text", None) or "").startswith("Error fetching") for item in items)
+
 class BaseApiClient:
     """Base class for all API clients"""
     
-    def __init__(self, base_url: str, api_key: Optional[str] = None):
+    def __init__(self, base_url: str, api_key: Optional[str] = None,
+                 registry: Optional["UpstreamClientRegistry"] = None):
         self.base_url = base_url
         self.api_key = api_key
+        self.registry = registry
         self.session = None
     
     async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create an aiohttp ClientSession"""
+        """Get the pooled session from the registry, or create a private ClientSession"""
+        if self.registry is not None:
+            return await self.registry.get_session(self.base_url)
         if self.session is None or self.session.closed:
             self.session = aiohttp.ClientSession()
         return self.session
     
     async def close(self):
-        """Close the aiohttp session"""
+        """Close the private aiohttp session (pooled sessions are owned by the registry)"""
         if self.session and not self.session.closed:
             await self.session.close()
     
@@ -38,8 +107,6 @@ class BaseApiClient:
         Returns:
             Response as dict/list (for JSON) or string (for plain text)
         """
-        session = await self._get_session()
-        
         # Prepare headers with API key if provided
         request_headers = {}
         if headers:
@@ -47,32 +114,72 @@ class BaseApiClient:
         if self.api_key:
             request_headers["Authorization"] = f"Bearer {self.api_key}"
         
+        key = self._flight_key(endpoint, params, request_headers, response_type)
+        return await upstream_flights.do(
+            key,
+            lambda: self._request(endpoint, params, request_headers, response_type, key),
+            label=endpoint
+        )
+    
+    def _flight_key(self, endpoint: str, params: Optional[Dict[str, Any]],
+                    headers: Dict[str, str], response_type: str) -> Tuple:
+        """Identity of an upstream call: (base_url, endpoint, normalized params, ...)"""
+        normalized_params = tuple(sorted(
+            (str(k), str(v).strip().upper() if k in ("ids", "id") else str(v))
+            for k, v in (params or {}).items() if v is not None
+        ))
+        return (
+            self.base_url,
+            endpoint,
+            normalized_params,
+            response_type.lower(),
+            tuple(sorted(headers.items())),
+        )
+    
+    async def _request(self, endpoint: str, params: Optional[Dict[str, Any]],
+                       request_headers: Dict[str, str], response_type: str,
+                       key: Optional[Tuple] = None) -> Union[Dict[str, Any], str, list]:
+        """Perform the actual upstream GET request, conditionally if validators are known"""
+        session = await self._get_session()
+        
         url = f"{self.base_url}{endpoint}"
+        validators = upstream_validators.get(key) if key is not None else None
+        if validators is not None:
+            request_headers = {**request_headers, **validators.request_headers()}
         
+        limiter = rate_limiters.get(self.base_url)
+        status = "error"
+        started = received = None
         try:
-            async with session.get(url, params=params, headers=request_headers) as response:
-                response.raise_for_status()
-                
-                # Always get the text response first
-                text_response = await response.text()
-                
-                # If explicitly asking for text, return as text
-                if response_type.lower() == "text":
-                    return text_response
+            async with limiter.slot() as permit:
+                # Latency is measured from slot grant, so queueing shows up in the limiter stats only
+                started = time.perf_counter()
+                async with session.get(url, params=params, headers=request_headers) as response:
+                    status = response.status
+                    permit.status = response.status
+                    permit.retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    if response.status == 304 and validators is not None:
+                        # Unchanged upstream: reuse the result parsed last time
+                        return upstream_validators.reuse(key, validators)
+                    response.raise_for_status()
+                    body = await response.read()
+                    received = time.perf_counter()
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
                 
-                # Try to parse as JSON regardless of content type
-                try:
-                    # Check if the response looks like JSON (starts with { or [)
-                    if text_response.strip() and (text_response.strip()[0] in ['{', '[']):
-                        return json.loads(text_response)
-                except json.JSONDecodeError:
-                    # If JSON parsing fails and we wanted JSON, log warning
-                    if response_type.lower() == "json":
-                        logger.warning(f"Failed to parse JSON response from {url}, returning as text")
-                
-                # If we get here, it's not valid JSON or we couldn't parse it
-                return text_response
+            result = decode_body(body, response.content_type, response.charset, response_type)
+            if key is not None:
+                upstream_validators.store(key, etag, last_modified, result)
+            return result
                 
+        except UpstreamThrottled:
+            status = "throttled"
+            raise
         except aiohttp.ClientError as e:
             logger.error(f"API request error: {e}, url='{url}'")
             raise
+        finally:
+            endpoint_label = metric_endpoint(endpoint)
+            UPSTREAM_REQUESTS.inc(limiter.host, endpoint_label, str(status))
+            if started is not None:
+                UPSTREAM_DURATION.observe((received or time.perf_counter()) - started, limiter.host, endpoint_label)
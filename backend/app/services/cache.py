@@ -0,0 +1,195 @@
+"""
+In-process async TTL cache with LRU eviction
+
+Used in front of the upstream weather services. Each entry carries its own expiry so
+callers can derive lifetimes from report issuance cycles rather than a fixed TTL.
+
+Entries have a soft deadline (fresh until) and a hard deadline (usable until). Between
+the two the cache serves the stale value immediately and refreshes it in the background
+(stale-while-revalidate), so callers only wait on the upstream when nothing usable is cached.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, NamedTuple, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.base_client import is_error_response
+from app.services.rate_limit import PRIORITY_BACKGROUND, upstream_priority
+from app.services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Every cache registers itself here so stats can be reported in one place
+_registered_caches: List["AsyncTTLCache"] = []
+
+class CacheEntry(NamedTuple):
+    value: Any
+    stored_at: float
+    fresh_until: float
+    expires_at: float
+
+class AsyncTTLCache:
+    """LRU cache whose entries expire at a per-entry deadline"""
+
+    def __init__(self, name: str, max_entries: int = 1000):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._loads = SingleFlight()
+        self._refreshes: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        _registered_caches.append(self)
+
+    def _lookup(self, key: Hashable, allow_stale: bool) -> Optional[CacheEntry]:
+        """Find a usable entry, counting hits/misses and dropping hard-expired entries"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        now = time.monotonic()
+        if entry.expires_at <= now:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        if entry.fresh_until <= now and not allow_stale:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        if entry.fresh_until <= now:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or no longer fresh"""
+        entry = self._lookup(key, allow_stale=False)
+        return entry.value if entry is not None else None
+
+    def get_entry(self, key: Hashable) -> Optional[CacheEntry]:
+        """Return the entry for key even if stale (but not hard-expired)"""
+        return self._lookup(key, allow_stale=True)
+
+    def set(self, key: Hashable, value: Any, ttl: float, stale_ttl: float = 0.0) -> None:
+        """
+        Store value, evicting the least recently used entry if full
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Seconds the value is fresh (soft TTL)
+            stale_ttl: Additional seconds the value may be served stale while refreshing
+        """
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        fresh_until = now + ttl
+        self._entries[key] = CacheEntry(value, now, fresh_until, fresh_until + max(0.0, stale_ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def refresh_in_background(self, key: Hashable, refresh: Callable[[], Awaitable[Any]]) -> None:
+        """Run refresh() once per key in a background task, ignoring duplicate requests"""
+        if self._loads.is_inflight(key):
+            return
+
+        async def run():
+            # Revalidation is never urgent: let interactive requests go first upstream
+            upstream_priority.set(PRIORITY_BACKGROUND)
+            try:
+                await self._loads.do(key, refresh)
+                self.refreshes += 1
+            except Exception as e:
+                self.refresh_failures += 1
+                logger.warning(f"Background refresh of {self.name} cache key {key!r} failed: {str(e)}")
+
+        task = asyncio.create_task(run())
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+
+    async def fetch(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                    ttl_for: Callable[[Any], Optional[float]], stale_ttl: float = 0.0) -> Tuple[Any, float]:
+        """
+        Return (value, age_seconds), loading on a miss and revalidating stale entries
+
+        Args:
+            key: Cache key
+            loader: Zero-argument coroutine factory producing the value
+            ttl_for: Returns the fresh lifetime in seconds for a loaded value, or None to skip caching
+            stale_ttl: Seconds past freshness the value may be served while a refresh runs
+
+        Returns:
+            The value and how many seconds ago it was loaded from the upstream
+        """
+        async def load_and_store():
+            loaded = await loader()
+            ttl = ttl_for(loaded)
+            if ttl:
+                self.set(key, loaded, ttl, stale_ttl)
+            return loaded
+
+        # Entries stored without a stale window are never returned once their soft TTL passes
+        entry = self.get_entry(key)
+        if entry is None:
+            return await self._loads.do(key, load_and_store), 0.0
+
+        now = time.monotonic()
+        if entry.fresh_until <= now:
+            self.refresh_in_background(key, load_and_store)
+        return entry.value, now - entry.stored_at
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                          ttl_for: Callable[[Any], Optional[float]], stale_ttl: float = 0.0) -> Any:
+        """Like fetch() but returns only the value"""
+        value, _ = await self.fetch(key, loader, ttl_for, stale_ttl)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "background_refreshes": self.refreshes,
+            "background_refresh_failures": self.refresh_failures,
+        }
+
+def stale_window(seconds: float) -> float:
+    """Stale-while-revalidate window to use, or 0 when SWR serving is disabled"""
+    return max(0.0, seconds) if settings.SWR_ENABLED else 0.0
+
+def list_ttl(ttl: float) -> Callable[[List[Any]], Optional[float]]:
+    """ttl_for callback for list responses: cache for ttl unless the upstream call failed"""
+    def ttl_for(items: List[Any]) -> Optional[float]:
+        if is_error_response(items):
+            return None
+        return ttl
+    return ttl_for
+
+def all_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every registered cache keyed by cache name"""
+    return {cache.name: cache.stats() for cache in _registered_caches}
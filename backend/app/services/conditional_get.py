@@ -0,0 +1,82 @@
+"""
+Conditional GET support for upstream fetches
+
+Remembers the ETag / Last-Modified validators of upstream responses together with the
+already-parsed result. The next request for the same URL sends If-None-Match /
+If-Modified-Since, and a 304 Not Modified reuses the stored result without downloading
+or parsing the body again.
+"""
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, NamedTuple, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class Validators(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    result: Any
+
+    def request_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class ValidatorStore:
+    """LRU of validators and parsed results keyed by upstream call identity"""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries if max_entries is not None else settings.CONDITIONAL_GET_MAX_ENTRIES
+        self._entries: "OrderedDict[Hashable, Validators]" = OrderedDict()
+        self.conditional_requests = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Validators]:
+        if not settings.CONDITIONAL_GET_ENABLED:
+            return None
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.conditional_requests += 1
+        return entry
+
+    def store(self, key: Hashable, etag: Optional[str], last_modified: Optional[str], result: Any) -> None:
+        """Remember the validators for a 200 response (ignored if it carried none)"""
+        if not settings.CONDITIONAL_GET_ENABLED or not (etag or last_modified):
+            return
+        self._entries[key] = Validators(etag, last_modified, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def reuse(self, key: Hashable, entry: Validators) -> Any:
+        """Record a 304 and return the stored result"""
+        self.not_modified += 1
+        self._entries.move_to_end(key)
+        return entry.result
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.CONDITIONAL_GET_ENABLED,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "conditional_requests": self.conditional_requests,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+        }
+
+# Process-wide store shared by every upstream client
+upstream_validators = ValidatorStore()
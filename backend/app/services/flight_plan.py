@@ -0,0 +1,76 @@
+"""
+Flight-plan strings and route corridors
+
+A flight plan is a comma-separated list of ICAO waypoints, each optionally followed by its
+planned altitude in feet: `KPHX,1500,KBXK,12000,KLAX,50`. The route between the waypoints is
+flown along great circles; the corridor is everything within a given distance of that track.
+"""
+import math
+import re
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from app.services.geo import LatLon, bbox_around, distance_to_track_nm, great_circle_points, haversine_nm
+
+_WAYPOINT = re.compile(r"^[A-Z][A-Z0-9]{2,4}$")
+_ALTITUDE = re.compile(r"^\d{1,5}$")
+
+class Waypoint(NamedTuple):
+    station: str
+    altitude: Optional[int]  # Planned altitude in feet
+
+def parse_flight_plan(plan: str) -> List[Waypoint]:
+    """
+    Parse `KPHX,1500,KBXK,12000,KLAX,50` into waypoints
+
+    Raises:
+        ValueError: If a token is neither a waypoint nor an altitude, an altitude has no
+            waypoint, or the plan has fewer than two waypoints
+    """
+    waypoints: List[Waypoint] = []
+    for token in (token.strip().upper() for token in re.split(r"[,\s]+", plan)):
+        if not token:
+            continue
+        if _ALTITUDE.match(token):
+            if not waypoints or waypoints[-1].altitude is not None:
+                raise ValueError(f"Altitude {token} does not follow a waypoint")
+            waypoints[-1] = waypoints[-1]._replace(altitude=int(token))
+        elif _WAYPOINT.match(token):
+            waypoints.append(Waypoint(token, None))
+        else:
+            raise ValueError(f"Invalid waypoint or altitude {token!r}")
+    if len(waypoints) < 2:
+        raise ValueError("A flight plan needs at least two waypoints")
+    return waypoints
+
+class RouteTrack:
+    """Great-circle legs between waypoint positions"""
+
+    def __init__(self, positions: Sequence[LatLon]):
+        self.positions = list(positions)
+        self.legs: List[Tuple[LatLon, LatLon]] = list(zip(self.positions, self.positions[1:]))
+        self.leg_lengths = [haversine_nm(*start, *end) for start, end in self.legs]
+        self.leg_offsets = [sum(self.leg_lengths[:index]) for index in range(len(self.legs))]
+
+    @property
+    def length_nm(self) -> float:
+        return sum(self.leg_lengths)
+
+    def locate(self, lat: float, lon: float) -> Tuple[float, float]:
+        """(cross-track distance to the nearest leg, along-track distance from the start) in nm"""
+        best = (math.inf, 0.0)
+        for (start, end), offset in zip(self.legs, self.leg_offsets):
+            cross, along = distance_to_track_nm(lat, lon, start, end)
+            if cross < best[0]:
+                best = (cross, offset + along)
+        return best
+
+    def points(self, spacing_nm: float) -> List[LatLon]:
+        """Points along the track at most spacing_nm apart"""
+        points: List[LatLon] = []
+        for start, end in self.legs:
+            points.extend(great_circle_points(start, end, spacing_nm)[0 if not points else 1:])
+        return points
+
+    def bbox(self, margin_nm: float) -> Tuple[float, float, float, float]:
+        """(min_lat, min_lon, max_lat, max_lon) around the track, widened by margin_nm"""
+        return bbox_around(self.points(max(margin_nm, 25.0)), margin_nm)
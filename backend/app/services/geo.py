@@ -0,0 +1,133 @@
+"""
+Geographic helpers for filtering advisories and reports around a position or along a route
+
+Distances are great-circle distances in nautical miles. Polygon tests treat lat/lon as
+planar, which is accurate enough at advisory scale away from the poles and the antimeridian.
+"""
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+EARTH_RADIUS_NM = 3440.065
+
+LatLon = Tuple[float, float]
+
+def haversine_nm(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in nautical miles"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * math.asin(min(1.0, math.sqrt(a)))
+
+def point_in_polygon(lat: float, lon: float, polygon: Sequence[LatLon]) -> bool:
+    """Ray-casting test; polygon is a sequence of (lat, lon) vertices, closed or not"""
+    inside = False
+    count = len(polygon)
+    for i in range(count):
+        lat1, lon1 = polygon[i]
+        lat2, lon2 = polygon[i - 1]
+        if (lat1 > lat) != (lat2 > lat):
+            crossing_lon = lon1 + (lat - lat1) * (lon2 - lon1) / (lat2 - lat1)
+            if lon < crossing_lon:
+                inside = not inside
+    return inside
+
+def distance_to_segment_nm(lat: float, lon: float, start: LatLon, end: LatLon) -> float:
+    """Approximate distance from a point to a polygon edge, in nautical miles"""
+    # Project onto a local equirectangular plane centred on the point
+    scale = math.cos(math.radians(lat))
+    ax, ay = (start[1] - lon) * scale, start[0] - lat
+    bx, by = (end[1] - lon) * scale, end[0] - lat
+    dx, dy = bx - ax, by - ay
+    length_sq = dx * dx + dy * dy
+    t = 0.0 if length_sq == 0 else max(0.0, min(1.0, -(ax * dx + ay * dy) / length_sq))
+    closest_lat = lat + ay + t * dy
+    closest_lon = lon + (ax + t * dx) / scale if scale else start[1]
+    return haversine_nm(lat, lon, closest_lat, closest_lon)
+
+def polygon_within_nm(lat: float, lon: float, polygon: Sequence[LatLon], radius_nm: float) -> bool:
+    """True if the point lies inside the polygon or within radius_nm of its boundary"""
+    if not polygon:
+        return False
+    if len(polygon) >= 3 and point_in_polygon(lat, lon, polygon):
+        return True
+    if len(polygon) == 1:
+        return haversine_nm(lat, lon, *polygon[0]) <= radius_nm
+    return any(
+        distance_to_segment_nm(lat, lon, polygon[i - 1], polygon[i]) <= radius_nm
+        for i in range(1 if len(polygon) == 2 else 0, len(polygon))
+    )
+
+def area_points(area: Optional[Iterable[Dict[str, Any]]]) -> List[LatLon]:
+    """(lat, lon) vertices of an advisory area given as [{"lat": ..., "lon": ...}, ...]"""
+    return [(point["lat"], point["lon"]) for point in (area or []) if "lat" in point and "lon" in point]
+
+def report_position(raw_data: Any) -> Optional[LatLon]:
+    """Station position from an upstream record carrying lat/lon, if present"""
+    if not isinstance(raw_data, dict):
+        return None
+    try:
+        return float(raw_data["lat"]), float(raw_data["lon"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def bbox_around(points: Iterable[LatLon], margin_nm: float) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon) around the points, widened by margin_nm"""
+    points = list(points)
+    lats = [lat for lat, _ in points]
+    lons = [lon for _, lon in points]
+    margin_lat = math.degrees(margin_nm / EARTH_RADIUS_NM)
+    widest = max(abs(min(lats) - margin_lat), abs(max(lats) + margin_lat))
+    margin_lon = margin_lat / max(math.cos(math.radians(min(widest, 89.0))), 0.01)
+    return (max(-90.0, min(lats) - margin_lat), max(-180.0, min(lons) - margin_lon),
+            min(90.0, max(lats) + margin_lat), min(180.0, max(lons) + margin_lon))
+
+def _bearing_rad(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dlambda = math.radians(lon2 - lon1)
+    y = math.sin(dlambda) * math.cos(phi2)
+    x = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlambda)
+    return math.atan2(y, x)
+
+def distance_to_track_nm(lat: float, lon: float, start: LatLon, end: LatLon) -> Tuple[float, float]:
+    """
+    Distance from a point to the great-circle segment start-end, in nautical miles
+
+    Returns:
+        (distance to the segment, along-track distance from start of the closest point)
+    """
+    length = haversine_nm(*start, *end)
+    from_start = haversine_nm(*start, lat, lon)
+    if length == 0 or from_start == 0:
+        return from_start, 0.0
+    angle = _bearing_rad(*start, lat, lon) - _bearing_rad(*start, *end)
+    d13 = from_start / EARTH_RADIUS_NM
+    cross = math.asin(max(-1.0, min(1.0, math.sin(d13) * math.sin(angle))))
+    along = math.acos(max(-1.0, min(1.0, math.cos(d13) / max(math.cos(cross), 1e-12)))) * EARTH_RADIUS_NM
+    if math.cos(angle) < 0:
+        along = -along
+    if along <= 0:
+        return from_start, 0.0
+    if along >= length:
+        return haversine_nm(lat, lon, *end), length
+    return abs(cross) * EARTH_RADIUS_NM, along
+
+def great_circle_points(start: LatLon, end: LatLon, spacing_nm: float) -> List[LatLon]:
+    """Points along the great circle from start to end (both included), at most spacing_nm apart"""
+    length = haversine_nm(*start, *end)
+    steps = max(1, math.ceil(length / spacing_nm)) if spacing_nm > 0 else 1
+    if length == 0:
+        return [start, end]
+    phi1, lambda1 = math.radians(start[0]), math.radians(start[1])
+    phi2, lambda2 = math.radians(end[0]), math.radians(end[1])
+    delta = length / EARTH_RADIUS_NM
+    points = []
+    for step in range(steps + 1):
+        fraction = step / steps
+        a = math.sin((1 - fraction) * delta) / math.sin(delta)
+        b = math.sin(fraction * delta) / math.sin(delta)
+        x = a * math.cos(phi1) * math.cos(lambda1) + b * math.cos(phi2) * math.cos(lambda2)
+        y = a * math.cos(phi1) * math.sin(lambda1) + b * math.cos(phi2) * math.sin(lambda2)
+        z = a * math.sin(phi1) + b * math.sin(phi2)
+        points.append((math.degrees(math.atan2(z, math.hypot(x, y))), math.degrees(math.atan2(y, x))))
+    return points
@@ -0,0 +1,89 @@
+"""
+Shared upstream HTTP client registry
+
+Keeps one pooled aiohttp ClientSession per upstream base URL for the lifetime of the
+process so that requests to aviationweather.gov / avwx.rest reuse kept-alive TCP+TLS
+connections instead of opening a new session on every API call.
+"""
+import asyncio
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class UpstreamClientRegistry:
+    """Registry of pooled aiohttp sessions, one per upstream host"""
+
+    def __init__(self, limit: Optional[int] = None, limit_per_host: Optional[int] = None,
+                 dns_cache_ttl: Optional[int] = None, keepalive_timeout: Optional[float] = None,
+                 request_timeout: Optional[float] = None):
+        self.limit = limit if limit is not None else settings.UPSTREAM_POOL_LIMIT
+        self.limit_per_host = limit_per_host if limit_per_host is not None else settings.UPSTREAM_POOL_LIMIT_PER_HOST
+        self.dns_cache_ttl = dns_cache_ttl if dns_cache_ttl is not None else settings.UPSTREAM_DNS_CACHE_TTL
+        self.keepalive_timeout = keepalive_timeout if keepalive_timeout is not None else settings.UPSTREAM_KEEPALIVE_TIMEOUT
+        self.request_timeout = request_timeout if request_timeout is not None else settings.UPSTREAM_REQUEST_TIMEOUT
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    def _host_key(base_url: str) -> str:
+        """Normalize a base URL to the scheme://host[:port] it connects to"""
+        parts = urlsplit(base_url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        """Create a session with a connection pool tuned for a single upstream host"""
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+            enable_cleanup_closed=True
+        )
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def get_session(self, base_url: str) -> aiohttp.ClientSession:
+        """Get the pooled session for the host behind base_url, creating it on first use"""
+        key = self._host_key(base_url)
+        session = self._sessions.get(key)
+        if session is not None and not session.closed:
+            return session
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            session = self._sessions.get(key)
+            if session is None or session.closed:
+                logger.info(f"Opening pooled upstream session for {key}")
+                session = self._create_session()
+                self._sessions[key] = session
+            return session
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Report open sessions and pooled connection counts per host"""
+        result = {}
+        for key, session in self._sessions.items():
+            connector = session.connector
+            result[key] = {
+                "closed": session.closed,
+                "limit": connector.limit if connector else 0,
+                "limit_per_host": connector.limit_per_host if connector else 0,
+            }
+        return result
+
+    async def close(self):
+        """Close every pooled session (called on application shutdown)"""
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for session in sessions:
+            if not session.closed:
+                await session.close()
+
+# Process-wide registry shared by every service instance
+client_registry = UpstreamClientRegistry()
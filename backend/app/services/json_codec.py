@@ -0,0 +1,95 @@
+"""
+JSON decoding and encoding backends
+
+Decodes upstream JSON straight from the response bytes. orjson or msgspec are used when
+installed (both parse bytes without building an intermediate str); otherwise the standard
+library json module is used, which also accepts bytes.
+
+Encodes API responses to bytes with orjson when installed, reading pydantic models' field
+values directly instead of converting them to dicts first; otherwise pydantic's own Rust
+serializer is used. Both produce the same JSON as FastAPI's response_model serialization for
+the plain models in app.schemas.
+"""
+import json
+import logging
+from typing import Any, Callable, Tuple
+
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class JSONDecodeError(ValueError):
+    """Raised by loads() whatever backend is in use"""
+
+def _stdlib_loads() -> Callable[[bytes], Any]:
+    return json.loads
+
+def _orjson_loads() -> Callable[[bytes], Any]:
+    import orjson
+    return orjson.loads
+
+def _msgspec_loads() -> Callable[[bytes], Any]:
+    import msgspec
+    return msgspec.json.Decoder().decode
+
+_BACKENDS = {
+    "orjson": _orjson_loads,
+    "msgspec": _msgspec_loads,
+    "json": _stdlib_loads,
+}
+
+def _select_backend(preference: str) -> Tuple[str, Callable[[bytes], Any]]:
+    """Pick the configured backend, or the fastest installed one for "auto" """
+    candidates = ["orjson", "msgspec", "json"] if preference == "auto" else [preference, "json"]
+    for name in candidates:
+        factory = _BACKENDS.get(name)
+        if factory is None:
+            logger.warning(f"Unknown JSON_BACKEND {name!r}, falling back")
+            continue
+        try:
+            return name, factory()
+        except ImportError:
+            if preference != "auto":
+                logger.warning(f"JSON_BACKEND {name!r} is not installed, falling back")
+    return "json", json.loads
+
+backend_name, _loads = _select_backend(settings.JSON_BACKEND.lower())
+
+def loads(data: bytes) -> Any:
+    """Decode a JSON document from bytes (or str) with the selected backend"""
+    try:
+        return _loads(data)
+    except Exception as e:
+        raise JSONDecodeError(str(e)) from e
+
+def _orjson_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        # Field values only: the schemas have no aliases, computed fields or custom serializers
+        return value.__dict__
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def _orjson_dumps() -> Callable[[Any], bytes]:
+    import orjson
+    # Non-string keys as in FastAPI's encoder; UTC datetimes end in Z as in pydantic
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+    def dumps(content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=option)
+    return dumps
+
+def _pydantic_dumps(content: Any) -> bytes:
+    return to_json(content)
+
+try:
+    encoder_name, _dumps = "orjson", _orjson_dumps()
+except ImportError:
+    encoder_name, _dumps = "pydantic", _pydantic_dumps
+
+def dumps(content: Any) -> bytes:
+    """Encode response content (pydantic models, dicts, lists, datetimes) as JSON bytes"""
+    return _dumps(content)
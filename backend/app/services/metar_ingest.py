@@ -0,0 +1,385 @@
+"""
+Bulk METAR ingestion
+
+Periodically downloads the AWC bulk METAR cache file (every current METAR, gzipped CSV or
+XML), parses it incrementally and keeps the latest report per station in memory so that
+station lookups no longer need an upstream call.
+"""
+import asyncio
+import codecs
+import csv
+import logging
+import os
+import time
+import zlib
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+from app.core.config import settings
+from app.services.http_client import UpstreamClientRegistry, client_registry
+from app.services.conditional_get import Validators
+from app.services.rate_limit import PRIORITY_BACKGROUND, rate_limiters
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+# Numeric columns of the AWC cache file mapped onto AWC data API JSON field names
+_NUMERIC_FIELDS = {
+    "temp_c": "temp",
+    "dewpoint_c": "dewp",
+    "wind_speed_kt": "wspd",
+    "wind_gust_kt": "wgst",
+    "altim_in_hg": "altim",
+    "latitude": "lat",
+    "longitude": "lon",
+    "elevation_m": "elev",
+}
+
+def _to_number(value: Optional[str]) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return int(number) if number.is_integer() else number
+
+def _to_epoch(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+    except ValueError:
+        return None
+
+def normalize_record(fields: Dict[str, Any], clouds: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Convert one bulk-file METAR into the AWC data API JSON shape used by AWCMetarService
+
+    Args:
+        fields: Column/element name to string value
+        clouds: Sky condition layers as {"cover", "base"} dicts
+
+    Returns:
+        Normalized record, or None if the row has no station or raw text
+    """
+    station = (fields.get("station_id") or "").strip().upper()
+    raw_text = (fields.get("raw_text") or "").strip()
+    if not station or not raw_text:
+        return None
+
+    record: Dict[str, Any] = {
+        "icaoId": station,
+        "rawOb": raw_text,
+        "obsTime": _to_epoch(fields.get("observation_time")),
+        "reportTime": fields.get("observation_time"),
+        "flightCategory": fields.get("flight_category") or None,
+        "wxString": fields.get("wx_string") or None,
+        "metarType": fields.get("metar_type") or None,
+        "clouds": clouds,
+    }
+    for source, target in _NUMERIC_FIELDS.items():
+        record[target] = _to_number(fields.get(source))
+
+    wind_dir = fields.get("wind_dir_degrees")
+    record["wdir"] = _to_number(wind_dir) if wind_dir and wind_dir.isdigit() else (wind_dir or None)
+    visibility = fields.get("visibility_statute_mi")
+    record["visib"] = _to_number(visibility) if _to_number(visibility) is not None else (visibility or None)
+    return record
+
+class CsvMetarParser:
+    """Incremental parser for the AWC CSV cache file"""
+
+    def __init__(self):
+        self._buffer = ""
+        self._header: Optional[List[str]] = None
+
+    def feed(self, text: str) -> Iterator[Dict[str, Any]]:
+        self._buffer += text
+        lines = self._buffer.split("\n")
+        self._buffer = lines.pop()
+        yield from self._parse_lines(lines)
+
+    def close(self) -> Iterator[Dict[str, Any]]:
+        lines, self._buffer = [self._buffer], ""
+        yield from self._parse_lines(lines)
+
+    def _parse_lines(self, lines: List[str]) -> Iterator[Dict[str, Any]]:
+        for row in csv.reader(line.rstrip("\r") for line in lines if line.strip()):
+            if self._header is None:
+                # The file starts with a few status lines before the column header
+                if row and row[0] == "raw_text":
+                    self._header = row
+                continue
+
+            fields: Dict[str, Any] = {}
+            clouds: List[Dict[str, Any]] = []
+            for index, name in enumerate(self._header):
+                value = row[index] if index < len(row) else ""
+                if name == "sky_cover":
+                    if value:
+                        clouds.append({"cover": value, "base": None})
+                elif name == "cloud_base_ft_agl":
+                    if value and clouds and clouds[-1]["base"] is None:
+                        clouds[-1]["base"] = _to_number(value)
+                else:
+                    fields[name] = value
+
+            record = normalize_record(fields, clouds)
+            if record is not None:
+                yield record
+
+class XmlMetarParser:
+    """Incremental parser for the AWC XML cache file"""
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("end",))
+
+    def feed(self, text: str) -> Iterator[Dict[str, Any]]:
+        self._parser.feed(text)
+        yield from self._drain()
+
+    def close(self) -> Iterator[Dict[str, Any]]:
+        self._parser.close()
+        yield from self._drain()
+
+    def _drain(self) -> Iterator[Dict[str, Any]]:
+        for _, element in self._parser.read_events():
+            if element.tag != "METAR":
+                continue
+            fields = {child.tag: (child.text or "").strip() for child in element if child.tag != "sky_condition"}
+            clouds = [
+                {"cover": sky.get("sky_cover"), "base": _to_number(sky.get("cloud_base_ft_agl"))}
+                for sky in element.findall("sky_condition")
+            ]
+            element.clear()
+            record = normalize_record(fields, clouds)
+            if record is not None:
+                yield record
+
+class MetarStationStore:
+    """Latest METAR per station, replaced atomically after each successful ingest"""
+
+    def __init__(self, max_staleness: Optional[float] = None):
+        self.max_staleness = max_staleness if max_staleness is not None else settings.METAR_BULK_MAX_STALENESS
+        self._records: Dict[str, Dict[str, Any]] = {}
+        # (raw text, built response) per (station, obsTime) of the current records
+        self._built: Dict[Tuple[str, Any], Tuple[str, Any]] = {}
+        self.updated_at: Optional[float] = None
+        self.lookups = 0
+        self.hits = 0
+
+    def replace(self, records: Dict[str, Dict[str, Any]]) -> None:
+        # Keep built responses only for reports still in the feed, so the memo cannot outgrow it
+        current = {(station, record.get("obsTime")) for station, record in records.items()}
+        self._built = {key: built for key, built in self._built.items() if key in current}
+        self._records = records
+        self.updated_at = time.monotonic()
+
+    def touch(self) -> None:
+        """Mark the current contents as confirmed up to date"""
+        self.updated_at = time.monotonic()
+
+    def station_count(self) -> int:
+        return len(self._records)
+
+    def is_fresh(self) -> bool:
+        return self.updated_at is not None and time.monotonic() - self.updated_at <= self.max_staleness
+
+    def age_seconds(self) -> Optional[float]:
+        """Seconds since the store was last refreshed from the feed"""
+        if self.updated_at is None:
+            return None
+        return round(time.monotonic() - self.updated_at, 1)
+
+    def get(self, station: str) -> Optional[Dict[str, Any]]:
+        """Latest record for a station, or None if unknown or the store is stale"""
+        self.lookups += 1
+        if not self.is_fresh():
+            return None
+        record = self._records.get(station.upper())
+        if record is not None:
+            self.hits += 1
+        return record
+
+    def records(self) -> Dict[str, Dict[str, Any]]:
+        """Every station's record by station code, or nothing if the store is stale"""
+        return self._records if self.is_fresh() else {}
+
+    def get_built(self, station: str, builder: Callable[[str, Dict[str, Any]], Any]) -> Optional[Any]:
+        """
+        Return a response built from the station's record, building it once per report
+
+        Args:
+            station: ICAO station code
+            builder: Callable turning (station, record) into a response object
+
+        Returns:
+            The built response, or None if the store cannot serve the station
+        """
+        record = self.get(station)
+        if record is None:
+            return None
+        station = station.upper()
+        key = (station, record.get("obsTime"))
+        built = self._built.get(key)
+        # A corrected report keeps its observation time
+        if built is None or built[0] != record["rawOb"]:
+            built = (record["rawOb"], builder(station, record))
+            self._built[key] = built
+        return built[1]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "stations": self.station_count(),
+            "fresh": self.is_fresh(),
+            "age_seconds": self.age_seconds(),
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
+
+class MetarBulkIngester:
+    """Background task that refreshes a MetarStationStore from the bulk METAR feed"""
+
+    def __init__(self, store: MetarStationStore, feed_url: Optional[str] = None,
+                 interval: Optional[float] = None, registry: Optional[UpstreamClientRegistry] = None):
+        self.store = store
+        self.feed_url = feed_url or settings.METAR_BULK_FEED_URL
+        self.interval = interval if interval is not None else settings.METAR_BULK_INGEST_INTERVAL
+        self.registry = registry or client_registry
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_duration: Optional[float] = None
+        self._validators: Optional[Validators] = None
+        self._pending_validators: Optional[Validators] = None
+        self.not_modified = False
+        self.unchanged_runs = 0
+
+    async def _read_chunks(self) -> AsyncIterator[bytes]:
+        """Yield raw bytes from an http(s) URL, file:// URL or local path"""
+        parts = urlsplit(self.feed_url)
+        if parts.scheme in ("http", "https"):
+            session = await self.registry.get_session(self.feed_url)
+            headers = self._validators.request_headers() if self._validators is not None else {}
+            async with rate_limiters.get(self.feed_url).slot(PRIORITY_BACKGROUND) as permit, \
+                    session.get(self.feed_url, headers=headers) as response:
+                permit.status = response.status
+                if response.status == 304:
+                    self.not_modified = True
+                    return
+                response.raise_for_status()
+                # Only adopted once the body has been ingested successfully
+                self._pending_validators = Validators(response.headers.get("ETag"), response.headers.get("Last-Modified"), None)
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    yield chunk
+            return
+
+        path = url2pathname(parts.path) if parts.scheme == "file" else self.feed_url
+        with open(os.path.expanduser(path), "rb") as handle:
+            while True:
+                chunk = await asyncio.to_thread(handle.read, CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    async def ingest_once(self) -> int:
+        """
+        Download and parse the feed once, replacing the store contents on success
+
+        Returns:
+            Number of stations loaded
+        """
+        started = time.monotonic()
+        records: Dict[str, Dict[str, Any]] = {}
+        decompressor = None
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        parser = None
+
+        def collect(parsed):
+            for record in parsed:
+                # Keep the newest report per station
+                current = records.get(record["icaoId"])
+                if current is None or (record["obsTime"] or 0) >= (current["obsTime"] or 0):
+                    records[record["icaoId"]] = record
+
+        self.not_modified = False
+        async for chunk in self._read_chunks():
+            if decompressor is None:
+                # Detect gzip from the magic number rather than trusting the file name
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if chunk[:2] == b"\x1f\x8b" else False
+            data = decompressor.decompress(chunk) if decompressor else chunk
+            if not data:
+                continue
+            if parser is None:
+                parser = XmlMetarParser() if data.lstrip()[:1] == b"<" else CsvMetarParser()
+            collect(parser.feed(decoder.decode(data)))
+
+        if parser is not None:
+            tail = decompressor.flush() if decompressor else b""
+            collect(parser.feed(decoder.decode(tail, final=True)))
+            collect(parser.close())
+
+        if self.not_modified and self.store.updated_at is not None:
+            # Feed unchanged since the last ingest: the store is still current
+            self.store.touch()
+            self.unchanged_runs += 1
+            return self.store.station_count()
+
+        if not records:
+            raise ValueError(f"No METARs parsed from bulk feed {self.feed_url}")
+
+        self.store.replace(records)
+        self._validators, self._pending_validators = self._pending_validators, None
+        self.last_duration = time.monotonic() - started
+        logger.info(f"Ingested {len(records)} METARs from bulk feed in {self.last_duration:.2f}s")
+        return len(records)
+
+    async def run(self) -> None:
+        """Ingest forever at the configured interval"""
+        while True:
+            self.runs += 1
+            try:
+                await self.ingest_once()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.error(f"Bulk METAR ingest failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.METAR_BULK_INGEST_ENABLED,
+            "feed_url": self.feed_url,
+            "runs": self.runs,
+            "failures": self.failures,
+            "unchanged_runs": self.unchanged_runs,
+            "last_error": self.last_error,
+            "last_duration_seconds": round(self.last_duration, 3) if self.last_duration else None,
+            "store": self.store.stats(),
+        }
+
+# Process-wide store served by AWCMetarService, refreshed by the ingester when enabled
+metar_store = MetarStationStore()
+metar_ingester = MetarBulkIngester(metar_store)
@@ -9,6 +9,8 @@ import logging
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional, Union, Tuple
 
+from app.core.metrics import PARSER_DURATION, timed
+
 logger = logging.getLogger(__name__)
 
 # Weather phenomena codes and their descriptions
@@ -781,6 +783,7 @@ class MetarParser:
             return f"Winds favoring runway {runway}"
 
 # Function for external use
+@timed(PARSER_DURATION, "metar")
 def parse_metar(metar_string: str) -> Dict[str, Any]:
     """Parse a METAR string and return structured data with a pilot-friendly summary
     
@@ -1,21 +1,221 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
 import logging
+import time
 from datetime import datetime
 import re
 
-from app.services.base_client import BaseApiClient
+from app.services.base_client import BaseApiClient, normalize_station_ids
+from app.services.http_client import UpstreamClientRegistry
 from app.services.metar_parser import parse_metar
+from app.services.cache import AsyncTTLCache, stale_window
+from app.services.metar_ingest import metar_store
+from app.services.report_cycle import metar_ttl
 from app.schemas.weather import MetarResponse
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Parsed METARs keyed by (station, hours); entries expire with the observation cycle
+metar_cache = AsyncTTLCache("metar", max_entries=settings.METAR_CACHE_MAX_ENTRIES)
+# {station: METAR} maps of bounding-box queries, kept apart so they never evict station entries
+metar_bbox_cache = AsyncTTLCache("metar_bbox", max_entries=100)
+
+def _metar_cache_ttl(metar: MetarResponse) -> Optional[float]:
+    """Cache lifetime for a METAR response, or None for error/no-data responses"""
+    if metar.raw_data is None:
+        return None
+    return metar_ttl(metar.parsed_metar, metar.raw_data)
+
 class AWCMetarService(BaseApiClient):
     """Client for NOAA Aviation Weather Center METAR API"""
     
-    def __init__(self):
-        super().__init__(base_url="https://aviationweather.gov")
+    def __init__(self, registry: Optional[UpstreamClientRegistry] = None):
+        super().__init__(base_url=settings.AWC_BASE_URL, registry=registry)
         
     async def get_metar(self, station: str, hours: int = 1) -> MetarResponse:
+        """Get METAR data from the bulk-ingested store, the report-cycle cache or AWC"""
+        if hours == 1:
+            stored = metar_store.get_built(station, self._build_metar_response)
+            if stored is not None:
+                return stored.model_copy(update={"data_age_seconds": metar_store.age_seconds()})
+        
+        metar, age = await metar_cache.fetch(
+            (station.upper(), hours),
+            lambda: self._fetch_metar(station, hours),
+            _metar_cache_ttl,
+            stale_ttl=stale_window(settings.METAR_SWR_STALE_TTL)
+        )
+        # Callers decorate the response (e.g. AI summaries), so never hand out the cached instance
+        return metar.model_copy(update={"data_age_seconds": round(age, 1)})
+    
+    async def get_metars(self, stations: List[str], hours: int = 1) -> Dict[str, MetarResponse]:
+        """
+        Get METARs for many stations using AWC's comma-separated ids parameter
+        
+        Args:
+            stations: ICAO station codes
+            hours: Hours of history to search (the most recent report per station is returned)
+            
+        Returns:
+            Dictionary of MetarResponse objects keyed by upper-case station code
+        """
+        wanted = normalize_station_ids(stations)
+        results: Dict[str, MetarResponse] = {}
+        ages: Dict[str, float] = {}
+        missing = []
+        stale = []
+        now = time.monotonic()
+        for station in wanted:
+            stored = metar_store.get_built(station, self._build_metar_response) if hours == 1 else None
+            if stored is not None:
+                results[station] = stored
+                ages[station] = metar_store.age_seconds()
+                continue
+            entry = metar_cache.get_entry((station, hours))
+            if entry is None:
+                missing.append(station)
+                continue
+            results[station] = entry.value
+            ages[station] = round(now - entry.stored_at, 1)
+            if entry.fresh_until <= now:
+                stale.append(station)
+        
+        if stale:
+            # Serve the stale copies now and revalidate them together in one background batch
+            metar_cache.refresh_in_background(
+                ("batch", tuple(stale), hours),
+                lambda: self._load_metar_batch(stale, hours)
+            )
+        
+        if missing:
+            results.update(await self._load_metar_batch(missing, hours))
+            for station in missing:
+                ages[station] = 0.0
+        
+        return {
+            station: results[station].model_copy(update={"data_age_seconds": ages.get(station)})
+            for station in wanted
+        }
+    
+    async def get_metars_in_bbox(self, bbox: Tuple[float, float, float, float]) -> Dict[str, MetarResponse]:
+        """
+        Get the latest METAR of every station inside a bounding box
+        
+        Served from the bulk-ingested store when it is fresh, otherwise with a single AWC bbox
+        query whose METARs are also cached per station.
+        
+        Args:
+            bbox: (min_lat, min_lon, max_lat, max_lon)
+            
+        Returns:
+            Dictionary of MetarResponse objects keyed by upper-case station code
+        """
+        min_lat, min_lon, max_lat, max_lon = bbox
+        records = metar_store.records()
+        if records:
+            age = metar_store.age_seconds()
+            results = {}
+            for station, record in records.items():
+                lat, lon = record.get("lat"), record.get("lon")
+                if lat is not None and lon is not None and min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+                    metar = metar_store.get_built(station, self._build_metar_response)
+                    if metar is not None:
+                        results[station] = metar.model_copy(update={"data_age_seconds": age})
+            return results
+        
+        metars, age = await metar_bbox_cache.fetch(
+            tuple(round(value, 2) for value in bbox),
+            lambda: self._fetch_metar_bbox(bbox),
+            lambda result: settings.METAR_CACHE_MIN_TTL if result else None
+        )
+        return {
+            station: metar.model_copy(update={"data_age_seconds": round(age, 1)})
+            for station, metar in metars.items()
+        }
+    
+    async def _fetch_metar_bbox(self, bbox: Tuple[float, float, float, float]) -> Dict[str, MetarResponse]:
+        """Fetch and parse the METARs inside a bounding box in a single upstream call"""
+        params = {
+            "bbox": ",".join(f"{value:.3f}" for value in bbox),
+            "format": "json",
+            "hours": 1
+        }
+        data = await self.get("/api/data/metar", params=params)
+        if not isinstance(data, list):
+            data = []
+        
+        results: Dict[str, MetarResponse] = {}
+        for metar_data in data:
+            # AWC lists the newest observation first, so keep the first record per station
+            station = str(metar_data.get("icaoId", "")).upper()
+            if station and station not in results:
+                metar = self._build_metar_response(station, metar_data)
+                ttl = _metar_cache_ttl(metar)
+                if ttl:
+                    metar_cache.set((station, 1), metar, ttl, stale_window(settings.METAR_SWR_STALE_TTL))
+                results[station] = metar
+        return results
+    
+    async def _load_metar_batch(self, stations: List[str], hours: int) -> Dict[str, MetarResponse]:
+        """Fetch stations in chunks of AWC_BATCH_CHUNK_SIZE ids and store them in the cache"""
+        chunk_size = max(1, settings.AWC_BATCH_CHUNK_SIZE)
+        chunks = [stations[i:i + chunk_size] for i in range(0, len(stations), chunk_size)]
+        fetched = await asyncio.gather(*(self._fetch_metar_batch(chunk, hours) for chunk in chunks))
+        results = {}
+        for batch in fetched:
+            for station, metar in batch.items():
+                ttl = _metar_cache_ttl(metar)
+                if ttl:
+                    metar_cache.set((station, hours), metar, ttl, stale_window(settings.METAR_SWR_STALE_TTL))
+                results[station] = metar
+        return results
+    
+    async def _fetch_metar_batch(self, stations: List[str], hours: int = 1) -> Dict[str, MetarResponse]:
+        """Fetch and parse METARs for a chunk of stations in a single upstream call"""
+        try:
+            endpoint = "/api/data/metar"
+            params = {
+                "ids": ",".join(stations),
+                "format": "json",
+                "hours": hours
+            }
+            
+            data = await self.get(endpoint, params=params)
+            if not isinstance(data, list):
+                data = []
+            
+            # AWC lists the newest observation first, so keep the first record per station
+            latest: Dict[str, Dict[str, Any]] = {}
+            for metar_data in data:
+                station_id = str(metar_data.get("icaoId", "")).upper()
+                if station_id and station_id not in latest:
+                    latest[station_id] = metar_data
+            
+            results = {}
+            for station in stations:
+                if station in latest:
+                    results[station] = self._build_metar_response(station, latest[station])
+                else:
+                    results[station] = MetarResponse(
+                        source="AWC",
+                        station=station,
+                        raw_text=f"No METAR data available for {station}"
+                    )
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error fetching METAR batch from AWC: {str(e)}")
+            return {
+                station: MetarResponse(
+                    source="AWC",
+                    station=station,
+                    raw_text=f"Error fetching METAR: {str(e)}"
+                )
+                for station in stations
+            }
+    
+    async def _fetch_metar(self, station: str, hours: int = 1) -> MetarResponse:
         """Get METAR data from Aviation Weather Center API"""
         try:
             # Use the correct endpoint for AWC METAR API
@@ -35,68 +235,7 @@ class AWCMetarService(BaseApiClient):
                     raw_text=f"No METAR data available for {station}"
                 )
             
-            metar_data = data[0]
-            raw_metar = metar_data.get("rawOb")
-            
-            # Process the raw METAR through our parser to get detailed information and pilot summary
-            parsed_data = {}
-            if raw_metar:
-                parsed_data = parse_metar(raw_metar)
-            
-            # Process visibility - handle special cases like "10+" by removing non-numeric characters
-            visibility = metar_data.get("visib")
-            if visibility is not None and not isinstance(visibility, (int, float)):
-                # Extract numeric part if it's a string
-                if isinstance(visibility, str):
-                    # Remove any non-numeric characters except decimal point
-                    visibility_str = re.sub(r'[^\d.]', '', visibility)
-                    try:
-                        visibility = float(visibility_str) if visibility_str else None
-                    except ValueError:
-                        visibility = None
-            
-            # Process wind direction - handle special cases like "VRB" (variable)
-            wind_direction = metar_data.get("wdir")
-            if wind_direction is not None and not isinstance(wind_direction, (int, float)):
-                if isinstance(wind_direction, str):
-                    if wind_direction.upper() == "VRB" or not wind_direction.isdigit():
-                        wind_direction = None
-                    else:
-                        try:
-                            wind_direction = int(wind_direction)
-                        except ValueError:
-                            wind_direction = None
-            
-            # Extract relevant fields from the response
-            result = MetarResponse(
-                source="AWC",
-                station=station,
-                raw_text=raw_metar,
-                flight_category=metar_data.get("flightCategory") or parsed_data.get("flight_category"),
-                temperature=metar_data.get("temp") or parsed_data.get("temperature"),
-                dewpoint=metar_data.get("dewp") or parsed_data.get("dewpoint"),
-                wind_speed=metar_data.get("wspd"),
-                wind_direction=wind_direction,
-                visibility=visibility,
-                parsed_metar=parsed_data,  # Include our detailed parsed data
-                pilot_summary=parsed_data.get("pilot_summary", ""),  # Include the pilot-friendly summary
-                raw_data=metar_data
-            )
-            
-            # Extract ceiling information if available
-            if "clouds" in metar_data and metar_data["clouds"]:
-                result.clouds = metar_data["clouds"]
-                ceiling = None
-                for cloud in metar_data["clouds"]:
-                    if cloud.get("cover") in ["BKN", "OVC"]:
-                        ceiling = cloud.get("base")
-                        break
-                result.ceiling = ceiling or parsed_data.get("ceiling")
-            elif parsed_data.get("clouds"):
-                result.clouds = parsed_data.get("clouds")
-                result.ceiling = parsed_data.get("ceiling")
-            
-            return result
+            return self._build_metar_response(station, data[0])
             
         except Exception as e:
             logger.error(f"Error fetching METAR from AWC: {str(e)}")
@@ -105,3 +244,67 @@ class AWCMetarService(BaseApiClient):
                 station=station,
                 raw_text=f"Error fetching METAR: {str(e)}"
             )
+    
+    def _build_metar_response(self, station: str, metar_data: Dict[str, Any]) -> MetarResponse:
+        """Build a MetarResponse from one AWC METAR JSON record"""
+        raw_metar = metar_data.get("rawOb")
+        
+        # Process the raw METAR through our parser to get detailed information and pilot summary
+        parsed_data = {}
+        if raw_metar:
+            parsed_data = parse_metar(raw_metar)
+        
+        # Process visibility - handle special cases like "10+" by removing non-numeric characters
+        visibility = metar_data.get("visib")
+        if visibility is not None and not isinstance(visibility, (int, float)):
+            # Extract numeric part if it's a string
+            if isinstance(visibility, str):
+                # Remove any non-numeric characters except decimal point
+                visibility_str = re.sub(r'[^\d.]', '', visibility)
+                try:
+                    visibility = float(visibility_str) if visibility_str else None
+                except ValueError:
+                    visibility = None
+        
+        # Process wind direction - handle special cases like "VRB" (variable)
+        wind_direction = metar_data.get("wdir")
+        if wind_direction is not None and not isinstance(wind_direction, (int, float)):
+            if isinstance(wind_direction, str):
+                if wind_direction.upper() == "VRB" or not wind_direction.isdigit():
+                    wind_direction = None
+                else:
+                    try:
+                        wind_direction = int(wind_direction)
+                    except ValueError:
+                        wind_direction = None
+        
+        # Extract relevant fields from the response
+        result = MetarResponse(
+            source="AWC",
+            station=station,
+            raw_text=raw_metar,
+            flight_category=metar_data.get("flightCategory") or parsed_data.get("flight_category"),
+            temperature=metar_data.get("temp") or parsed_data.get("temperature"),
+            dewpoint=metar_data.get("dewp") or parsed_data.get("dewpoint"),
+            wind_speed=metar_data.get("wspd"),
+            wind_direction=wind_direction,
+            visibility=visibility,
+            parsed_metar=parsed_data,  # Include our detailed parsed data
+            pilot_summary=parsed_data.get("pilot_summary", ""),  # Include the pilot-friendly summary
+            raw_data=metar_data
+        )
+        
+        # Extract ceiling information if available
+        if "clouds" in metar_data and metar_data["clouds"]:
+            result.clouds = metar_data["clouds"]
+            ceiling = None
+            for cloud in metar_data["clouds"]:
+                if cloud.get("cover") in ["BKN", "OVC"]:
+                    ceiling = cloud.get("base")
+                    break
+            result.ceiling = ceiling or parsed_data.get("ceiling")
+        elif parsed_data.get("clouds"):
+            result.clouds = parsed_data.get("clouds")
+            result.ceiling = parsed_data.get("ceiling")
+        
+        return result
@@ -5,12 +5,25 @@ import logging
 import asyncio
 import os
 import json
-from typing import Dict, Any, Optional, Union, List
+import time
+from contextlib import aclosing
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Any, Optional, Union, List
 from openai import AsyncOpenAI
 from ..core.config import settings
+from ..core.metrics import LLM_DURATION, LLM_REQUESTS, LLM_TOKENS
+from .summary_cache import summary_cache, summary_key, summary_ttl
+from .provider_router import LatencyTracker
 
 logger = logging.getLogger(__name__)
 
+# Part of every summary cache key: bump whenever prompts change so old summaries are not reused
+PROMPT_VERSION = "1"
+
+# Total tokens of completions made from the current context are appended here when set
+# (background jobs use it to keep to a token budget)
+llm_token_usage: ContextVar[Optional[List[int]]] = ContextVar("llm_token_usage", default=None)
+
 class OpenAISummaryService:
     """Service for generating summaries of weather reports using OpenAI GPT models"""
     
@@ -24,14 +37,125 @@ class OpenAISummaryService:
         self.client = AsyncOpenAI(api_key=self.api_key)
         # Use GPT-4o for more comprehensive and accurate summaries
         self.model = "gpt-4o"  
+        # Bounds concurrent completions across all requests handled by this process
+        self._semaphore = asyncio.Semaphore(max(1, settings.LLM_MAX_CONCURRENCY))
+        # Recent completion latencies, used to decide whether an AI summary fits a latency budget
+        self.latency = LatencyTracker()
+        # Completions currently running (interactive and background)
+        self.inflight = 0
+    
+    def _record_usage(self, usage: Any) -> None:
+        if usage is None:
+            return
+        prompt_tokens = usage.prompt_tokens or 0
+        completion_tokens = usage.completion_tokens or 0
+        LLM_TOKENS.inc(self.model, "prompt", amount=prompt_tokens)
+        LLM_TOKENS.inc(self.model, "completion", amount=completion_tokens)
+        holder = llm_token_usage.get()
+        if holder is not None:
+            holder.append(prompt_tokens + completion_tokens)
+    
+    async def _complete(self, kind: str, **kwargs) -> Any:
+        """Create a chat completion, recording latency, outcome and token usage metrics"""
+        started = time.perf_counter()
+        outcome = "error"
+        self.inflight += 1
+        try:
+            response = await self.client.chat.completions.create(model=self.model, **kwargs)
+            outcome = "ok"
+            self.latency.record(time.perf_counter() - started)
+            self._record_usage(getattr(response, "usage", None))
+            return response
+        finally:
+            self.inflight -= 1
+            LLM_DURATION.observe(time.perf_counter() - started, self.model, kind)
+            LLM_REQUESTS.inc(self.model, kind, outcome)
+    
+    async def _stream(self, kind: str, **kwargs) -> AsyncIterator[str]:
+        """
+        Stream a chat completion as text deltas, recording the same metrics as _complete
+        
+        Closing the generator (e.g. when the client disconnects) closes the HTTP stream,
+        which cancels the generation upstream.
+        """
+        started = time.perf_counter()
+        outcome = "error"
+        stream = None
+        self.inflight += 1
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model, stream=True, stream_options={"include_usage": True}, **kwargs
+            )
+            async for chunk in stream:
+                self._record_usage(getattr(chunk, "usage", None))
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            outcome = "ok"
+            self.latency.record(time.perf_counter() - started)
+        except (asyncio.CancelledError, GeneratorExit):
+            outcome = "cancelled"
+            raise
+        finally:
+            self.inflight -= 1
+            if stream is not None:
+                await stream.close()
+            LLM_DURATION.observe(time.perf_counter() - started, self.model, kind)
+            LLM_REQUESTS.inc(self.model, kind, outcome)
     
-    async def generate_summary(self, report_type: str, report_data: Dict[str, Any]) -> Optional[str]:
+    async def _stream_cached(self, key: str, kind: str, ttl: float, **kwargs) -> AsyncIterator[str]:
+        """Yield a cached summary in one piece, or stream a new one and cache it once complete"""
+        cached = await summary_cache.lookup(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        parts: List[str] = []
+        # aclosing: if this generator is closed mid-stream, close the completion stream with it
+        async with aclosing(self._stream(kind, **kwargs)) as deltas:
+            async for delta in deltas:
+                parts.append(delta)
+                yield delta
+        text = "".join(parts).strip()
+        if text:
+            await summary_cache.put(key, kind, text, ttl)
+    
+    def stream_summary(self, report_type: str, report_data: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Stream a pilot-friendly summary of a weather report as text deltas
+        
+        Shares the summary cache with generate_summary; a cached summary arrives as a single
+        delta. Raises on API errors so callers can fall back.
+        """
+        return self._stream_cached(
+            summary_key(report_type, PROMPT_VERSION, self.model, report_data.get("raw_text") or ""),
+            report_type,
+            summary_ttl(report_data) if report_data.get("raw_text") else 0,
+            **self._summary_request(report_type, report_data)
+        )
+    
+    def stream_comprehensive_summary(self, all_reports: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Stream the comprehensive airport summary as raw JSON text deltas
+        
+        Join the deltas and decode them with parse_comprehensive_summary. Raises on API errors.
+        """
+        prompt = self._comprehensive_prompt(all_reports)
+        return self._stream_cached(
+            summary_key("comprehensive-stream", PROMPT_VERSION, self.model, prompt),
+            "comprehensive",
+            summary_ttl(),
+            **self._comprehensive_request(prompt)
+        )
+    
+    async def generate_summary(self, report_type: str, report_data: Dict[str, Any],
+                               use_fallback: bool = True) -> Optional[str]:
         """
         Generate a pilot-friendly summary of a weather report
         
         Args:
             report_type: Type of report ('metar', 'taf', 'pirep', 'sigmet')
             report_data: Report data in dictionary format
+            use_fallback: Return a generic fallback text (rather than None) if the API call fails
             
         Returns:
             A pilot-friendly summary of the report, or None if generation failed
@@ -41,34 +165,90 @@ class OpenAISummaryService:
             return None
             
         try:
-            prompt = self._create_prompt_for_report(report_type, report_data)
+            raw_text = report_data.get("raw_text")
+            if not raw_text:
+                return await self._request_summary(report_type, report_data)
             
-            # Log useful information for debugging
-            logger.info(f"Generating summary for {report_type} using model {self.model}")
-            
-            # Call OpenAI API to generate summary
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self._get_system_prompt(report_type)},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,  # Lower temperature for more consistent, factual responses
-                max_tokens=600,   # Increased token length for more detailed summaries
+            # Identical report text gives an identical summary: reuse it while the report is valid
+            return await summary_cache.get_or_create(
+                summary_key(report_type, PROMPT_VERSION, self.model, raw_text),
+                report_type,
+                lambda: self._request_summary(report_type, report_data),
+                summary_ttl(report_data)
             )
-            
-            if response and response.choices and len(response.choices) > 0:
-                summary = response.choices[0].message.content.strip()
-                logger.info(f"Generated {report_type.upper()} summary successfully")
-                return summary
-            else:
-                logger.warning(f"No content returned from OpenAI for {report_type.upper()} summary")
-                return None
                 
         except Exception as e:
             logger.error(f"Error generating {report_type.upper()} summary: {str(e)}")
             # Return a fallback summary if API fails
-            return self._generate_fallback_summary(report_type, report_data)
+            return self._generate_fallback_summary(report_type, report_data) if use_fallback else None
+    
+    def _summary_request(self, report_type: str, report_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Chat completion arguments for a single report summary"""
+        return {
+            "messages": [
+                {"role": "system", "content": self._get_system_prompt(report_type)},
+                {"role": "user", "content": self._create_prompt_for_report(report_type, report_data)}
+            ],
+            "temperature": 0.3,  # Lower temperature for more consistent, factual responses
+            "max_tokens": 600,   # Increased token length for more detailed summaries
+        }
+    
+    async def _request_summary(self, report_type: str, report_data: Dict[str, Any]) -> Optional[str]:
+        """Call the OpenAI API for one report summary (raises on API errors)"""
+        # Log useful information for debugging
+        logger.info(f"Generating summary for {report_type} using model {self.model}")
+        
+        # Call OpenAI API to generate summary
+        response = await self._complete(report_type, **self._summary_request(report_type, report_data))
+        
+        if response and response.choices and len(response.choices) > 0:
+            summary = response.choices[0].message.content.strip()
+            logger.info(f"Generated {report_type.upper()} summary successfully")
+            return summary
+        
+        logger.warning(f"No content returned from OpenAI for {report_type.upper()} summary")
+        return None
+    
+    async def generate_summaries(self, report_type: str, reports: List[Dict[str, Any]],
+                                 budget: Optional[float] = None, use_fallback: bool = True) -> List[Optional[str]]:
+        """
+        Generate summaries for many reports concurrently within a time budget
+        
+        At most LLM_MAX_CONCURRENCY completions run at once (shared by all callers). Summaries
+        still pending when the budget runs out are cancelled and returned as None, so callers
+        get every summary that finished in time.
+        
+        Args:
+            report_type: Type of report ('metar', 'taf', 'pirep', 'sigmet')
+            reports: Report data dictionaries
+            budget: Seconds allowed for the whole batch (default: LLM_BATCH_BUDGET_SECONDS)
+            use_fallback: Passed to generate_summary
+            
+        Returns:
+            Summaries in the order of reports, None where generation failed or ran out of time
+        """
+        if not reports:
+            return []
+        budget = settings.LLM_BATCH_BUDGET_SECONDS if budget is None else budget
+        
+        async def summarize(report: Dict[str, Any]) -> Optional[str]:
+            async with self._semaphore:
+                return await self.generate_summary(report_type, report, use_fallback=use_fallback)
+        
+        tasks = [asyncio.ensure_future(summarize(report)) for report in reports]
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=budget)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        if pending:
+            logger.warning(f"{len(pending)} of {len(tasks)} {report_type.upper()} summaries missed the {budget}s budget")
+        
+        return [
+            task.result() if task in done and not task.cancelled() and task.exception() is None else None
+            for task in tasks
+        ]
     
     def _generate_fallback_summary(self, report_type: str, report_data: Dict[str, Any]) -> str:
         """Generate a basic fallback summary when OpenAI API fails"""
@@ -167,25 +347,60 @@ Structure your response with clear sections and conclude with specific avoidance
         else:
             return f"Please provide a comprehensive analysis of this aviation weather information with detailed operational implications for pilots: {report_data}"
     
-    async def generate_comprehensive_summary(self, all_reports: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    async def generate_comprehensive_summary(self, all_reports: Dict[str, Any],
+                                             use_fallback: bool = True) -> Optional[Dict[str, Any]]:
         """
         Generate a comprehensive, visual, and detailed summary of all weather reports for an airport.
         
         Args:
             all_reports: Dictionary containing METAR, TAF, PIREPs, and SIGMETs
+            use_fallback: Return the fallback summary (rather than None) if the API is not configured or fails
             
         Returns:
             A comprehensive summary dictionary with overview, current conditions, forecast, hazards, and recommendations
         """
         if not self.api_key:
             logger.warning("OpenAI API key not configured, cannot generate comprehensive summary")
-            return self._generate_fallback_comprehensive_summary(all_reports)
+            return self._generate_fallback_comprehensive_summary(all_reports) if use_fallback else None
         
         try:
             station = all_reports.get("station", "unknown")
             
-            # Build comprehensive prompt
-            prompt = f"""Create a super visual and detailed comprehensive weather report summary for airport {station}.
+            prompt = self._comprehensive_prompt(all_reports)
+            
+            # The prompt is built only from the reports, so it is the content address of the summary
+            summary = await summary_cache.get_or_create(
+                summary_key("comprehensive", PROMPT_VERSION, self.model, prompt),
+                "comprehensive",
+                lambda: self._request_comprehensive_summary(station, prompt),
+                summary_ttl()
+            )
+            if summary is None:
+                logger.warning(f"No content returned from OpenAI for comprehensive summary")
+                return self._generate_fallback_comprehensive_summary(all_reports) if use_fallback else None
+            return summary
+                
+        except Exception as e:
+            logger.error(f"Error generating comprehensive summary: {str(e)}")
+            return self._generate_fallback_comprehensive_summary(all_reports) if use_fallback else None
+    
+    async def _request_comprehensive_summary(self, station: str, prompt: str) -> Optional[Dict[str, Any]]:
+        """Call the OpenAI API for a comprehensive summary (raises on API errors)"""
+        logger.info(f"Generating comprehensive summary for {station} using model {self.model}")
+        
+        response = await self._complete("comprehensive", **self._comprehensive_request(prompt))
+        
+        if not (response and response.choices and len(response.choices) > 0):
+            return None
+        
+        summary = self.parse_comprehensive_summary(response.choices[0].message.content)
+        logger.info(f"Generated comprehensive summary for {station} successfully")
+        return summary
+    
+    def _comprehensive_prompt(self, all_reports: Dict[str, Any]) -> str:
+        """User prompt for the comprehensive airport summary (built only from the reports)"""
+        station = all_reports.get("station", "unknown")
+        return f"""Create a super visual and detailed comprehensive weather report summary for airport {station}.
 
 METAR (Current Conditions):
 {self._format_metar_for_summary(all_reports.get("metar"))}
@@ -220,45 +435,36 @@ Format the response as a structured JSON object with these keys:
 - recommendations: object with keys: flight_planning, timing, altitude, equipment, risk_assessment
 
 Make the summary detailed, professional, and actionable for pilots."""
-            
-            logger.info(f"Generating comprehensive summary for {station} using model {self.model}")
-            
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert aviation weather briefing assistant. Provide comprehensive, detailed, and visually structured weather summaries that help pilots make informed flight planning decisions. Always prioritize safety and operational considerations."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=2000,
-                response_format={"type": "json_object"}
-            )
-            
-            if response and response.choices and len(response.choices) > 0:
-                content = response.choices[0].message.content.strip()
-                try:
-                    summary = json.loads(content)
-                    logger.info(f"Generated comprehensive summary for {station} successfully")
-                    return summary
-                except json.JSONDecodeError:
-                    # If JSON parsing fails, return as structured text
-                    return {
-                        "overview": content[:500],
-                        "current_conditions": {"summary": content},
-                        "forecast_outlook": {"summary": content},
-                        "hazards": {"summary": content},
-                        "recommendations": {"summary": content}
-                    }
-            else:
-                logger.warning(f"No content returned from OpenAI for comprehensive summary")
-                return self._generate_fallback_comprehensive_summary(all_reports)
-                
-        except Exception as e:
-            logger.error(f"Error generating comprehensive summary: {str(e)}")
-            return self._generate_fallback_comprehensive_summary(all_reports)
+    
+    def _comprehensive_request(self, prompt: str) -> Dict[str, Any]:
+        """Chat completion arguments for the comprehensive airport summary"""
+        return {
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are an expert aviation weather briefing assistant. Provide comprehensive, detailed, and visually structured weather summaries that help pilots make informed flight planning decisions. Always prioritize safety and operational considerations."
+                },
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "max_tokens": 2000,
+            "response_format": {"type": "json_object"}
+        }
+    
+    def parse_comprehensive_summary(self, content: str) -> Dict[str, Any]:
+        """Decode the model's JSON summary, wrapping plain text in the same structure"""
+        content = content.strip()
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            # If JSON parsing fails, return as structured text
+            return {
+                "overview": content[:500],
+                "current_conditions": {"summary": content},
+                "forecast_outlook": {"summary": content},
+                "hazards": {"summary": content},
+                "recommendations": {"summary": content}
+            }
     
     def _format_metar_for_summary(self, metar: Optional[Dict[str, Any]]) -> str:
         """Format METAR data for summary prompt"""
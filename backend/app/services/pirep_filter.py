@@ -0,0 +1,151 @@
+"""
+Numeric PIREP hazard fields and the cockpit PIREP filter
+
+PirepService decodes the turbulence and icing groups once, when a report is parsed, into
+numeric severity levels and a bitmask of reported hazards. Cockpit requests then filter,
+count and group PIREPs with integer comparisons in a single pass, instead of repeating string
+matching on the intensity text for every request.
+"""
+import enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.schemas.weather import PirepResponse
+
+# Severity levels, ordered so that ranges can be compared numerically
+SEVERITY_NONE = 0
+SEVERITY_TRACE = 1
+SEVERITY_LIGHT = 2
+SEVERITY_LIGHT_MODERATE = 3
+SEVERITY_MODERATE = 4
+SEVERITY_MODERATE_SEVERE = 5
+SEVERITY_SEVERE = 6
+
+# Intensity codes produced by PirepService._extract_pirep_fields
+_INTENSITY_LEVELS = {
+    "TRACE": SEVERITY_TRACE,
+    "LGT": SEVERITY_LIGHT,
+    "LGT-MOD": SEVERITY_LIGHT_MODERATE,
+    "MOD": SEVERITY_MODERATE,
+    "MOD-SEV": SEVERITY_MODERATE_SEVERE,
+    "SEV": SEVERITY_SEVERE,
+}
+
+# Levels matched by the cockpit severity filter; ranges such as LGT-MOD match both ends
+SEVERITY_FILTER_RANGES = {
+    "light": (SEVERITY_TRACE, SEVERITY_LIGHT_MODERATE),
+    "moderate": (SEVERITY_LIGHT_MODERATE, SEVERITY_MODERATE_SEVERE),
+    "severe": (SEVERITY_MODERATE_SEVERE, SEVERITY_SEVERE),
+}
+
+class Hazard(enum.IntFlag):
+    """Bits of PirepResponse.hazard_flags"""
+    TURBULENCE = 1
+    ICING = 2
+    URGENT = 4
+
+# hazard_type filter values: (flags that must all be set, flags of which one must be set)
+_HAZARD_FILTERS = {
+    "turbulence": (Hazard.TURBULENCE, 0),
+    "icing": (Hazard.ICING, 0),
+    "both": (Hazard.TURBULENCE | Hazard.ICING, 0),
+    "any": (0, Hazard.TURBULENCE | Hazard.ICING),
+}
+
+def severity_level(intensity: Optional[str]) -> int:
+    """Numeric level of a decoded intensity code (0 for none or UNKNOWN)"""
+    return _INTENSITY_LEVELS.get((intensity or "").upper(), SEVERITY_NONE)
+
+def apply_hazard_fields(pirep: PirepResponse) -> None:
+    """Set the numeric severity levels and hazard flags from the decoded PIREP groups"""
+    flags = 0
+    turbulence = (pirep.turbulence or {}).get("intensity")
+    icing = (pirep.icing or {}).get("intensity")
+    if turbulence:
+        flags |= Hazard.TURBULENCE
+    if icing:
+        flags |= Hazard.ICING
+    if pirep.report_type == "UUA":
+        flags |= Hazard.URGENT
+    pirep.hazard_flags = int(flags)
+    pirep.turbulence_level = severity_level(turbulence)
+    pirep.icing_level = severity_level(icing)
+
+def _altitude_band(altitude: Any) -> str:
+    # 5,000 ft bands
+    band = (altitude // 5000) * 5
+    return f"{band}-{band + 5}k"
+
+def filter_pireps(
+    pireps: List[PirepResponse],
+    flight_level_min: Optional[int] = None,
+    flight_level_max: Optional[int] = None,
+    hazard_type: Optional[str] = None,
+    severity: Optional[str] = None
+) -> Tuple[List[PirepResponse], Dict[str, List[PirepResponse]], Dict[str, Any]]:
+    """
+    Filter PIREPs and compute grouping and statistics in one pass
+
+    Args:
+        pireps: PIREPs with hazard fields set (see apply_hazard_fields)
+        flight_level_min / flight_level_max: Inclusive flight level range; PIREPs without a
+            numeric altitude are dropped when either bound is given
+        hazard_type: turbulence, icing, both or any (other values do not filter)
+        severity: light, moderate or severe, matched against turbulence or icing
+
+    Returns:
+        (kept PIREPs, PIREPs grouped by location, stats) as served by /cockpit/pirep
+    """
+    altitude_filter = flight_level_min is not None or flight_level_max is not None
+    altitude_min = flight_level_min * 100 if flight_level_min is not None else None
+    altitude_max = flight_level_max * 100 if flight_level_max is not None else None
+    required, any_of = _HAZARD_FILTERS.get(hazard_type, (0, 0)) if hazard_type else (0, 0)
+    if severity:
+        # Unknown severities match nothing
+        severity_low, severity_high = SEVERITY_FILTER_RANGES.get(severity, (SEVERITY_SEVERE + 1, SEVERITY_NONE))
+
+    kept: List[PirepResponse] = []
+    grouped: Dict[str, List[PirepResponse]] = {}
+    turbulence_count = icing_count = urgent_count = 0
+    altitude_distribution: Dict[str, int] = {}
+
+    for pirep in pireps:
+        altitude = pirep.altitude
+        numeric_altitude = isinstance(altitude, (int, float))
+        if altitude_filter:
+            if not numeric_altitude:
+                continue
+            if altitude_min is not None and altitude < altitude_min:
+                continue
+            if altitude_max is not None and altitude > altitude_max:
+                continue
+
+        flags = pirep.hazard_flags
+        if flags & required != required or (any_of and not flags & any_of):
+            continue
+        if severity and not (severity_low <= pirep.turbulence_level <= severity_high
+                             or severity_low <= pirep.icing_level <= severity_high):
+            continue
+
+        kept.append(pirep)
+        # Group by the first part of the location (usually the airport code)
+        location = pirep.location
+        location_key = location.split()[0] if location and " " in location else location
+        grouped.setdefault(location_key, []).append(pirep)
+        if flags & Hazard.TURBULENCE:
+            turbulence_count += 1
+        if flags & Hazard.ICING:
+            icing_count += 1
+        if flags & Hazard.URGENT:
+            urgent_count += 1
+        if numeric_altitude:
+            band = _altitude_band(altitude)
+            altitude_distribution[band] = altitude_distribution.get(band, 0) + 1
+
+    stats = {
+        "total_count": len(kept),
+        "turbulence_count": turbulence_count,
+        "icing_count": icing_count,
+        "urgent_count": urgent_count,
+        "altitude_distribution": altitude_distribution,
+    }
+    return kept, grouped, stats
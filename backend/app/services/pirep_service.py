@@ -1,20 +1,38 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 import re
 from datetime import datetime
 
 from app.services.base_client import BaseApiClient
+from app.services.http_client import UpstreamClientRegistry
 from app.schemas.weather import PirepResponse
+from app.services.pirep_filter import apply_hazard_fields
+from app.services.cache import AsyncTTLCache, list_ttl, stale_window
+from app.core.config import settings
+from app.core.metrics import PARSER_DURATION, timed
 
 logger = logging.getLogger(__name__)
 
+# PIREP lists keyed by (station, distance, age); refreshed in the background once soft-expired
+pirep_cache = AsyncTTLCache("pirep", max_entries=1000)
+
 class PirepService(BaseApiClient):
     """Client for NOAA Aviation Weather Center PIREP API"""
     
-    def __init__(self):
-        super().__init__(base_url="https://aviationweather.gov")
+    def __init__(self, registry: Optional[UpstreamClientRegistry] = None):
+        super().__init__(base_url=settings.AWC_BASE_URL, registry=registry)
         
     async def get_pireps(self, station: str, distance: int = 200, age: float = 1.5) -> List[PirepResponse]:
+        """Get PIREPs, served from cache (stale-while-revalidate) when available"""
+        pireps, data_age = await pirep_cache.fetch(
+            (station.upper(), distance, age),
+            lambda: self._fetch_pireps(station, distance, age),
+            list_ttl(settings.PIREP_CACHE_SOFT_TTL),
+            stale_ttl=stale_window(settings.PIREP_CACHE_HARD_TTL - settings.PIREP_CACHE_SOFT_TTL)
+        )
+        return [pirep.model_copy(update={"data_age_seconds": round(data_age, 1)}) for pirep in pireps]
+    
+    async def _fetch_pireps(self, station: str, distance: int = 200, age: float = 1.5) -> List[PirepResponse]:
         """
         Get PIREP data from Aviation Weather Center API using the simplified endpoint
         
@@ -56,6 +74,45 @@ class PirepService(BaseApiClient):
                 raw_text=f"Error fetching PIREPs: {str(e)}"
             )]
     
+    async def _fetch_pireps_in_bbox(self, bbox: Tuple[float, float, float, float], age: float = 1.5) -> List[PirepResponse]:
+        """
+        Fetch the PIREPs inside a bounding box in a single upstream call
+        
+        The JSON format is used because, unlike the raw one, it carries each report's
+        position (in raw_data), so callers can filter the PIREPs by distance themselves.
+        
+        Args:
+            bbox: (min_lat, min_lon, max_lat, max_lon)
+            age: Age limit in hours (default: 1.5)
+        
+        Returns:
+            List of PirepResponse objects
+        """
+        params = {
+            "bbox": ",".join(f"{value:.3f}" for value in bbox),
+            "age": age,
+            "format": "json"
+        }
+        data = await self.get("/api/data/pirep", params=params)
+        if not isinstance(data, list):
+            data = []
+        
+        results = []
+        for record in data:
+            raw_text = str(record.get("rawOb") or "").strip()
+            if not raw_text:
+                continue
+            location = str(record.get("icaoId") or "")
+            # rawOb starts with the reporting location, as each line of the raw format does
+            first, _, report = raw_text.partition(" ")
+            if report and first not in ("UA", "UUA"):
+                location, raw_text = location or first, report
+            pirep = PirepResponse(source="AWC", location=location, raw_text=raw_text, raw_data=record)
+            self._extract_pirep_fields(pirep, raw_text)
+            results.append(pirep)
+        return results
+    
+    @timed(PARSER_DURATION, "pirep")
     def _parse_raw_pireps(self, raw_data: str) -> List[PirepResponse]:
         """Parse raw PIREP data from AWC into structured format"""
         results = []
@@ -214,3 +271,6 @@ class PirepService(BaseApiClient):
         rm_match = re.search(r'/RM\s+(.+)$', raw_text)
         if rm_match:
             pirep.remarks = rm_match.group(1).strip()
+        
+        # Numeric severity levels and hazard flags used by the cockpit filters
+        apply_hazard_fields(pirep)
@@ -0,0 +1,273 @@
+"""
+Provider failover and hedged requests
+
+Routes a weather product lookup to a primary provider (AWC) and falls back to a secondary
+provider (AVWX) when the primary's circuit breaker is open or its call fails. With hedging
+enabled, a primary call that has not answered within its observed p90 latency triggers the
+fallback call as well and whichever succeeds first wins.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.base_client import is_error_response
+
+logger = logging.getLogger(__name__)
+
+# Every router registers itself here so stats can be reported in one place
+_registered_routers: List["ProviderRouter"] = []
+
+Call = Tuple[str, Callable[[], Awaitable[Any]]]
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+class CircuitBreaker:
+    """
+    Error-rate and slow-call-rate circuit breaker over a rolling window of calls
+
+    Opens when either rate reaches its threshold (after a minimum number of calls), rejects
+    calls while open, then lets a single probe call through; the probe closes the breaker
+    if it succeeds quickly and re-opens it otherwise.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, window: Optional[int] = None, min_calls: Optional[int] = None,
+                 failure_rate: Optional[float] = None, slow_call_seconds: Optional[float] = None,
+                 slow_call_rate: Optional[float] = None, open_seconds: Optional[float] = None):
+        self.name = name
+        self.min_calls = min_calls if min_calls is not None else settings.BREAKER_MIN_CALLS
+        self.failure_rate = failure_rate if failure_rate is not None else settings.BREAKER_FAILURE_RATE
+        self.slow_call_seconds = slow_call_seconds if slow_call_seconds is not None else settings.BREAKER_SLOW_CALL_SECONDS
+        self.slow_call_rate = slow_call_rate if slow_call_rate is not None else settings.BREAKER_SLOW_CALL_RATE
+        self.open_seconds = open_seconds if open_seconds is not None else settings.BREAKER_OPEN_SECONDS
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window or settings.BREAKER_WINDOW)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may be made now (reserves the probe slot when half-open)"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def release(self) -> None:
+        """Give back the probe slot of a call that ended without an outcome (e.g. was cancelled)"""
+        if self._state == self.HALF_OPEN:
+            self._probing = False
+
+    def record(self, success: bool, latency: float) -> None:
+        slow = latency >= self.slow_call_seconds
+        if self._state == self.HALF_OPEN:
+            self._probing = False
+            if success and not slow:
+                self._state = self.CLOSED
+                self._outcomes.clear()
+                logger.info(f"Circuit breaker {self.name} closed")
+            else:
+                self._trip()
+            return
+        if self._state == self.OPEN:
+            # Late result of a call started before the breaker opened
+            return
+
+        self._outcomes.append((not success, slow))
+        if len(self._outcomes) < self.min_calls:
+            return
+        failures = sum(1 for failed, _ in self._outcomes if failed) / len(self._outcomes)
+        slow_calls = sum(1 for _, was_slow in self._outcomes if was_slow) / len(self._outcomes)
+        if failures >= self.failure_rate or slow_calls >= self.slow_call_rate:
+            self._trip()
+
+    def _trip(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.trips += 1
+        logger.warning(f"Circuit breaker {self.name} opened for {self.open_seconds}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "window_calls": len(self._outcomes),
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+class ProviderHealth:
+    """Breaker, latency window and counters for one provider of one product"""
+
+    def __init__(self, name: str):
+        self.breaker = CircuitBreaker(name)
+        self.latency = LatencyTracker()
+        self.calls = 0
+        self.failures = 0
+
+    def stats(self) -> Dict[str, Any]:
+        p90 = self.latency.percentile(90)
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "p90_latency_ms": round(p90 * 1000, 1) if p90 is not None else None,
+            "breaker": self.breaker.stats(),
+        }
+
+class ProviderRouter:
+    """Primary/fallback routing with circuit breakers and hedging for one product"""
+
+    def __init__(self, product: str, is_failure: Callable[[Any], bool] = is_error_response):
+        self.product = product
+        self.is_failure = is_failure
+        self._health: Dict[str, ProviderHealth] = {}
+        self.short_circuits = 0
+        self.failovers = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        _registered_routers.append(self)
+
+    def health(self, provider: str) -> ProviderHealth:
+        if provider not in self._health:
+            self._health[provider] = ProviderHealth(f"{self.product}:{provider}")
+        return self._health[provider]
+
+    def hedge_delay(self, provider: str) -> float:
+        """Seconds to wait on the provider before hedging: its observed p90, clamped"""
+        latency = self.health(provider).latency
+        observed = latency.percentile(settings.HEDGE_LATENCY_PERCENTILE) if len(latency) >= settings.BREAKER_MIN_CALLS else None
+        if observed is None:
+            return settings.HEDGE_MAX_DELAY
+        return max(settings.HEDGE_MIN_DELAY, min(settings.HEDGE_MAX_DELAY, observed))
+
+    async def _attempt(self, call: Call) -> Tuple[Any, Optional[BaseException]]:
+        """Run one provider call, recording its outcome; never raises"""
+        provider, fn = call
+        health = self.health(provider)
+        health.calls += 1
+        started = time.monotonic()
+        result, error = None, None
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            # No outcome to record, but a half-open breaker must not wait forever for it
+            health.breaker.release()
+            raise
+        except Exception as e:
+            error = e
+        elapsed = time.monotonic() - started
+
+        success = error is None and not self.is_failure(result)
+        health.breaker.record(success, elapsed)
+        if success:
+            health.latency.record(elapsed)
+        else:
+            health.failures += 1
+        return result, error
+
+    def _succeeded(self, outcome: Tuple[Any, Optional[BaseException]]) -> bool:
+        result, error = outcome
+        return error is None and not self.is_failure(result)
+
+    @staticmethod
+    def _unwrap(outcome: Tuple[Any, Optional[BaseException]]) -> Any:
+        result, error = outcome
+        if error is not None:
+            raise error
+        return result
+
+    async def call(self, primary: Call, fallback: Optional[Call] = None) -> Any:
+        """
+        Call the primary provider, failing over or hedging to the fallback as needed
+
+        Args:
+            primary: (provider name, zero-argument coroutine factory)
+            fallback: Optional (provider name, coroutine factory) used on failure or slowness
+
+        Returns:
+            The first successful result, or the primary's (error) result if both fail
+        """
+        if fallback is None or not settings.PROVIDER_FAILOVER_ENABLED:
+            return self._unwrap(await self._attempt(primary))
+
+        fallback_breaker = self.health(fallback[0]).breaker
+        if not self.health(primary[0]).breaker.allow():
+            self.short_circuits += 1
+            return self._unwrap(await self._attempt(fallback))
+
+        primary_task = asyncio.ensure_future(self._attempt(primary))
+        delay = self.hedge_delay(primary[0]) if settings.PROVIDER_HEDGING_ENABLED else None
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+
+        if done:
+            outcome = primary_task.result()
+            if self._succeeded(outcome) or not fallback_breaker.allow():
+                return self._unwrap(outcome)
+            self.failovers += 1
+            fallback_outcome = await self._attempt(fallback)
+            return self._unwrap(fallback_outcome if self._succeeded(fallback_outcome) else outcome)
+
+        if not fallback_breaker.allow():
+            return self._unwrap(await primary_task)
+
+        # Primary is slower than usual: race it against the fallback. The loser keeps running
+        # so its outcome still feeds the breakers (and the AWC result still fills the cache).
+        self.hedges += 1
+        fallback_task = asyncio.ensure_future(self._attempt(fallback))
+        pending = {primary_task, fallback_task}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if self._succeeded(task.result()):
+                    if task is fallback_task:
+                        self.hedge_wins += 1
+                    return self._unwrap(task.result())
+        return self._unwrap(primary_task.result())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "short_circuits": self.short_circuits,
+            "failovers": self.failovers,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "providers": {name: health.stats() for name, health in self._health.items()},
+        }
+
+def all_router_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every registered router keyed by product"""
+    return {router.product: router.stats() for router in _registered_routers}
@@ -0,0 +1,275 @@
+"""
+Per-host upstream rate limiting and adaptive concurrency
+
+Each upstream host gets a token bucket (requests per second with a burst allowance) and an
+AIMD concurrency limit: the limit is halved on 429s, 5xx responses, connection errors, timeouts
+and latency spikes, and grows back by roughly one slot per limit's worth of successful calls.
+Requests the caller cancels (a lost hedge, a batch deadline, a client disconnect) say nothing
+about the host and just give their slot back.
+Requests that cannot start immediately wait in a priority queue, so interactive lookups
+overtake background refreshes.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# Priority of upstream calls made from the current task (background jobs lower it)
+upstream_priority: ContextVar[int] = ContextVar("upstream_priority", default=PRIORITY_INTERACTIVE)
+
+class UpstreamThrottled(Exception):
+    """Raised when a request waited longer than the queue timeout for an upstream slot"""
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at rate tokens per second"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.tokens >= 1 or self.rate <= 0:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for the given time (e.g. honouring Retry-After)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+class Permit:
+    """A granted upstream slot; the caller records the response status on it"""
+
+    __slots__ = ("status", "retry_after")
+
+    def __init__(self):
+        self.status: Optional[int] = None
+        self.retry_after: Optional[float] = None
+
+class AdaptiveLimiter:
+    """Token bucket plus AIMD concurrency limit with a priority wait queue for one host"""
+
+    def __init__(self, host: str, rate: Optional[float] = None, burst: Optional[float] = None,
+                 initial_limit: Optional[int] = None, min_limit: Optional[int] = None,
+                 max_limit: Optional[int] = None, latency_spike: Optional[float] = None,
+                 queue_timeout: Optional[float] = None):
+        self.host = host
+        self.bucket = TokenBucket(
+            rate if rate is not None else settings.UPSTREAM_RATE_LIMIT_RPS,
+            burst if burst is not None else settings.UPSTREAM_RATE_LIMIT_BURST
+        )
+        self.min_limit = min_limit if min_limit is not None else settings.UPSTREAM_CONCURRENCY_MIN
+        self.max_limit = max_limit if max_limit is not None else settings.UPSTREAM_CONCURRENCY_MAX
+        self.limit = float(initial_limit if initial_limit is not None else settings.UPSTREAM_CONCURRENCY_INITIAL)
+        self.latency_spike = latency_spike if latency_spike is not None else settings.UPSTREAM_LATENCY_SPIKE_SECONDS
+        self.queue_timeout = queue_timeout if queue_timeout is not None else settings.UPSTREAM_QUEUE_TIMEOUT
+        self.inflight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._last_decrease = 0.0
+        self.acquired = 0
+        self.queued = 0
+        self.timeouts = 0
+        self.throttled = 0
+        self.decreases = 0
+        self.cancelled = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+        self.max_queue_depth = 0
+
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    def _can_start(self) -> bool:
+        return self.inflight < max(self.min_limit, int(self.limit)) and self.bucket.delay() == 0
+
+    def _grant(self) -> None:
+        self.inflight += 1
+        self.acquired += 1
+        self.bucket.take()
+
+    def _dispatch(self) -> None:
+        """Start as many queued waiters as the concurrency limit and token bucket allow"""
+        self._wakeup = None
+        while self._waiters:
+            if self._waiters[0][2].done():
+                # Cancelled or timed out while queued
+                heapq.heappop(self._waiters)
+                continue
+            if self.inflight >= max(self.min_limit, int(self.limit)):
+                return
+            delay = self.bucket.delay()
+            if delay > 0:
+                if self._wakeup is None:
+                    self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            _, _, waiter = heapq.heappop(self._waiters)
+            self._grant()
+            waiter.set_result(None)
+
+    async def acquire(self, priority: Optional[int] = None) -> None:
+        """Wait for a slot, queueing behind higher-priority (lower value) requests"""
+        if not self._waiters and self._can_start():
+            self._grant()
+            return
+
+        priority = upstream_priority.get() if priority is None else priority
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth())
+        started = time.monotonic()
+        self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            granted = waiter.done() and not waiter.cancelled()
+            if granted and isinstance(e, asyncio.TimeoutError):
+                # The slot arrived just as the timeout fired: use it
+                return
+            if granted:
+                # Cancelled just after being granted: give the slot back
+                self.release_unused()
+            else:
+                waiter.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts += 1
+                raise UpstreamThrottled(f"Timed out after {self.queue_timeout}s waiting for an upstream slot for {self.host}")
+            raise
+        finally:
+            waited = time.monotonic() - started
+            self.wait_seconds_total += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def release_unused(self) -> None:
+        """Return a slot that was never used for a request"""
+        self.inflight -= 1
+        self._dispatch()
+
+    def release(self, status: Optional[int], latency: float, retry_after: Optional[float] = None,
+                failed: bool = False) -> None:
+        """
+        Return a slot and adapt the concurrency limit to the outcome
+
+        Args:
+            status: HTTP status of the response, or None if there was none
+            latency: Seconds the request took
+            retry_after: Seconds from a Retry-After header, if any
+            failed: The request got no response because of a connection error or timeout
+        """
+        self.inflight -= 1
+        overloaded = (failed or status == 429 or (status is not None and status >= 500)
+                      or latency >= self.latency_spike)
+        if status == 429:
+            self.throttled += 1
+            self.bucket.pause(retry_after if retry_after is not None else 1.0 / max(self.bucket.rate, 0.1))
+
+        now = time.monotonic()
+        if overloaded:
+            # Multiplicative decrease, at most once per latency-spike interval so one burst
+            # of failures does not collapse the limit to the floor
+            if now - self._last_decrease >= self.latency_spike:
+                self.limit = max(float(self.min_limit), self.limit / 2)
+                self._last_decrease = now
+                self.decreases += 1
+                logger.warning(f"Upstream {self.host} overloaded (status={status}, {latency:.2f}s); concurrency limit now {int(self.limit)}")
+        else:
+            # Additive increase: about one extra slot per limit's worth of successes
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[int] = None) -> AsyncIterator[Permit]:
+        """Hold a slot for one upstream request; set permit.status before leaving"""
+        await self.acquire(priority)
+        permit = Permit()
+        started = time.monotonic()
+        try:
+            yield permit
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            self.release_unused()
+            raise
+        except Exception as e:
+            failed = permit.status is None and isinstance(e, (aiohttp.ClientConnectionError, asyncio.TimeoutError, OSError))
+            self.release(permit.status, time.monotonic() - started, permit.retry_after, failed=failed)
+            raise
+        else:
+            self.release(permit.status, time.monotonic() - started, permit.retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency_limit": int(self.limit),
+            "inflight": self.inflight,
+            "queue_depth": self.queue_depth(),
+            "max_queue_depth": self.max_queue_depth,
+            "acquired": self.acquired,
+            "queued": self.queued,
+            "queue_timeouts": self.timeouts,
+            "throttled_429": self.throttled,
+            "limit_decreases": self.decreases,
+            "cancelled": self.cancelled,
+            "wait_seconds_total": round(self.wait_seconds_total, 3),
+            "max_wait_seconds": round(self.max_wait_seconds, 3),
+            "tokens": round(self.bucket.tokens, 2),
+        }
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header given in delta-seconds form"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+class RateLimiterRegistry:
+    """One AdaptiveLimiter per upstream host"""
+
+    def __init__(self):
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+
+    def get(self, url: str) -> AdaptiveLimiter:
+        host = urlsplit(url).netloc.lower() or url
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            limiter = AdaptiveLimiter(host)
+            self._limiters[host] = limiter
+        return limiter
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {host: limiter.stats() for host, limiter in self._limiters.items()}
+
+# Process-wide limiters shared by every upstream client
+rate_limiters = RateLimiterRegistry()
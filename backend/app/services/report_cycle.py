@@ -0,0 +1,76 @@
+"""
+Report issuance cycles
+
+Derives how long a METAR or TAF stays current from its observation/issue time and the
+expected next routine issuance, so caches expire when a newer report is likely to exist.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+# Routine METARs are issued hourly; TAFs four times a day (00, 06, 12, 18Z)
+METAR_CYCLE = timedelta(hours=1)
+TAF_CYCLE = timedelta(hours=6)
+
+def _as_utc(value: Any) -> Optional[datetime]:
+    """Coerce a datetime, ISO string or epoch seconds into an aware UTC datetime"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    if isinstance(value, str):
+        try:
+            return _as_utc(datetime.fromisoformat(value.replace('Z', '+00:00')))
+        except ValueError:
+            return None
+    return None
+
+def _clamp(seconds: float, min_ttl: float, max_ttl: float) -> float:
+    return max(min_ttl, min(max_ttl, seconds))
+
+def next_issuance(issued_at: datetime, cycle: timedelta, grace: float) -> datetime:
+    """Time at which the report following one issued at issued_at should be available"""
+    return issued_at + cycle + timedelta(seconds=grace)
+
+def metar_observation_time(parsed_metar: Optional[Dict[str, Any]], raw_data: Any = None) -> Optional[datetime]:
+    """Observation time from the parsed METAR, falling back to the AWC obsTime field"""
+    time_info = (parsed_metar or {}).get("time") or {}
+    observed = _as_utc(time_info.get("datetime")) if isinstance(time_info, dict) else None
+    if observed is None and isinstance(raw_data, dict):
+        observed = _as_utc(raw_data.get("obsTime") or raw_data.get("reportTime"))
+    return observed
+
+def metar_ttl(parsed_metar: Optional[Dict[str, Any]], raw_data: Any = None,
+              now: Optional[datetime] = None) -> float:
+    """
+    Seconds a METAR stays current in cache
+
+    Expires a few minutes after the next routine hourly observation is due. The upper
+    bound keeps SPECIs (issued at any time) from being hidden for a whole cycle, and once
+    the next report is overdue the cache falls back to the minimum TTL.
+    """
+    now = now or datetime.now(timezone.utc)
+    observed = metar_observation_time(parsed_metar, raw_data)
+    if observed is None:
+        return settings.METAR_CACHE_MIN_TTL
+
+    expected = next_issuance(observed, METAR_CYCLE, settings.METAR_PUBLISH_GRACE)
+    return _clamp((expected - now).total_seconds(), settings.METAR_CACHE_MIN_TTL, settings.METAR_CACHE_MAX_TTL)
+
+def taf_ttl(issue_time: Optional[datetime], now: Optional[datetime] = None) -> float:
+    """
+    Seconds a TAF stays current in cache
+
+    Expires shortly after the next six-hourly routine TAF is due, capped so that
+    amendments (TAF AMD) are picked up within the maximum TTL.
+    """
+    now = now or datetime.now(timezone.utc)
+    issued = _as_utc(issue_time)
+    if issued is None:
+        return settings.TAF_CACHE_MIN_TTL
+
+    expected = next_issuance(issued, TAF_CYCLE, settings.TAF_PUBLISH_GRACE)
+    return _clamp((expected - now).total_seconds(), settings.TAF_CACHE_MIN_TTL, settings.TAF_CACHE_MAX_TTL)
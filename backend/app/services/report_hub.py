@@ -0,0 +1,305 @@
+"""
+Push subscriptions for new METAR/SPECI, TAF amendments and urgent PIREPs
+
+Clients subscribe to a list of stations and receive an event only when something new appears
+for one of them. A single poller serves every subscription: each REPORT_PUSH_POLL_INTERVAL
+seconds it fetches the METARs and TAFs of all subscribed stations straight from upstream in
+batch requests (conditional GETs make unchanged ones cheap), so a SPECI or TAF amendment is
+not held back by the report caches, which it refreshes on the way. PIREPs come from a single
+bounding-box query around every station with a known position, filtered by distance locally.
+Everything is fetched at background upstream priority, and the upstream traffic depends on
+the number of distinct stations, not on the number of clients.
+
+Each event is encoded once and put on the queue of every subscriber of its station. A
+subscriber that falls more than REPORT_PUSH_QUEUE_SIZE events behind loses its oldest events,
+which newer reports of the same station supersede anyway. A new subscriber first receives the
+latest known reports of its stations.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.schemas.weather import MetarResponse, PirepResponse, TafResponse
+from app.services import json_codec
+from app.services.base_client import is_error_response, normalize_station_ids
+from app.services.geo import LatLon, bbox_around, haversine_nm, report_position
+from app.services.http_client import client_registry
+from app.services.metar_service import AWCMetarService
+from app.services.pirep_filter import Hazard
+from app.services.pirep_service import PirepService
+from app.services.rate_limit import PRIORITY_BACKGROUND, upstream_priority
+from app.services.taf_service import AWCTafService
+
+logger = logging.getLogger(__name__)
+
+REPORT_KINDS = ("metar", "taf", "pirep")
+
+class ReportEvent(NamedTuple):
+    """An event for the subscribers of a station, with its JSON payload already encoded"""
+    event: str
+    station: str
+    data: str
+
+def _event(kind: str, station: str, report: Any, **fields: Any) -> ReportEvent:
+    payload = {"station": station, **fields, "report": report}
+    return ReportEvent(kind, station, json_codec.dumps(payload).decode())
+
+def metar_kind(metar: MetarResponse) -> str:
+    """METAR or SPECI (an unscheduled observation)"""
+    raw_data = metar.raw_data if isinstance(metar.raw_data, dict) else {}
+    if raw_data.get("metarType") == "SPECI" or (metar.raw_text or "").startswith("SPECI"):
+        return "SPECI"
+    return "METAR"
+
+def is_taf_amendment(taf: TafResponse) -> bool:
+    return " AMD " in f" {taf.raw_text or ''} "
+
+def is_urgent_pirep(pirep: PirepResponse) -> bool:
+    return pirep.report_type == "UUA" or bool(pirep.hazard_flags & Hazard.URGENT)
+
+class Subscription:
+    """One client's stations, report kinds and pending events"""
+
+    def __init__(self, stations: Iterable[str], kinds: Iterable[str], queue_size: int):
+        self.stations: FrozenSet[str] = frozenset(stations)
+        self.kinds: FrozenSet[str] = frozenset(kinds)
+        self.queue: "asyncio.Queue[ReportEvent]" = asyncio.Queue(maxsize=max(1, queue_size))
+        self.dropped = 0
+
+    def deliver(self, event: ReportEvent) -> bool:
+        """Queue the event if the subscriber wants its kind"""
+        if event.event not in self.kinds:
+            return False
+        if self.queue.full():
+            # Newer reports supersede the oldest pending ones
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+        return True
+
+class ReportHub:
+    """Single poller fanning out new reports of the subscribed stations to every subscriber"""
+
+    def __init__(self, interval: Optional[float] = None, pirep_distance: Optional[int] = None,
+                 queue_size: Optional[int] = None, max_subscribers: Optional[int] = None,
+                 metar_service: Optional[AWCMetarService] = None, taf_service: Optional[AWCTafService] = None,
+                 pirep_service: Optional[PirepService] = None):
+        self.interval = interval if interval is not None else settings.REPORT_PUSH_POLL_INTERVAL
+        self.pirep_distance = pirep_distance if pirep_distance is not None else settings.REPORT_PUSH_PIREP_DISTANCE
+        self.queue_size = queue_size if queue_size is not None else settings.REPORT_PUSH_QUEUE_SIZE
+        self.max_subscribers = max_subscribers if max_subscribers is not None else settings.REPORT_PUSH_MAX_SUBSCRIBERS
+        self.metar_service = metar_service or AWCMetarService(registry=client_registry)
+        self.taf_service = taf_service or AWCTafService(registry=client_registry)
+        self.pirep_service = pirep_service or PirepService(registry=client_registry)
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        # (raw text, event) of the latest METAR/TAF per (kind, station), and events of the
+        # urgent PIREPs currently reported near each station by raw text
+        self._latest: Dict[Tuple[str, str], Tuple[str, ReportEvent]] = {}
+        self._urgent: Dict[str, Dict[str, ReportEvent]] = {}
+        # Station positions from their METARs, for the PIREP query
+        self._positions: Dict[str, LatLon] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.subscriptions = 0
+        self.polls = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.published = 0
+        self.delivered = 0
+
+    @property
+    def stations(self) -> List[str]:
+        return sorted(self._subscribers)
+
+    def is_full(self) -> bool:
+        return self.max_subscribers > 0 and self.subscriptions >= self.max_subscribers
+
+    def subscribe(self, stations: Iterable[str], kinds: Iterable[str] = REPORT_KINDS) -> Subscription:
+        """Register a subscriber, queue the latest known reports of its stations and start polling"""
+        subscription = Subscription(normalize_station_ids(stations), kinds, self.queue_size)
+        new_stations = False
+        for station in subscription.stations:
+            if station not in self._subscribers:
+                self._subscribers[station] = set()
+                new_stations = True
+            self._subscribers[station].add(subscription)
+            for kind in ("metar", "taf"):
+                latest = self._latest.get((kind, station))
+                if latest is not None:
+                    subscription.deliver(latest[1])
+            for event in self._urgent.get(station, {}).values():
+                subscription.deliver(event)
+        self.subscriptions += 1
+        if new_stations:
+            # Poll now rather than at the end of the current interval
+            self._wakeup.set()
+        self.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber; stations nobody subscribes to any more are no longer polled"""
+        self.subscriptions -= 1
+        for station in subscription.stations:
+            subscribers = self._subscribers.get(station)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[station]
+                self._latest.pop(("metar", station), None)
+                self._latest.pop(("taf", station), None)
+                self._urgent.pop(station, None)
+                self._positions.pop(station, None)
+
+    def _publish(self, event: ReportEvent) -> None:
+        self.published += 1
+        for subscription in self._subscribers.get(event.station, ()):
+            if subscription.deliver(event):
+                self.delivered += 1
+
+    def _update_latest(self, kind: str, station: str, report: Any, **fields: Any) -> None:
+        """Publish the report if it differs from the last one seen for the station"""
+        if report is None or is_error_response(report) or not report.raw_text:
+            return
+        previous = self._latest.get((kind, station))
+        if previous is not None and previous[0] == report.raw_text:
+            return
+        event = _event(kind, station, report, **fields)
+        self._latest[(kind, station)] = (report.raw_text, event)
+        self._publish(event)
+
+    def _update_urgent(self, station: str, pireps: List[PirepResponse]) -> None:
+        """Publish urgent PIREPs not seen before near the station (forgets those no longer reported)"""
+        known = self._urgent.get(station, {})
+        current: Dict[str, ReportEvent] = {}
+        for pirep in pireps:
+            if not pirep.raw_text or not is_urgent_pirep(pirep) or pirep.raw_text in current:
+                continue
+            event = known.get(pirep.raw_text)
+            if event is None:
+                event = _event("pirep", station, pirep)
+                self._publish(event)
+            current[pirep.raw_text] = event
+        self._urgent[station] = current
+
+    async def _fetch(self, stations: List[str]) -> Tuple[Any, Any, Any]:
+        """
+        METARs and TAFs of the stations from upstream, then the PIREPs around the stations
+        whose position is known (exceptions in place of failed fetches)
+        """
+        metars, tafs = await asyncio.gather(
+            self.metar_service._load_metar_batch(stations, 1),
+            self.taf_service._load_taf_batch(stations, 6),
+            return_exceptions=True
+        )
+        if isinstance(metars, dict):
+            for station, metar in metars.items():
+                position = report_position(metar.raw_data)
+                if position is not None:
+                    self._positions[station] = position
+        positions = [self._positions[station] for station in stations if station in self._positions]
+        pireps: Any = []
+        if positions:
+            try:
+                pireps = await self.pirep_service._fetch_pireps_in_bbox(bbox_around(positions, self.pirep_distance))
+            except Exception as e:
+                pireps = e
+        return metars, tafs, pireps
+
+    def _pireps_near(self, station: str, pireps: List[PirepResponse]) -> List[PirepResponse]:
+        lat, lon = self._positions[station]
+        nearby = []
+        for pirep in pireps:
+            position = report_position(pirep.raw_data)
+            if position is not None and haversine_nm(lat, lon, *position) <= self.pirep_distance:
+                nearby.append(pirep)
+        return nearby
+
+    async def poll_once(self) -> int:
+        """
+        Fetch the subscribed stations once and publish what is new
+
+        Returns:
+            Number of events published
+        """
+        stations = self.stations
+        if not stations:
+            return 0
+        published = self.published
+
+        token = upstream_priority.set(PRIORITY_BACKGROUND)
+        try:
+            metars, tafs, pireps = await self._fetch(stations)
+        finally:
+            upstream_priority.reset(token)
+
+        for kind, result in (("metar", metars), ("taf", tafs)):
+            if isinstance(result, Exception):
+                logger.warning(f"Report push could not fetch {kind.upper()}s: {str(result)}")
+                continue
+            for station, report in result.items():
+                # Subscribers may have left while the fetch was running
+                if station not in self._subscribers:
+                    continue
+                if kind == "metar":
+                    self._update_latest(kind, station, report, type=metar_kind(report))
+                else:
+                    self._update_latest(kind, station, report, amendment=is_taf_amendment(report))
+        if isinstance(pireps, Exception):
+            logger.warning(f"Report push could not fetch PIREPs: {str(pireps)}")
+        else:
+            for station in stations:
+                if station in self._subscribers and station in self._positions:
+                    self._update_urgent(station, self._pireps_near(station, pireps))
+        return self.published - published
+
+    async def run(self) -> None:
+        """Poll while there are subscribers, waking early when new stations are subscribed"""
+        while True:
+            if not self._subscribers:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            self._wakeup.clear()
+            self.polls += 1
+            try:
+                await self.poll_once()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.error(f"Report push poll failed: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": self.subscriptions,
+            "stations": len(self._subscribers),
+            "polls": self.polls,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": sum(subscription.dropped for subscription in set().union(*self._subscribers.values())),
+        }
+
+# Process-wide hub; its poller starts with the first subscription
+report_hub = ReportHub()
@@ -3,18 +3,46 @@ import logging
 from datetime import datetime
 
 from app.services.base_client import BaseApiClient
+from app.services.http_client import UpstreamClientRegistry
 from app.schemas.weather import SigmetResponse, AirmetResponse
 from app.core.config import settings
+from app.services.cache import AsyncTTLCache, list_ttl, stale_window
+from app.services.provider_router import ProviderRouter
 
 logger = logging.getLogger(__name__)
 
+# AWC airsigmet lists keyed by (product, region); refreshed in the background once soft-expired
+airsigmet_cache = AsyncTTLCache("airsigmet", max_entries=100)
+
+# Health of the AWC and AVWX SIGMET providers, shared by every request
+sigmet_router = ProviderRouter("sigmet")
+
 class AWCSigmetService(BaseApiClient):
     """Client for NOAA Aviation Weather Center SIGMET API"""
     
-    def __init__(self):
-        super().__init__(base_url="https://aviationweather.gov")
+    def __init__(self, registry: Optional[UpstreamClientRegistry] = None):
+        super().__init__(base_url=settings.AWC_BASE_URL, registry=registry)
         
     async def get_sigmets(self, region: str = "all") -> List[SigmetResponse]:
+        """Get SIGMETs, served from cache (stale-while-revalidate) when available"""
+        sigmets, age = await airsigmet_cache.fetch(
+            ("sigmet", region),
+            lambda: self._fetch_sigmets(region),
+            list_ttl(settings.SIGMET_CACHE_SOFT_TTL),
+            stale_ttl=stale_window(settings.SIGMET_CACHE_HARD_TTL - settings.SIGMET_CACHE_SOFT_TTL)
+        )
+        return [sigmet.model_copy(update={"data_age_seconds": round(age, 1)}) for sigmet in sigmets]
+    
+    async def _load_sigmets(self, region: str = "all") -> List[SigmetResponse]:
+        """Fetch SIGMETs from AWC and store them in the cache"""
+        sigmets = await self._fetch_sigmets(region)
+        ttl = list_ttl(settings.SIGMET_CACHE_SOFT_TTL)(sigmets)
+        if ttl:
+            airsigmet_cache.set(("sigmet", region), sigmets, ttl,
+                                stale_window(settings.SIGMET_CACHE_HARD_TTL - settings.SIGMET_CACHE_SOFT_TTL))
+        return sigmets
+    
+    async def _fetch_sigmets(self, region: str = "all") -> List[SigmetResponse]:
         """Get SIGMET data from Aviation Weather Center API"""
         try:
             endpoint = "/data/api/airsigmet"
@@ -79,10 +107,20 @@ class AWCSigmetService(BaseApiClient):
 class AWCAirmetService(BaseApiClient):
     """Client for NOAA Aviation Weather Center AIRMET API"""
     
-    def __init__(self):
-        super().__init__(base_url="https://aviationweather.gov")
+    def __init__(self, registry: Optional[UpstreamClientRegistry] = None):
+        super().__init__(base_url=settings.AWC_BASE_URL, registry=registry)
         
     async def get_airmets(self, region: str = "all") -> List[AirmetResponse]:
+        """Get AIRMETs, served from cache (stale-while-revalidate) when available"""
+        airmets, age = await airsigmet_cache.fetch(
+            ("airmet", region),
+            lambda: self._fetch_airmets(region),
+            list_ttl(settings.SIGMET_CACHE_SOFT_TTL),
+            stale_ttl=stale_window(settings.SIGMET_CACHE_HARD_TTL - settings.SIGMET_CACHE_SOFT_TTL)
+        )
+        return [airmet.model_copy(update={"data_age_seconds": round(age, 1)}) for airmet in airmets]
+    
+    async def _fetch_airmets(self, region: str = "all") -> List[AirmetResponse]:
         """Get AIRMET data from Aviation Weather Center API"""
         try:
             endpoint = "/data/api/airsigmet"
@@ -147,10 +185,11 @@ class AWCAirmetService(BaseApiClient):
 class AVWXSigmetService(BaseApiClient):
     """Client for AVWX SIGMET API"""
     
-    def __init__(self):
+    def __init__(self, registry: Optional[UpstreamClientRegistry] = None):
         super().__init__(
-            base_url="https://avwx.rest/api", 
-            api_key=settings.AVWX_API_KEY
+            base_url=settings.AVWX_BASE_URL, 
+            api_key=settings.AVWX_API_KEY,
+            registry=registry
         )
         
     async def get_sigmets(self) -> List[SigmetResponse]:
@@ -217,10 +256,11 @@ class AVWXSigmetService(BaseApiClient):
 class AVWXAirmetService(BaseApiClient):
     """Client for AVWX AIRMET API"""
     
-    def __init__(self):
+    def __init__(self, registry: Optional[UpstreamClientRegistry] = None):
         super().__init__(
-            base_url="https://avwx.rest/api", 
-            api_key=settings.AVWX_API_KEY
+            base_url=settings.AVWX_BASE_URL, 
+            api_key=settings.AVWX_API_KEY,
+            registry=registry
         )
         
     async def get_airmets(self) -> List[AirmetResponse]:
@@ -283,3 +323,38 @@ class AVWXAirmetService(BaseApiClient):
                 id="error",
                 raw_text=f"Error fetching AIRMET: {str(e)}"
             )]
+
+class FailoverSigmetService:
+    """SIGMETs from AWC, failing over (or hedging) to AVWX when AWC is failing or slow"""
+    
+    def __init__(self, registry: Optional[UpstreamClientRegistry] = None, router: Optional[ProviderRouter] = None):
+        self.awc = AWCSigmetService(registry=registry)
+        self.avwx = AVWXSigmetService(registry=registry)
+        self.router = router or sigmet_router
+        
+    async def get_sigmets(self, region: str = "all", source: str = "auto") -> List[SigmetResponse]:
+        """
+        Get SIGMET data from the requested provider
+        
+        Args:
+            region: AWC region filter (AVWX always returns all SIGMETs)
+            source: "awc", "avwx" or "auto" (AWC with AVWX failover)
+            
+        Returns:
+            List of SigmetResponse objects from whichever provider answered
+        """
+        if source == "awc":
+            return await self.awc.get_sigmets(region)
+        if source == "avwx":
+            return await self.avwx.get_sigmets()
+        
+        # AVWX is only usable as a fallback when an API key is configured
+        fallback = ("AVWX", self.avwx.get_sigmets) if settings.AVWX_API_KEY else None
+        # Only cache misses and refreshes are routed, so the router measures upstream calls alone.
+        # The AWC loader caches its own result (even after losing a hedge); AVWX's is not cached.
+        sigmets, age = await airsigmet_cache.fetch(
+            ("sigmet", region),
+            lambda: self.router.call(("AWC", lambda: self.awc._load_sigmets(region)), fallback),
+            lambda sigmets: None
+        )
+        return [sigmet.model_copy(update={"data_age_seconds": round(age, 1)}) for sigmet in sigmets]
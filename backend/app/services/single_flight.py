@@ -0,0 +1,71 @@
+"""
+Single-flight request coalescing
+
+Concurrent callers asking for the same key share one in-flight awaitable and its result
+instead of each issuing an identical upstream call.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Deduplicates concurrent calls that share a key"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.coalesced_by_label: Dict[str, int] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], label: Optional[str] = None) -> Any:
+        """
+        Run fn() for key, or join the call already in flight for the same key
+
+        Args:
+            key: Hashable identity of the call
+            fn: Zero-argument coroutine factory performing the actual work
+            label: Optional name (e.g. endpoint path) to break coalescing counters down by
+
+        Returns:
+            The shared result (exceptions are propagated to every waiter)
+        """
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            if label:
+                self.coalesced_by_label[label] = self.coalesced_by_label.get(label, 0) + 1
+        else:
+            self.executed += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+
+        # Shield the shared task so one cancelled caller does not cancel it for everyone
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        """Forget a completed call and mark its exception as retrieved"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Coalesced call for {key!r} failed: {task.exception()}")
+
+    def is_inflight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def inflight_count(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters describing how many calls were coalesced"""
+        return {
+            "calls": self.calls,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+            "coalesced_by_label": dict(self.coalesced_by_label),
+        }
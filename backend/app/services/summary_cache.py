@@ -0,0 +1,213 @@
+"""
+Content-addressed cache for AI summaries
+
+A summary depends only on the report type, the prompt version, the model and the raw report
+text, so it is cached under a SHA-256 of those inputs. Lookups go through an in-memory LRU
+(which also coalesces concurrent identical requests into one LLM call) and then a SQLite
+file, so summaries survive restarts. Entries live as long as the report they describe is
+valid, capped by SUMMARY_CACHE_MAX_TTL.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.cache import AsyncTTLCache
+
+logger = logging.getLogger(__name__)
+
+def summary_key(kind: str, prompt_version: str, model: str, raw_text: str) -> str:
+    """Content address of a summary"""
+    digest = hashlib.sha256()
+    for part in (kind, prompt_version, model, raw_text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return None
+
+def summary_ttl(report_data: Optional[Dict[str, Any]] = None) -> float:
+    """
+    Seconds a summary stays cached: until the report's valid_to when it has one (TAF, SIGMET),
+    otherwise SUMMARY_CACHE_DEFAULT_TTL, never more than SUMMARY_CACHE_MAX_TTL
+    """
+    ttl = settings.SUMMARY_CACHE_DEFAULT_TTL
+    valid_to = _parse_time((report_data or {}).get("valid_to"))
+    if valid_to is not None:
+        ttl = (valid_to - datetime.now(timezone.utc)).total_seconds()
+    return max(0.0, min(ttl, settings.SUMMARY_CACHE_MAX_TTL))
+
+class SqliteSummaryStore:
+    """Persistent tier: one table of JSON-encoded summaries with wall-clock expiry"""
+
+    # Delete expired rows every this many writes
+    PRUNE_EVERY = 200
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "key TEXT PRIMARY KEY, kind TEXT NOT NULL, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """(value, seconds left) for an unexpired entry"""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, expires_at FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        remaining = row[1] - time.time()
+        if remaining <= 0:
+            return None
+        return json.loads(row[0]), remaining
+
+    def set(self, key: str, kind: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, kind, value, created_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(value), now, now + ttl)
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM summaries WHERE expires_at <= ?", (now,))
+            conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+class SummaryCache:
+    """Memory LRU in front of an optional SQLite store, with single-flight generation"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.memory = AsyncTTLCache(
+            "summary", max_entries=max_entries if max_entries is not None else settings.SUMMARY_CACHE_MAX_ENTRIES
+        )
+        path = settings.SUMMARY_CACHE_PATH if path is None else path
+        self.store = SqliteSummaryStore(path) if path else None
+        self.disk_hits = 0
+        self.generated = 0
+        self.disk_errors = 0
+
+    async def _disk_get(self, key: str) -> Optional[Tuple[Any, float]]:
+        if self.store is None:
+            return None
+        try:
+            return await asyncio.to_thread(self.store.get, key)
+        except Exception as e:
+            self.disk_errors += 1
+            logger.warning(f"Summary cache read failed: {str(e)}")
+            return None
+
+    async def _disk_set(self, key: str, kind: str, value: Any, ttl: float) -> None:
+        if self.store is None:
+            return
+        try:
+            await asyncio.to_thread(self.store.set, key, kind, value, ttl)
+        except Exception as e:
+            self.disk_errors += 1
+            logger.warning(f"Summary cache write failed: {str(e)}")
+
+    async def get_or_create(self, key: str, kind: str, create: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        """
+        Cached summary for key, or the result of create() (cached unless it is None)
+
+        Args:
+            key: Content address from summary_key()
+            kind: Summary kind, stored alongside the entry
+            create: Zero-argument coroutine factory calling the LLM
+            ttl: Seconds a newly created summary stays valid
+        """
+        if not settings.SUMMARY_CACHE_ENABLED or ttl <= 0:
+            return await create()
+
+        lifetime = ttl
+
+        async def load() -> Any:
+            nonlocal lifetime
+            stored = await self._disk_get(key)
+            if stored is not None:
+                self.disk_hits += 1
+                value, lifetime = stored
+                return value
+            value = await create()
+            if value is not None:
+                self.generated += 1
+                await self._disk_set(key, kind, value, ttl)
+            return value
+
+        return await self.memory.get_or_load(key, load, lambda value: lifetime if value is not None else None)
+
+    async def lookup(self, key: str) -> Any:
+        """Cached summary for key (memory, then disk), or None; used by streaming callers"""
+        if not settings.SUMMARY_CACHE_ENABLED:
+            return None
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        stored = await self._disk_get(key)
+        if stored is None:
+            return None
+        self.disk_hits += 1
+        value, remaining = stored
+        self.memory.set(key, value, remaining)
+        return value
+
+    async def put(self, key: str, kind: str, value: Any, ttl: float) -> None:
+        """Cache a summary produced outside get_or_create (e.g. assembled from a stream)"""
+        if not settings.SUMMARY_CACHE_ENABLED or ttl <= 0 or value is None:
+            return
+        self.generated += 1
+        self.memory.set(key, value, ttl)
+        await self._disk_set(key, kind, value, ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.SUMMARY_CACHE_ENABLED,
+            "persistent": self.store is not None,
+            "disk_hits": self.disk_hits,
+            "generated": self.generated,
+            "disk_errors": self.disk_errors,
+        }
+
+# Process-wide cache used by openai_service
+summary_cache = SummaryCache()
@@ -0,0 +1,194 @@
+"""
+Choosing between parser summaries and AI summaries
+
+summary_mode selects how pilot summaries are produced:
+
+- local: the deterministic summary built by the METAR/TAF parsers (or from the parsed
+  PIREP/SIGMET fields), in microseconds and at no cost
+- llm: an AI summary from openai_service for every report
+- auto: an AI summary only for reports with significant weather (thunderstorms, freezing
+  precipitation, LIFR, urgent PIREPs, SIGMETs), and only while recent LLM latency fits the
+  SUMMARY_LLM_BUDGET_SECONDS budget; everything else, and anything that misses the budget,
+  gets the local summary
+
+An AI summary that was wanted but missed its budget or failed is degraded (see `degraded`):
+the next request may well get the AI summary, so the response is not given an ETag.
+"""
+import asyncio
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.openai_service import openai_service
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_MODES = ("local", "llm", "auto")
+SUMMARY_MODE_PATTERN = "^(local|llm|auto)$"
+
+# Observation/issue time group; weather groups follow it and remarks follow RMK
+_TIME_GROUP = re.compile(r"^\d{6}Z$")
+# Present/forecast weather groups with a thunderstorm or freezing descriptor (TSRA, +TSGR, VCTS, FZRA, FZFG...)
+_SIGNIFICANT_WX = re.compile(r"^(?:[+-]|VC)?(?:TS|FZ)(?:[A-Z]{2})*$")
+_SEVERE = re.compile(r"\b(?:SEV|SEVERE|EXTRM|EXTREME)\b")
+
+def resolve_mode(mode: Optional[str]) -> str:
+    """The requested mode, or the server default (SUMMARY_MODE)"""
+    mode = (mode or settings.SUMMARY_MODE).lower()
+    return mode if mode in SUMMARY_MODES else "auto"
+
+def _weather_groups(raw_text: str) -> List[str]:
+    """Groups of a METAR/TAF between the time group and the remarks"""
+    tokens = raw_text.upper().split()
+    for index, token in enumerate(tokens):
+        if _TIME_GROUP.match(token):
+            tokens = tokens[index + 1:]
+            break
+    if "RMK" in tokens:
+        tokens = tokens[:tokens.index("RMK")]
+    return tokens
+
+def has_significant_weather(report_type: str, report: Dict[str, Any]) -> bool:
+    """True if a report is worth an AI summary under summary_mode=auto"""
+    raw_text = report.get("raw_text") or ""
+    if report_type == "sigmet":
+        return True
+    if report_type == "pirep":
+        if report.get("report_type") == "UUA" or raw_text.startswith("UUA"):
+            return True
+        intensities = " ".join(
+            str((report.get(hazard) or {}).get("intensity", "")) for hazard in ("turbulence", "icing")
+        ).upper()
+        return bool(_SEVERE.search(intensities))
+    if report_type in ("metar", "taf"):
+        if report.get("flight_category") == "LIFR":
+            return True
+        periods = report.get("forecast") or []
+        if any(isinstance(period, dict) and period.get("flight_category") == "LIFR" for period in periods):
+            return True
+        return any(_SIGNIFICANT_WX.match(group) for group in _weather_groups(raw_text))
+    return False
+
+def _pirep_summary(report: Dict[str, Any]) -> Optional[str]:
+    parts = []
+    kind = "Urgent pilot report" if report.get("report_type") == "UUA" else "Pilot report"
+    where = report.get("location") or "unknown location"
+    altitude = report.get("altitude")
+    header = f"{kind} near {where}"
+    if isinstance(altitude, (int, float)):
+        header += f" at {int(altitude):,} ft"
+    if report.get("aircraft_type"):
+        header += f" ({report['aircraft_type']})"
+    parts.append(header)
+    for hazard in ("turbulence", "icing"):
+        details = report.get(hazard) or {}
+        if details.get("intensity"):
+            parts.append(f"{str(details['intensity']).lower()} {hazard}")
+    if report.get("sky_conditions"):
+        parts.append(f"sky {report['sky_conditions']}")
+    if len(parts) == 1:
+        parts.append("no turbulence or icing reported")
+    return ": ".join([parts[0], ", ".join(parts[1:])]) + "."
+
+def _sigmet_summary(report: Dict[str, Any]) -> Optional[str]:
+    text = f"SIGMET {report.get('id', '')}".strip()
+    if report.get("phenomenon"):
+        text += f" for {report['phenomenon']}"
+    altitude = report.get("altitude") or {}
+    if altitude.get("upper"):
+        text += f" from {altitude.get('lower') or 'SFC'} to {altitude['upper']} ft"
+    if report.get("valid_to"):
+        text += f", valid until {report['valid_to']}"
+    return text + "."
+
+def local_summary(report_type: str, report: Dict[str, Any]) -> Optional[str]:
+    """Deterministic pilot summary from the parsed report"""
+    if report_type in ("metar", "taf"):
+        parsed = report.get(f"parsed_{report_type}") or {}
+        return report.get("pilot_summary") or parsed.get("pilot_summary") or None
+    if report_type == "pirep":
+        return _pirep_summary(report)
+    if report_type == "sigmet":
+        return _sigmet_summary(report)
+    return None
+
+def llm_within_budget() -> bool:
+    """False while recent LLM latency (p90) exceeds the auto-mode budget"""
+    p90 = openai_service.latency.percentile(90)
+    return p90 is None or p90 <= settings.SUMMARY_LLM_BUDGET_SECONDS
+
+def wants_llm(report_type: str, report: Dict[str, Any], mode: str, check_latency: bool = True) -> bool:
+    """
+    True if the mode calls for an AI summary of the report
+
+    check_latency=False ignores recent LLM latency (for background work with no user waiting)
+    """
+    if mode == "llm":
+        return True
+    return (mode == "auto" and has_significant_weather(report_type, report)
+            and (not check_latency or llm_within_budget()))
+
+def _is_fallback(report_type: str, report: Dict[str, Any], summary: Optional[str]) -> bool:
+    """True for the generic text openai_service returns when an llm-mode API call fails"""
+    return bool(summary) and summary == openai_service._generate_fallback_summary(report_type, report)
+
+def degraded(report_type: str, report: Dict[str, Any], mode: Optional[str],
+             summary: Optional[str], source: str) -> bool:
+    """
+    True if a summary is not the one the mode calls for: an AI summary was wanted but is
+    missing, fell back to generic text, or was replaced by the local summary (budget or latency)
+    """
+    if source == "llm":
+        return not summary
+    return source == "fallback" or wants_llm(report_type, report, resolve_mode(mode), check_latency=False)
+
+async def summarize(report_type: str, report: Dict[str, Any], mode: Optional[str] = None) -> Tuple[Optional[str], str]:
+    """
+    Summary for one report according to the summary mode
+
+    Returns:
+        (summary, source) where source is "llm", "local" or "fallback" (the generic text
+        an llm-mode request gets when the API call fails)
+    """
+    mode = resolve_mode(mode)
+    if not wants_llm(report_type, report, mode):
+        return local_summary(report_type, report), "local"
+    if mode == "llm":
+        summary = await openai_service.generate_summary(report_type, report)
+        return summary, "fallback" if _is_fallback(report_type, report, summary) else "llm"
+
+    try:
+        summary = await asyncio.wait_for(
+            openai_service.generate_summary(report_type, report, use_fallback=False),
+            timeout=settings.SUMMARY_LLM_BUDGET_SECONDS
+        )
+    except asyncio.TimeoutError:
+        logger.info(f"{report_type.upper()} AI summary missed the {settings.SUMMARY_LLM_BUDGET_SECONDS}s budget, using the local summary")
+        summary = None
+    if summary:
+        return summary, "llm"
+    return local_summary(report_type, report), "local"
+
+async def summarize_many(report_type: str, reports: List[Dict[str, Any]],
+                         mode: Optional[str] = None) -> List[Tuple[Optional[str], str]]:
+    """Summaries for a list of reports; AI summaries run concurrently within the batch budget"""
+    mode = resolve_mode(mode)
+    results: List[Tuple[Optional[str], str]] = [(None, "local")] * len(reports)
+    wanted = [index for index, report in enumerate(reports) if wants_llm(report_type, report, mode)]
+
+    if wanted:
+        budget = settings.LLM_BATCH_BUDGET_SECONDS if mode == "llm" else settings.SUMMARY_LLM_BUDGET_SECONDS
+        summaries = await openai_service.generate_summaries(
+            report_type, [reports[index] for index in wanted], budget=budget, use_fallback=mode == "llm"
+        )
+        for index, summary in zip(wanted, summaries):
+            if _is_fallback(report_type, reports[index], summary):
+                results[index] = (summary, "fallback")
+            elif summary or mode == "llm":
+                results[index] = (summary, "llm")
+
+    return [
+        result if result[1] != "local" else (local_summary(report_type, reports[index]), "local")
+        for index, result in enumerate(results)
+    ]
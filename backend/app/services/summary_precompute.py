@@ -0,0 +1,254 @@
+"""
+Background AI summary precomputation for watched airports
+
+Every SUMMARY_PRECOMPUTE_INTERVAL seconds the latest METAR, TAF and nearby PIREPs of the
+watchlist stations are fetched at background upstream priority, and every report not seen
+before gets its AI summary generated into the summary cache. User requests for those reports
+are then cache lookups. Which reports get an AI summary follows SUMMARY_MODE, as it does for
+user requests.
+
+Precomputation yields to interactive traffic:
+
+- at most SUMMARY_PRECOMPUTE_CONCURRENCY summaries are generated at once, and none is started
+  while LLM_MAX_CONCURRENCY completions are already running
+- tokens are counted over a rolling hour; once SUMMARY_PRECOMPUTE_TOKENS_PER_HOUR have been
+  spent, the remaining reports wait for a later cycle
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.base_client import is_error_response, normalize_station_ids
+from app.services.http_client import client_registry
+from app.services.metar_service import AWCMetarService
+from app.services.openai_service import llm_token_usage, openai_service
+from app.services.pirep_service import PirepService
+from app.services.rate_limit import PRIORITY_BACKGROUND, upstream_priority
+from app.services.summary_policy import resolve_mode, wants_llm
+from app.services.taf_service import AWCTafService
+
+logger = logging.getLogger(__name__)
+
+# (report type, raw text, report data)
+Job = Tuple[str, str, Dict[str, Any]]
+
+def load_watchlist(stations: Optional[str] = None, path: Optional[str] = None) -> List[str]:
+    """
+    Watched station ids
+
+    Args:
+        stations: Comma-separated ids (default: SUMMARY_WATCHLIST)
+        path: File with one id per line, # starts a comment (default: SUMMARY_WATCHLIST_FILE)
+    """
+    stations = settings.SUMMARY_WATCHLIST if stations is None else stations
+    path = settings.SUMMARY_WATCHLIST_FILE if path is None else path
+    ids = stations.split(",")
+    if path:
+        with open(os.path.expanduser(path)) as handle:
+            ids.extend(line.split("#", 1)[0] for line in handle)
+    return normalize_station_ids(ids)
+
+class TokenBudget:
+    """Tokens spent over a rolling window; a limit of 0 or less means no limit"""
+
+    def __init__(self, limit: int, window: float = 3600.0):
+        self.limit = limit
+        self.window = window
+        self._spent: Deque[Tuple[float, int]] = deque()
+        self._total = 0
+
+    def used(self) -> int:
+        cutoff = time.monotonic() - self.window
+        while self._spent and self._spent[0][0] <= cutoff:
+            self._total -= self._spent.popleft()[1]
+        return self._total
+
+    def exhausted(self) -> bool:
+        return self.limit > 0 and self.used() >= self.limit
+
+    def record(self, tokens: int) -> None:
+        if tokens > 0:
+            self._spent.append((time.monotonic(), tokens))
+            self._total += tokens
+
+def _generate(report_type: str, report: Dict[str, Any]) -> Awaitable[Optional[str]]:
+    return openai_service.generate_summary(report_type, report, use_fallback=False)
+
+class SummaryPrecomputer:
+    """Background task generating AI summaries for new reports of watched stations"""
+
+    # Seconds between checks while interactive completions use every LLM slot
+    BACKOFF = 0.25
+
+    def __init__(self, stations: Optional[List[str]] = None, interval: Optional[float] = None,
+                 concurrency: Optional[int] = None, tokens_per_hour: Optional[int] = None,
+                 metar_service: Optional[AWCMetarService] = None, taf_service: Optional[AWCTafService] = None,
+                 pirep_service: Optional[PirepService] = None,
+                 summarize: Optional[Callable[[str, Dict[str, Any]], Awaitable[Optional[str]]]] = None):
+        # Loaded from the settings on first use unless given
+        self.stations = normalize_station_ids(stations) if stations is not None else None
+        self.interval = interval if interval is not None else settings.SUMMARY_PRECOMPUTE_INTERVAL
+        self.concurrency = max(1, concurrency if concurrency is not None else settings.SUMMARY_PRECOMPUTE_CONCURRENCY)
+        self.budget = TokenBudget(
+            tokens_per_hour if tokens_per_hour is not None else settings.SUMMARY_PRECOMPUTE_TOKENS_PER_HOUR
+        )
+        self.metar_service = metar_service or AWCMetarService(registry=client_registry)
+        self.taf_service = taf_service or AWCTafService(registry=client_registry)
+        self.pirep_service = pirep_service or PirepService(registry=client_registry)
+        self.summarize = summarize or _generate
+        # (report type, raw text) of reports already summarized and still current
+        self._done: Set[Tuple[str, str]] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.generated = 0
+        self.failed = 0
+        self.deferred = 0
+        self.waits = 0
+
+    async def _fetch_reports(self, stations: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Current METARs, TAFs and PIREPs of the stations as (report type, report data)"""
+        metars, tafs, *pireps = await asyncio.gather(
+            self.metar_service.get_metars(stations),
+            self.taf_service.get_tafs(stations),
+            *(self.pirep_service.get_pireps(station) for station in stations),
+            return_exceptions=True
+        )
+        reports: List[Tuple[str, Dict[str, Any]]] = []
+        for report_type, result in (("metar", metars), ("taf", tafs)):
+            if isinstance(result, Exception):
+                logger.warning(f"Summary precompute could not fetch {report_type.upper()}s: {str(result)}")
+                continue
+            reports.extend((report_type, item.model_dump()) for item in result.values() if not is_error_response(item))
+        for result in pireps:
+            if isinstance(result, Exception) or is_error_response(result):
+                continue
+            reports.extend(("pirep", item.model_dump()) for item in result)
+        return reports
+
+    def _pending_jobs(self, reports: List[Tuple[str, Dict[str, Any]]]) -> List[Job]:
+        """Reports that need an AI summary and have not been summarized yet (forgets superseded reports)"""
+        mode = resolve_mode(None)
+        current: Set[Tuple[str, str]] = set()
+        jobs: List[Job] = []
+        for report_type, report in reports:
+            raw_text = report.get("raw_text")
+            if not raw_text or (report_type, raw_text) in current:
+                continue
+            current.add((report_type, raw_text))
+            if (report_type, raw_text) not in self._done and wants_llm(report_type, report, mode, check_latency=False):
+                jobs.append((report_type, raw_text, report))
+        self._done &= current
+        return jobs
+
+    async def _wait_for_llm_slot(self) -> None:
+        """Wait while interactive traffic uses every LLM slot"""
+        while openai_service.inflight >= settings.LLM_MAX_CONCURRENCY:
+            self.waits += 1
+            await asyncio.sleep(self.BACKOFF)
+
+    async def _run_job(self, job: Job) -> None:
+        report_type, raw_text, report = job
+        usage: List[int] = []
+        token = llm_token_usage.set(usage)
+        try:
+            summary = await self.summarize(report_type, report)
+        except Exception as e:
+            summary = None
+            logger.warning(f"Summary precompute failed for {report_type.upper()} {raw_text[:20]}: {str(e)}")
+        finally:
+            llm_token_usage.reset(token)
+            self.budget.record(sum(usage))
+        if summary:
+            self.generated += 1
+            self._done.add((report_type, raw_text))
+        else:
+            self.failed += 1
+
+    async def run_once(self) -> int:
+        """
+        Fetch the watched stations once and summarize their new reports
+
+        Returns:
+            Number of summaries generated
+        """
+        if self.stations is None:
+            self.stations = load_watchlist()
+        if not self.stations:
+            return 0
+
+        token = upstream_priority.set(PRIORITY_BACKGROUND)
+        try:
+            jobs = self._pending_jobs(await self._fetch_reports(self.stations))
+        finally:
+            upstream_priority.reset(token)
+
+        generated = self.generated
+        queue: Deque[Job] = deque(jobs)
+
+        async def worker() -> None:
+            while queue:
+                if self.budget.exhausted():
+                    # Leave the rest for a later cycle
+                    self.deferred += len(queue)
+                    queue.clear()
+                    return
+                await self._wait_for_llm_slot()
+                if queue:
+                    await self._run_job(queue.popleft())
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(jobs)))))
+        if jobs:
+            logger.info(f"Summary precompute generated {self.generated - generated} of {len(jobs)} new summaries")
+        return self.generated - generated
+
+    async def run(self) -> None:
+        """Precompute forever at the configured interval"""
+        while True:
+            self.runs += 1
+            try:
+                await self.run_once()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.error(f"Summary precompute failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.SUMMARY_PRECOMPUTE_ENABLED,
+            "stations": len(self.stations or []),
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "generated": self.generated,
+            "failed": self.failed,
+            "deferred_by_token_budget": self.deferred,
+            "waits_for_interactive": self.waits,
+            "tokens_last_hour": self.budget.used(),
+            "tokens_per_hour_limit": self.budget.limit,
+        }
+
+# Process-wide precomputer, started from the app lifespan when enabled
+summary_precomputer = SummaryPrecomputer()
@@ -9,6 +9,8 @@ import logging
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, List, Optional, Union, Tuple
 
+from app.core.metrics import PARSER_DURATION, timed
+
 logger = logging.getLogger(__name__)
 
 # Weather phenomena codes and their descriptions
@@ -1016,6 +1018,7 @@ class TafParser:
 
 
 # Function for external use
+@timed(PARSER_DURATION, "taf")
 def parse_taf(taf_string: str) -> Dict[str, Any]:
     """Parse a TAF string and return structured data with pilot-friendly summaries
     
@@ -1,21 +1,163 @@
 from typing import Dict, Any, List, Optional
+import asyncio
 import logging
+import time
 from datetime import datetime
 
-from app.services.base_client import BaseApiClient
+from app.services.base_client import BaseApiClient, normalize_station_ids
+from app.services.http_client import UpstreamClientRegistry
 from app.schemas.weather import TafResponse
 from app.core.config import settings
 from app.services.taf_parser import parse_taf
+from app.services.cache import AsyncTTLCache, stale_window
+from app.services.report_cycle import taf_ttl
+from app.services.provider_router import ProviderRouter
 
 logger = logging.getLogger(__name__)
 
+# Parsed TAFs keyed by (station, hours); entries expire with the six-hourly issuance cycle
+taf_cache = AsyncTTLCache("taf", max_entries=settings.TAF_CACHE_MAX_ENTRIES)
+
+# Health of the AWC and AVWX TAF providers, shared by every request
+taf_router = ProviderRouter("taf")
+
+def _taf_cache_ttl(taf: TafResponse) -> Optional[float]:
+    """Cache lifetime for a TAF response, or None for error/no-data responses"""
+    if taf.raw_data is None:
+        return None
+    issue_time = taf.issue_time
+    if issue_time is None and taf.parsed_taf:
+        issue_time = (taf.parsed_taf.get("issue_time") or {}).get("datetime")
+    return taf_ttl(issue_time)
+
 class AWCTafService(BaseApiClient):
     """Client for NOAA Aviation Weather Center TAF API"""
     
-    def __init__(self):
-        super().__init__(base_url="https://aviationweather.gov")
+    def __init__(self, registry: Optional[UpstreamClientRegistry] = None):
+        super().__init__(base_url=settings.AWC_BASE_URL, registry=registry)
         
     async def get_taf(self, station: str, hours: int = 6) -> TafResponse:
+        """Get TAF data, served from the issuance-cycle-aware cache when still current"""
+        taf, age = await taf_cache.fetch(
+            (station.upper(), hours),
+            lambda: self._fetch_taf(station, hours),
+            _taf_cache_ttl,
+            stale_ttl=stale_window(settings.TAF_SWR_STALE_TTL)
+        )
+        # Callers decorate the response (e.g. AI summaries), so never hand out the cached instance
+        return taf.model_copy(update={"data_age_seconds": round(age, 1)})
+    
+    async def get_tafs(self, stations: List[str], hours: int = 6) -> Dict[str, TafResponse]:
+        """
+        Get TAFs for many stations using AWC's comma-separated ids parameter
+        
+        Args:
+            stations: ICAO station codes
+            hours: Hours of forecast to include
+            
+        Returns:
+            Dictionary of TafResponse objects keyed by upper-case station code
+        """
+        wanted = normalize_station_ids(stations)
+        results: Dict[str, TafResponse] = {}
+        ages: Dict[str, float] = {}
+        missing = []
+        stale = []
+        now = time.monotonic()
+        for station in wanted:
+            entry = taf_cache.get_entry((station, hours))
+            if entry is None:
+                missing.append(station)
+                continue
+            results[station] = entry.value
+            ages[station] = round(now - entry.stored_at, 1)
+            if entry.fresh_until <= now:
+                stale.append(station)
+        
+        if stale:
+            # Serve the stale copies now and revalidate them together in one background batch
+            taf_cache.refresh_in_background(
+                ("batch", tuple(stale), hours),
+                lambda: self._load_taf_batch(stale, hours)
+            )
+        
+        if missing:
+            results.update(await self._load_taf_batch(missing, hours))
+            for station in missing:
+                ages[station] = 0.0
+        
+        return {
+            station: results[station].model_copy(update={"data_age_seconds": ages.get(station)})
+            for station in wanted
+        }
+    
+    async def _load_taf_batch(self, stations: List[str], hours: int) -> Dict[str, TafResponse]:
+        """Fetch stations in chunks of AWC_BATCH_CHUNK_SIZE ids and store them in the cache"""
+        chunk_size = max(1, settings.AWC_BATCH_CHUNK_SIZE)
+        chunks = [stations[i:i + chunk_size] for i in range(0, len(stations), chunk_size)]
+        fetched = await asyncio.gather(*(self._fetch_taf_batch(chunk, hours) for chunk in chunks))
+        results = {}
+        for batch in fetched:
+            for station, taf in batch.items():
+                ttl = _taf_cache_ttl(taf)
+                if ttl:
+                    taf_cache.set((station, hours), taf, ttl, stale_window(settings.TAF_SWR_STALE_TTL))
+                results[station] = taf
+        return results
+    
+    async def _fetch_taf_batch(self, stations: List[str], hours: int = 6) -> Dict[str, TafResponse]:
+        """Fetch and parse TAFs for a chunk of stations in a single upstream call"""
+        try:
+            endpoint = "/api/data/taf"
+            params = {
+                "ids": ",".join(stations),
+                "hours": hours,
+                "format": "json"
+            }
+            
+            data = await self.get(endpoint, params=params)
+            if not isinstance(data, list):
+                data = []
+            
+            # Keep the first (most recent) TAF per station
+            latest: Dict[str, Dict[str, Any]] = {}
+            for taf_data in data:
+                station_id = str(taf_data.get("icaoId", "")).upper()
+                if station_id and station_id not in latest:
+                    latest[station_id] = taf_data
+            
+            results = {}
+            for station in stations:
+                if station in latest:
+                    results[station] = self._build_taf_response(station, latest[station])
+                else:
+                    results[station] = TafResponse(
+                        source="AWC",
+                        station=station,
+                        raw_text=f"No TAF data available for {station}"
+                    )
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error fetching TAF batch from AWC: {str(e)}")
+            return {
+                station: TafResponse(
+                    source="AWC",
+                    station=station,
+                    raw_text=f"Error fetching TAF: {str(e)}"
+                )
+                for station in stations
+            }
+    
+    async def _load_taf(self, station: str, hours: int = 6) -> TafResponse:
+        """Fetch a station's TAF from AWC and store it in the cache"""
+        taf = await self._fetch_taf(station, hours)
+        ttl = _taf_cache_ttl(taf)
+        if ttl:
+            taf_cache.set((station.upper(), hours), taf, ttl, stale_window(settings.TAF_SWR_STALE_TTL))
+        return taf
+    
+    async def _fetch_taf(self, station: str, hours: int = 6) -> TafResponse:
         """Get TAF data from Aviation Weather Center API"""
         try:
             # Updated endpoint to match current AWC API structure
@@ -35,49 +177,7 @@ class AWCTafService(BaseApiClient):
                     raw_text=f"No TAF data available for {station}"
                 )
             
-            taf_data = data[0]
-            raw_taf = taf_data.get("rawTAF", "")
-            
-            # Parse TAF using our enhanced parser
-            parsed_taf = None
-            pilot_summary = None
-            
-            # Get forecast periods from the AWC API response
-            forecast_periods = []
-            if "fcsts" in taf_data:
-                forecast_periods = taf_data.get("fcsts", [])
-            
-            if raw_taf:
-                try:
-                    parsed_taf = parse_taf(raw_taf)
-                    pilot_summary = parsed_taf.get("pilot_summary")
-                    
-                    # Enhanced forecast periods with detailed insights if available
-                    if parsed_taf and parsed_taf.get("forecast_periods"):
-                        forecast_periods = parsed_taf.get("forecast_periods")
-                except Exception as e:
-                    logger.error(f"Error parsing TAF: {str(e)}")
-            
-            # Parse timestamp fields safely with proper type checking
-            issue_time = self._parse_timestamp(taf_data.get("issueTime"))
-            valid_from = self._parse_timestamp(taf_data.get("validTimeFrom"))
-            valid_to = self._parse_timestamp(taf_data.get("validTimeTo"))
-            
-            # Extract relevant fields from the response
-            result = TafResponse(
-                source="AWC",
-                station=station,
-                raw_text=raw_taf,
-                issue_time=issue_time,
-                valid_from=valid_from,
-                valid_to=valid_to,
-                forecast=forecast_periods,
-                raw_data=taf_data,
-                parsed_taf=parsed_taf,
-                pilot_summary=pilot_summary
-            )
-            
-            return result
+            return self._build_taf_response(station, data[0])
             
         except Exception as e:
             logger.error(f"Error fetching TAF from AWC: {str(e)}")
@@ -87,6 +187,51 @@ class AWCTafService(BaseApiClient):
                 raw_text=f"Error fetching TAF: {str(e)}"
             )
             
+    def _build_taf_response(self, station: str, taf_data: Dict[str, Any]) -> TafResponse:
+        """Build a TafResponse from one AWC TAF JSON record"""
+        raw_taf = taf_data.get("rawTAF", "")
+        
+        # Parse TAF using our enhanced parser
+        parsed_taf = None
+        pilot_summary = None
+        
+        # Get forecast periods from the AWC API response
+        forecast_periods = []
+        if "fcsts" in taf_data:
+            forecast_periods = taf_data.get("fcsts", [])
+        
+        if raw_taf:
+            try:
+                parsed_taf = parse_taf(raw_taf)
+                pilot_summary = parsed_taf.get("pilot_summary")
+        
+                # Enhanced forecast periods with detailed insights if available
+                if parsed_taf and parsed_taf.get("forecast_periods"):
+                    forecast_periods = parsed_taf.get("forecast_periods")
+            except Exception as e:
+                logger.error(f"Error parsing TAF: {str(e)}")
+        
+        # Parse timestamp fields safely with proper type checking
+        issue_time = self._parse_timestamp(taf_data.get("issueTime"))
+        valid_from = self._parse_timestamp(taf_data.get("validTimeFrom"))
+        valid_to = self._parse_timestamp(taf_data.get("validTimeTo"))
+        
+        # Extract relevant fields from the response
+        result = TafResponse(
+            source="AWC",
+            station=station,
+            raw_text=raw_taf,
+            issue_time=issue_time,
+            valid_from=valid_from,
+            valid_to=valid_to,
+            forecast=forecast_periods,
+            raw_data=taf_data,
+            parsed_taf=parsed_taf,
+            pilot_summary=pilot_summary
+        )
+        
+        return result
+    
     def _parse_timestamp(self, timestamp_value) -> Optional[datetime]:
         """Safely parse timestamp values that might be strings or integers"""
         if timestamp_value is None:
@@ -119,12 +264,11 @@ class AWCTafService(BaseApiClient):
 class AVWXTafService(BaseApiClient):
     """Client for AVWX TAF API"""
     
-    def __init__(self):
-        # Use the hardcoded API key
-        api_key = "  "
+    def __init__(self, registry: Optional[UpstreamClientRegistry] = None):
         super().__init__(
-            base_url="https://avwx.rest/api", 
-            api_key=api_key
+            base_url=settings.AVWX_BASE_URL, 
+            api_key=settings.AVWX_API_KEY,
+            registry=registry
         )
         
     async def get_taf(self, station: str) -> TafResponse:
@@ -132,8 +276,7 @@ class AVWXTafService(BaseApiClient):
         try:
             endpoint = f"/taf/{station}"
             
-            # Always use the hardcoded API key for authorization
-            headers = {"Authorization": "  "}
+            headers = {"Authorization": settings.AVWX_API_KEY}
             data = await self.get(endpoint, headers=headers)
             
             # Extract relevant fields from the response
@@ -175,7 +318,7 @@ class AVWXTafService(BaseApiClient):
             
             result = TafResponse(
                 source="AVWX",
-                station=station,
+                station=station.upper(),
                 raw_text=raw_taf,
                 issue_time=issue_time,
                 valid_from=valid_from,
@@ -253,3 +396,39 @@ class AVWXTafService(BaseApiClient):
         # If it's neither a string nor an integer, log and return None
         logger.error(f"Unexpected timestamp type: {type(timestamp_value)}")
         return None
+
+class FailoverTafService:
+    """TAFs from AWC, failing over (or hedging) to AVWX when AWC is failing or slow"""
+    
+    def __init__(self, registry: Optional[UpstreamClientRegistry] = None, router: Optional[ProviderRouter] = None):
+        self.awc = AWCTafService(registry=registry)
+        self.avwx = AVWXTafService(registry=registry)
+        self.router = router or taf_router
+        
+    async def get_taf(self, station: str, hours: int = 6, source: str = "auto") -> TafResponse:
+        """
+        Get TAF data from the requested provider
+        
+        Args:
+            station: ICAO station code
+            hours: Hours of forecast to include (AWC only)
+            source: "awc", "avwx" or "auto" (AWC with AVWX failover)
+            
+        Returns:
+            TafResponse from whichever provider answered
+        """
+        if source == "awc":
+            return await self.awc.get_taf(station, hours)
+        if source == "avwx":
+            return await self.avwx.get_taf(station)
+        
+        # AVWX is only usable as a fallback when an API key is configured
+        fallback = ("AVWX", lambda: self.avwx.get_taf(station)) if settings.AVWX_API_KEY else None
+        # Only cache misses and refreshes are routed, so the router measures upstream calls alone.
+        # The AWC loader caches its own result (even after losing a hedge); AVWX's is not cached.
+        taf, age = await taf_cache.fetch(
+            (station.upper(), hours),
+            lambda: self.router.call(("AWC", lambda: self.awc._load_taf(station, hours)), fallback),
+            lambda taf: None
+        )
+        return taf.model_copy(update={"data_age_seconds": round(age, 1)})
@@ -0,0 +1,281 @@
+"""
+Fake AWC/AVWX upstream for offline and load testing
+
+A standalone aiohttp server that replays recorded upstream exchanges (METAR, TAF, PIREP,
+airsigmet, the bulk METAR cache file and AVWX routes under /avwx). Latency, errors,
+stalls and rate limiting can be injected, with a seeded RNG so that incidents reproduce
+deterministically. In record mode, requests without a matching fixture are proxied to the
+real upstream and saved as new fixtures.
+
+Point the API at it with:
+
+    AWC_BASE_URL=http://127.0.0.1:8081 AVWX_BASE_URL=http://127.0.0.1:8081/avwx
+
+Run:
+
+    python -m app.testing.fake_upstream --port 8081 --latency-ms 150 --jitter-ms 50 \
+        --error-rate 0.05 --rate-limit 100 --rate-window 60 --seed 42
+
+Faults can be changed at runtime with POST /__fake__/config (JSON body with any of the
+FaultConfig fields) and counters are available at GET /__fake__/stats.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Deque, Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+@dataclass
+class FaultConfig:
+    """Injected upstream behaviour; every field can be changed at runtime"""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    stall_rate: float = 0.0
+    stall_seconds: float = 10.0
+    rate_limit: int = 0  # requests per rate_window; 0 disables
+    rate_window: float = 60.0
+    seed: Optional[int] = None
+
+@dataclass
+class Exchange:
+    """One recorded upstream response"""
+    path: str
+    query: Dict[str, str]
+    status: int
+    content_type: str
+    body: Any
+
+    def body_bytes(self, body: Any = None) -> bytes:
+        body = self.body if body is None else body
+        if isinstance(body, str):
+            return body.encode()
+        return json.dumps(body).encode()
+
+def _normalize_query(query: Dict[str, str]) -> Dict[str, str]:
+    return {key: value.upper() if key in ("ids", "id") else value for key, value in query.items()}
+
+class FixtureStore:
+    """Recorded exchanges loaded from (and recorded into) a directory of JSON files"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.exchanges: List[Exchange] = []
+        self.load()
+
+    def load(self) -> None:
+        self.exchanges = []
+        if not os.path.isdir(self.directory):
+            return
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(self.directory, name)) as handle:
+                data = json.load(handle)
+            self.exchanges.append(Exchange(
+                path=data["path"],
+                query=_normalize_query(data.get("query") or {}),
+                status=data.get("status", 200),
+                content_type=data.get("content_type", "application/json"),
+                body=data.get("body")
+            ))
+        logger.info(f"Loaded {len(self.exchanges)} fixtures from {self.directory}")
+
+    def match(self, path: str, query: Dict[str, str]) -> Optional[Exchange]:
+        """Most specific exchange for path whose recorded query is a subset of the request's"""
+        query = _normalize_query(query)
+        best, best_score = None, -1
+        for exchange in self.exchanges:
+            if exchange.path != path:
+                continue
+            if all(query.get(key) == value for key, value in exchange.query.items()):
+                if len(exchange.query) > best_score:
+                    best, best_score = exchange, len(exchange.query)
+        return best
+
+    def record(self, exchange: Exchange) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        digest = hashlib.sha1(json.dumps(exchange.query, sort_keys=True).encode()).hexdigest()[:10]
+        name = re.sub(r"[^A-Za-z0-9]+", "_", exchange.path).strip("_") or "root"
+        with open(os.path.join(self.directory, f"recorded_{name}_{digest}.json"), "w") as handle:
+            json.dump(asdict(exchange), handle, indent=2)
+        self.exchanges.append(exchange)
+
+def filter_by_ids(exchange: Exchange, query: Dict[str, str]) -> Any:
+    """Narrow a multi-station JSON list fixture to the stations in the ids parameter"""
+    ids = query.get("ids")
+    if not ids or not isinstance(exchange.body, list):
+        return exchange.body
+    wanted = {station.strip().upper() for station in ids.split(",")}
+    return [item for item in exchange.body if str(item.get("icaoId", "")).upper() in wanted]
+
+class FakeUpstream:
+    """aiohttp application replaying fixtures with injected faults"""
+
+    def __init__(self, fixtures_dir: str = DEFAULT_FIXTURES_DIR, faults: Optional[FaultConfig] = None,
+                 record_from: Optional[str] = None):
+        self.fixtures = FixtureStore(fixtures_dir)
+        self.faults = faults or FaultConfig()
+        self.record_from = record_from.rstrip("/") if record_from else None
+        self.random = random.Random(self.faults.seed)
+        self._window: Deque[float] = deque()
+        self.stats: Dict[str, Any] = {
+            "requests": 0,
+            "served": 0,
+            "not_modified": 0,
+            "errors_injected": 0,
+            "stalls_injected": 0,
+            "rate_limited": 0,
+            "misses": 0,
+            "recorded": 0,
+            "by_path": {},
+        }
+
+    def configure(self, **changes: Any) -> None:
+        known = {field.name for field in fields(FaultConfig)}
+        for key, value in changes.items():
+            if key in known:
+                setattr(self.faults, key, value)
+        if "seed" in changes:
+            self.random = random.Random(self.faults.seed)
+
+    def _rate_limited(self) -> Optional[float]:
+        """Seconds until the next request is allowed, or None if this one may proceed"""
+        if self.faults.rate_limit <= 0:
+            return None
+        now = time.monotonic()
+        while self._window and now - self._window[0] >= self.faults.rate_window:
+            self._window.popleft()
+        if len(self._window) >= self.faults.rate_limit:
+            return self.faults.rate_window - (now - self._window[0])
+        self._window.append(now)
+        return None
+
+    async def _delay(self) -> None:
+        faults = self.faults
+        delay = faults.latency_ms / 1000
+        if faults.jitter_ms:
+            delay += self.random.uniform(0, faults.jitter_ms) / 1000
+        if faults.stall_rate and self.random.random() < faults.stall_rate:
+            self.stats["stalls_injected"] += 1
+            delay += faults.stall_seconds
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _record(self, request: web.Request) -> Optional[Exchange]:
+        """Fetch a missing exchange from the real upstream and store it as a fixture"""
+        url = f"{self.record_from}{request.path}"
+        headers = {key: value for key, value in request.headers.items() if key.lower() == "authorization"}
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url, params=dict(request.query), headers=headers) as response:
+                raw = await response.read()
+                content_type = response.content_type
+        text = raw.decode("utf-8", errors="replace")
+        body: Any = json.loads(text) if "json" in content_type else text
+        exchange = Exchange(request.path, _normalize_query(dict(request.query)), response.status, content_type, body)
+        self.fixtures.record(exchange)
+        self.stats["recorded"] += 1
+        return exchange
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        self.stats["requests"] += 1
+        self.stats["by_path"][request.path] = self.stats["by_path"].get(request.path, 0) + 1
+
+        retry_after = self._rate_limited()
+        if retry_after is not None:
+            self.stats["rate_limited"] += 1
+            return web.Response(status=429, text="Too Many Requests",
+                                headers={"Retry-After": str(max(1, int(retry_after + 0.999)))})
+
+        await self._delay()
+
+        if self.faults.error_rate and self.random.random() < self.faults.error_rate:
+            self.stats["errors_injected"] += 1
+            return web.Response(status=self.faults.error_status, text="Injected upstream error")
+
+        query = dict(request.query)
+        exchange = self.fixtures.match(request.path, query)
+        if exchange is None and self.record_from:
+            exchange = await self._record(request)
+        if exchange is None:
+            self.stats["misses"] += 1
+            return web.Response(status=404, text=f"No fixture for {request.path}")
+
+        body = exchange.body_bytes(filter_by_ids(exchange, query))
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            self.stats["not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+
+        self.stats["served"] += 1
+        return web.Response(status=exchange.status, body=body, content_type=exchange.content_type,
+                            headers={"ETag": etag})
+
+    async def get_config(self, request: web.Request) -> web.Response:
+        return web.json_response(asdict(self.faults))
+
+    async def set_config(self, request: web.Request) -> web.Response:
+        self.configure(**(await request.json()))
+        return web.json_response(asdict(self.faults))
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/__fake__/config", self.get_config)
+        app.router.add_post("/__fake__/config", self.set_config)
+        app.router.add_get("/__fake__/stats", self.get_stats)
+        app.router.add_get("/{tail:.*}", self.handle)
+        return app
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake AWC/AVWX upstream with record/replay and fault injection")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR, help="Directory of recorded exchanges")
+    parser.add_argument("--record-from", default=None,
+                        help="Upstream base URL to proxy and record requests without a fixture")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--stall-rate", type=float, default=0.0)
+    parser.add_argument("--stall-seconds", type=float, default=10.0)
+    parser.add_argument("--rate-limit", type=int, default=0, help="Requests allowed per rate window (0 = unlimited)")
+    parser.add_argument("--rate-window", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    faults = FaultConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        stall_rate=args.stall_rate,
+        stall_seconds=args.stall_seconds,
+        rate_limit=args.rate_limit,
+        rate_window=args.rate_window,
+        seed=args.seed
+    )
+    fake = FakeUpstream(args.fixtures, faults, record_from=args.record_from)
+    web.run_app(fake.make_app(), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import asyncio
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.api.api import app
+from app.core.config import settings
+from app.schemas.weather import MetarResponse, PirepResponse, SigmetResponse, TafResponse
+from app.services.geo import haversine_nm, point_in_polygon, polygon_within_nm
+
+client = TestClient(app)
+
+# KPHX is at about 33.43N 112.01W
+PHX = {"lat": 33.43, "lon": -112.01}
+
+def _square(lat, lon, half):
+    return [
+        {"lat": lat - half, "lon": lon - half},
+        {"lat": lat - half, "lon": lon + half},
+        {"lat": lat + half, "lon": lon + half},
+        {"lat": lat + half, "lon": lon - half},
+    ]
+
+def _sigmets():
+    return [
+        SigmetResponse(source="AWC", id="OVERHEAD", area=_square(33.4, -112.0, 1.0)),
+        SigmetResponse(source="AWC", id="NEARBY", area=_square(35.0, -112.0, 0.5)),
+        SigmetResponse(source="AWC", id="FARAWAY", area=_square(45.0, -85.0, 1.0)),
+    ]
+
+def test_geo_helpers():
+    assert 1100 < haversine_nm(33.43, -112.01, 40.64, -73.76) < 1900
+    polygon = [(0.0, 0.0), (0.0, 2.0), (2.0, 2.0), (2.0, 0.0)]
+    assert point_in_polygon(1.0, 1.0, polygon)
+    assert not point_in_polygon(3.0, 1.0, polygon)
+    # One degree of latitude is 60 nm
+    assert polygon_within_nm(3.0, 1.0, polygon, 65)
+    assert not polygon_within_nm(3.0, 1.0, polygon, 55)
+
+@patch("app.services.sigmet_service.FailoverSigmetService.get_sigmets")
+@patch("app.services.pirep_service.PirepService.get_pireps")
+@patch("app.services.taf_service.FailoverTafService.get_taf")
+@patch("app.services.metar_service.AWCMetarService.get_metar")
+@patch("app.services.openai_service.OpenAISummaryService.generate_comprehensive_summary")
+def test_airport_summary_filters_sigmets_to_vicinity(mock_summary, mock_metar, mock_taf, mock_pireps, mock_sigmets):
+    mock_summary.return_value = {"overview": "ok"}
+    mock_metar.return_value = MetarResponse(source="AWC", station="KPHX", raw_text="KPHX 201751Z", raw_data=PHX)
+    mock_taf.return_value = TafResponse(source="AWC", station="KPHX", raw_text="TAF KPHX")
+    mock_pireps.return_value = [PirepResponse(source="AWC", location="KPHX", raw_text="UA /OV PHX")]
+    mock_sigmets.return_value = _sigmets()
+
+    response = client.get("/api/v1/airport-summary/kphx")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [s["id"] for s in data["reports"]["sigmets"]] == ["OVERHEAD", "NEARBY"]
+    assert data["sources"]["sigmets"]["vicinity_nm"] == settings.SIGMET_VICINITY_NM
+    assert all(status["status"] == "ok" for status in data["sources"].values())
+    assert data["errors"] is None
+    prompt_sigmets = mock_summary.call_args[0][0]["sigmets"]
+    assert len(prompt_sigmets) == 2
+
+@patch("app.services.sigmet_service.FailoverSigmetService.get_sigmets")
+@patch("app.services.pirep_service.PirepService.get_pireps")
+@patch("app.services.taf_service.FailoverTafService.get_taf")
+@patch("app.services.metar_service.AWCMetarService.get_metar")
+@patch("app.services.openai_service.OpenAISummaryService.generate_comprehensive_summary")
+def test_airport_summary_returns_partial_results_on_timeout(mock_summary, mock_metar, mock_taf, mock_pireps, mock_sigmets,
+                                                             monkeypatch):
+    monkeypatch.setattr(settings, "AIRPORT_SUMMARY_SOURCE_TIMEOUT", 0.2)
+
+    async def slow_pireps(*args, **kwargs):
+        await asyncio.sleep(5)
+        return []
+
+    mock_summary.return_value = {"overview": "ok"}
+    mock_metar.return_value = MetarResponse(source="AWC", station="KPHX", raw_text="KPHX 201751Z", raw_data=PHX)
+    mock_taf.return_value = TafResponse(source="AWC", station="KPHX", raw_text="Error fetching TAF: boom")
+    mock_pireps.side_effect = slow_pireps
+    mock_sigmets.return_value = []
+
+    response = client.get("/api/v1/airport-summary/KPHX")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["sources"]["metar"]["status"] == "ok"
+    assert data["sources"]["taf"]["status"] == "error"
+    assert data["sources"]["pireps"]["status"] == "timeout"
+    assert data["sources"]["pireps"]["elapsed_ms"] < 2000
+    assert data["reports"]["metar"]["station"] == "KPHX"
+    assert data["reports"]["pireps"] == []
+    assert set(data["errors"]) == {"taf", "pireps"}
@@ -111,3 +111,45 @@ async def test_get_metar_multi(mock_avwx_get_metar, mock_awc_get_metar):
     assert data[1]["source"] == "AVWX"
     assert data[0]["station"] == "KPHX"
     assert data[1]["station"] == "KPHX"
+
+@patch('app.services.metar_service.AWCMetarService.get')
+def test_get_metar_batch(mock_get):
+    from app.services.metar_service import metar_cache
+    metar_cache.clear()
+    mock_get.return_value = [
+        {"icaoId": "KJFK", "rawOb": "KJFK 011151Z 18009KT 10SM FEW050 23/17 A2987", "flightCategory": "VFR", "temp": 23, "dewp": 17, "wspd": 9, "wdir": 180, "visib": "10+"},
+        {"icaoId": "KLGA", "rawOb": "KLGA 011151Z 20008KT 3SM BR OVC008 18/17 A2990", "flightCategory": "IFR", "temp": 18, "dewp": 17, "wspd": 8, "wdir": 200, "visib": 3},
+        {"icaoId": "KJFK", "rawOb": "KJFK 011051Z 18007KT 10SM FEW050 22/17 A2988", "flightCategory": "VFR"}
+    ]
+    
+    response = client.get("/api/v1/metar?ids=kjfk,KLGA,KXYZ")
+    
+    assert response.status_code == 200
+    assert mock_get.call_count == 1
+    assert mock_get.call_args.kwargs["params"]["ids"] == "KJFK,KLGA,KXYZ"
+    data = response.json()
+    assert list(data.keys()) == ["KJFK", "KLGA", "KXYZ"]
+    assert data["KJFK"]["raw_text"].startswith("KJFK 011151Z")
+    assert data["KJFK"]["visibility"] == 10.0
+    assert data["KLGA"]["flight_category"] == "IFR"
+    assert data["KXYZ"]["raw_text"] == "No METAR data available for KXYZ"
+    metar_cache.clear()
+
+def test_get_metar_batch_rejects_empty_ids():
+    response = client.get("/api/v1/metar?ids=,")
+    assert response.status_code == 400
+
+@patch('app.services.metar_service.AWCMetarService.get_metar')
+def test_get_metar_reports_age(mock_get_metar):
+    mock_get_metar.return_value = MetarResponse(
+        source="AWC",
+        station="KPHX",
+        raw_text="KPHX 201751Z 27019G35KT 10SM FEW045 FEW250 30/06 A2992",
+        data_age_seconds=42.7
+    )
+
+    response = client.get("/api/v1/metar/KPHX")
+
+    assert response.status_code == 200
+    assert response.headers["Age"] == "42"
+    assert response.json()["data_age_seconds"] == 42.7
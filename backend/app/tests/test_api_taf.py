@@ -114,3 +114,22 @@ async def test_get_taf_multi(mock_avwx_get_taf, mock_awc_get_taf):
     assert data[1]["source"] == "AVWX"
     assert data[0]["station"] == "KPHX"
     assert data[1]["station"] == "KPHX"
+
+@patch('app.services.taf_service.AWCTafService.get')
+def test_get_taf_batch(mock_get):
+    from app.services.taf_service import taf_cache
+    taf_cache.clear()
+    mock_get.return_value = [
+        {"icaoId": "KPHX", "rawTAF": "TAF KPHX 201738Z 2018/2118 27015G25KT P6SM FEW120 SCT250", "issueTime": "2024-05-20T17:38:00Z"},
+        {"icaoId": "KLAX", "rawTAF": "TAF KLAX 201738Z 2018/2124 25010KT P6SM SCT020", "issueTime": "2024-05-20T17:38:00Z"}
+    ]
+    
+    response = client.get("/api/v1/taf?ids=KPHX,KLAX")
+    
+    assert response.status_code == 200
+    assert mock_get.call_count == 1
+    data = response.json()
+    assert set(data.keys()) == {"KPHX", "KLAX"}
+    assert data["KLAX"]["raw_text"].startswith("TAF KLAX")
+    assert data["KPHX"]["issue_time"].startswith("2024-05-20T17:38")
+    taf_cache.clear()
@@ -0,0 +1,76 @@
+import asyncio
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.api.api import app
+from app.core.config import settings
+from app.schemas.weather import MetarResponse, TafResponse
+
+client = TestClient(app)
+
+def _metar(station, hours=1):
+    return MetarResponse(source="AWC", station=station, raw_text=f"{station} 201751Z 27019KT 10SM FEW045 30/06 A2992")
+
+@patch("app.services.taf_service.FailoverTafService.get_taf")
+@patch("app.services.metar_service.AWCMetarService.get_metar")
+def test_batch_returns_results_in_order_with_status(mock_metar, mock_taf):
+    mock_metar.side_effect = _metar
+    mock_taf.return_value = TafResponse(source="AWC", station="KLAX", raw_text="TAF KLAX 201720Z 2018/2118 25010KT P6SM")
+
+    response = client.post("/api/v1/batch", json={"requests": [
+        {"path": "/metar/KPHX?fields=station"},
+        {"path": "/api/v1/taf/KLAX"},
+        {"path": "/metar/KPHX?fields=bogus"},
+        {"path": "/airport-summary/KPHX/stream"},
+        {"path": "/no-such-route"},
+        {"path": "/api/v1/subscribe?ids=KJFK"},
+    ]})
+
+    assert response.status_code == 200
+    results = response.json()["responses"]
+    assert [result["status"] for result in results] == [200, 200, 400, 400, 404, 400]
+    assert results[0]["body"] == {"station": "KPHX"}
+    assert results[0]["headers"]["etag"].startswith('"')
+    assert results[1]["body"]["raw_text"].startswith("TAF KLAX")
+    assert "cannot be batched" in results[3]["body"]["detail"]
+    assert results[5]["body"]["detail"] == "/subscribe cannot be batched"
+
+def test_batch_rejects_paths_that_resolve_elsewhere():
+    paths = ["/taf/../subscribe", "/metar/x/../../batch", "/%62atch", "/metar/./KPHX", "/api/v1/metar%2FKPHX"]
+    results = client.post("/api/v1/batch", json={"requests": [{"path": path} for path in paths]}).json()["responses"]
+
+    assert [result["status"] for result in results] == [400] * len(paths)
+    assert all("dot segments or percent-escapes" in result["body"]["detail"] for result in results)
+
+@patch("app.services.metar_service.AWCMetarService.get_metar")
+def test_batch_sub_requests_can_revalidate(mock_metar):
+    mock_metar.side_effect = _metar
+    etag = client.get("/api/v1/metar/KPHX").headers["etag"]
+
+    result = client.post("/api/v1/batch", json={"requests": [
+        {"path": "/metar/KPHX", "headers": {"If-None-Match": etag}}
+    ]}).json()["responses"][0]
+    assert result["status"] == 304
+    assert result["body"] is None
+
+@patch("app.services.metar_service.AWCMetarService.get_metar")
+def test_batch_deadline_covers_the_whole_batch(mock_metar):
+    async def slow_metar(station, hours=1):
+        if station == "KSLO":
+            await asyncio.sleep(5)
+        return _metar(station)
+    mock_metar.side_effect = slow_metar
+
+    response = client.post("/api/v1/batch", json={"timeout": 0.2, "requests": [
+        {"path": "/metar/KPHX"}, {"path": "/metar/KSLO"}
+    ]})
+
+    assert [result["status"] for result in response.json()["responses"]] == [200, 504]
+    assert response.json()["elapsed_ms"] < 2000
+
+def test_batch_size_is_limited(monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_MAX_REQUESTS", 2)
+    response = client.post("/api/v1/batch", json={"requests": [{"path": "/health"}] * 3})
+    assert response.status_code == 400
+    assert client.post("/api/v1/batch", json={"requests": []}).status_code == 422
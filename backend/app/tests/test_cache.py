@@ -0,0 +1,168 @@
+import asyncio
+import time
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.schemas.weather import MetarResponse
+from app.services.cache import AsyncTTLCache
+from app.services.metar_service import AWCMetarService, metar_bbox_cache, metar_cache
+from app.services.report_cycle import metar_ttl, taf_ttl
+
+def test_lru_eviction_and_stats():
+    cache = AsyncTTLCache("test-lru", max_entries=2)
+    cache.set("KJFK", 1, ttl=60)
+    cache.set("KLGA", 2, ttl=60)
+    assert cache.get("KJFK") == 1  # KLGA is now least recently used
+    cache.set("KEWR", 3, ttl=60)
+
+    assert cache.get("KLGA") is None
+    assert cache.get("KEWR") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+def test_expired_entries_are_misses():
+    cache = AsyncTTLCache("test-expiry")
+    cache.set("KJFK", 1, ttl=60)
+    with patch("app.services.cache.time.monotonic", return_value=10 ** 9):
+        assert cache.get("KJFK") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_metar_ttl_follows_observation_cycle():
+    now = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+
+    # Observed at 12:00 -> next routine METAR due ~13:00 plus grace, bounded by the max TTL
+    observed = {"time": {"datetime": now - timedelta(minutes=30)}}
+    expected = min(30 * 60 + settings.METAR_PUBLISH_GRACE, settings.METAR_CACHE_MAX_TTL)
+    assert metar_ttl(observed, now=now) == expected
+
+    # Next report is overdue -> short TTL so we pick it up quickly
+    overdue = {"time": {"datetime": now - timedelta(hours=2)}}
+    assert metar_ttl(overdue, now=now) == settings.METAR_CACHE_MIN_TTL
+
+    # AWC obsTime (epoch seconds) is used when the parser has no time
+    raw = {"obsTime": int((now - timedelta(minutes=58)).timestamp())}
+    assert metar_ttl({}, raw, now=now) == 2 * 60 + settings.METAR_PUBLISH_GRACE
+
+def test_taf_ttl_follows_issue_cycle():
+    now = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    assert taf_ttl(now - timedelta(hours=1), now=now) == settings.TAF_CACHE_MAX_TTL
+    assert taf_ttl(now - timedelta(hours=7), now=now) == settings.TAF_CACHE_MIN_TTL
+    assert taf_ttl(None, now=now) == settings.TAF_CACHE_MIN_TTL
+
+@pytest.mark.asyncio
+async def test_metar_service_serves_from_cache():
+    metar_cache.clear()
+    fresh = MetarResponse(
+        source="AWC",
+        station="KPHX",
+        raw_text="KPHX 011151Z 27005KT 10SM CLR 30/06 A2992",
+        parsed_metar={"time": {"datetime": datetime.now(timezone.utc)}},
+        raw_data={"rawOb": "KPHX 011151Z 27005KT 10SM CLR 30/06 A2992"}
+    )
+
+    async def fetch(station, hours):
+        await asyncio.sleep(0)
+        return fresh
+
+    service = AWCMetarService()
+    with patch.object(AWCMetarService, "_fetch_metar", side_effect=fetch) as mock_fetch:
+        first, second = await asyncio.gather(service.get_metar("KPHX"), service.get_metar("kphx"))
+        third = await service.get_metar("KPHX")
+
+    assert mock_fetch.call_count == 1
+    assert first.raw_text == third.raw_text
+
+    # Responses handed to callers are copies, so decorating them leaves the cache intact
+    third.pilot_summary = "changed"
+    assert metar_cache.get(("KPHX", 1)).pilot_summary is None
+    metar_cache.clear()
+
+@pytest.mark.asyncio
+async def test_bbox_results_do_not_share_the_station_cache():
+    metar_cache.clear()
+    metar_bbox_cache.clear()
+    record = {"icaoId": "KPHX", "rawOb": "KPHX 011151Z 27005KT 10SM CLR 30/06 A2992",
+              "obsTime": int(time.time()) - 60, "lat": 33.43, "lon": -112.01}
+
+    service = AWCMetarService()
+    with patch("app.services.metar_service.metar_store.records", return_value={}), \
+            patch.object(AWCMetarService, "get", return_value=[record]) as mock_get:
+        metars = await service.get_metars_in_bbox((33.0, -113.0, 34.0, -111.0))
+        await service.get_metars_in_bbox((33.0, -113.0, 34.0, -111.0))
+
+    assert list(metars) == ["KPHX"]
+    assert mock_get.call_count == 1
+    # The station entry is written for single-station lookups; the bbox map lives apart
+    assert metar_cache.stats()["size"] == 1 and metar_cache.get(("KPHX", 1)) is not None
+    assert metar_bbox_cache.stats()["size"] == 1
+    metar_cache.clear()
+    metar_bbox_cache.clear()
+
+@pytest.mark.asyncio
+async def test_error_responses_are_not_cached():
+    metar_cache.clear()
+
+    async def fetch(station, hours):
+        return MetarResponse(source="AWC", station=station, raw_text="Error fetching METAR: timeout")
+
+    service = AWCMetarService()
+    with patch.object(AWCMetarService, "_fetch_metar", side_effect=fetch) as mock_fetch:
+        await service.get_metar("KPHX")
+        await service.get_metar("KPHX")
+
+    assert mock_fetch.call_count == 2
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_served_while_refreshing():
+    cache = AsyncTTLCache("test-swr")
+    calls = []
+
+    async def loader():
+        calls.append(len(calls))
+        return len(calls)
+
+    assert await cache.fetch("KJFK", loader, lambda value: 60, stale_ttl=600) == (1, 0.0)
+
+    # Past the soft TTL but inside the stale window: old value now, refresh in the background
+    later = time.monotonic() + 120
+    with patch("app.services.cache.time.monotonic", return_value=later):
+        value, age = await cache.fetch("KJFK", loader, lambda value: 60, stale_ttl=600)
+        assert value == 1
+        assert age >= 120
+        await asyncio.gather(*cache._refreshes)
+
+    assert len(calls) == 2
+    assert cache.get("KJFK") == 2
+    stats = cache.stats()
+    assert stats["stale_hits"] == 1
+    assert stats["background_refreshes"] == 1
+
+@pytest.mark.asyncio
+async def test_hard_expired_entries_block_on_reload():
+    cache = AsyncTTLCache("test-swr-hard")
+
+    async def loader():
+        return "fresh"
+
+    cache.set("KJFK", "old", ttl=60, stale_ttl=60)
+    with patch("app.services.cache.time.monotonic", return_value=time.monotonic() + 600):
+        assert await cache.fetch("KJFK", loader, lambda value: 60, stale_ttl=60) == ("fresh", 0.0)
+
+@pytest.mark.asyncio
+async def test_failed_background_refresh_keeps_stale_value():
+    cache = AsyncTTLCache("test-swr-failure")
+    cache.set("KJFK", "old", ttl=60, stale_ttl=600)
+
+    async def loader():
+        raise RuntimeError("upstream down")
+
+    with patch("app.services.cache.time.monotonic", return_value=time.monotonic() + 120):
+        value, _ = await cache.fetch("KJFK", loader, lambda value: 60, stale_ttl=600)
+        await asyncio.gather(*cache._refreshes)
+        assert value == "old"
+        assert cache.get_entry("KJFK").value == "old"
+    assert cache.stats()["background_refresh_failures"] == 1
@@ -0,0 +1,39 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.services.base_client import BaseApiClient
+from app.services.conditional_get import upstream_validators
+
+@pytest.mark.asyncio
+async def test_not_modified_reuses_parsed_result():
+    upstream_validators.clear()
+    seen = []
+
+    async def airsigmet(request):
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers={"ETag": '"v1"'})
+        return web.json_response({"data": [{"hazard": "ICE"}]}, headers={"ETag": '"v1"'})
+
+    app = web.Application()
+    app.router.add_get("/data/api/airsigmet", airsigmet)
+    server = TestServer(app)
+    await server.start_server()
+    client = BaseApiClient(base_url=str(server.make_url("")).rstrip("/"))
+    try:
+        first = await client.get("/data/api/airsigmet", params={"format": "json"})
+        second = await client.get("/data/api/airsigmet", params={"format": "json"})
+    finally:
+        await client.close()
+        await server.close()
+
+    assert seen == [None, '"v1"']
+    assert second is first  # reused without reparsing
+    assert upstream_validators.stats()["not_modified"] == 1
+    upstream_validators.clear()
+
+def test_responses_without_validators_are_not_stored():
+    upstream_validators.clear()
+    upstream_validators.store("key", None, None, {"data": []})
+    assert upstream_validators.get("key") is None
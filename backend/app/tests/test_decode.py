@@ -0,0 +1,17 @@
+from app.services.base_client import decode_body
+
+def test_json_is_parsed_from_bytes():
+    body = b'  \n[{"icaoId": "KJFK", "rawOb": "KJFK 011151Z 18009KT"}]'
+    assert decode_body(body, "application/json", None) == [{"icaoId": "KJFK", "rawOb": "KJFK 011151Z 18009KT"}]
+
+def test_json_served_as_text_plain_is_sniffed():
+    assert decode_body(b'{"data": []}', "text/plain", "utf-8") == {"data": []}
+
+def test_text_responses_are_decoded():
+    body = "KJFK UA /OV JFK/TM 1200/FL050/TP B738/TB LGT\n".encode()
+    assert decode_body(body, "text/plain", None, response_type="text") == body.decode()
+    # Text that is not JSON is returned as-is even when JSON was expected
+    assert decode_body(b"No data", "text/plain", None) == "No data"
+
+def test_invalid_json_falls_back_to_text():
+    assert decode_body(b"[not json", "application/json", None) == "[not json"
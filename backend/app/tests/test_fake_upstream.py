@@ -0,0 +1,72 @@
+import aiohttp
+import pytest
+from aiohttp.test_utils import TestServer
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.services.metar_service import AWCMetarService, metar_cache
+from app.services.pirep_service import PirepService, pirep_cache
+from app.testing.fake_upstream import FakeUpstream, FaultConfig
+
+@pytest.fixture
+async def fake_upstream():
+    fake = FakeUpstream(faults=FaultConfig(seed=1))
+    server = TestServer(fake.make_app())
+    await server.start_server()
+    metar_cache.clear()
+    pirep_cache.clear()
+    with patch.object(settings, "AWC_BASE_URL", str(server.make_url("")).rstrip("/")):
+        yield fake, server
+    metar_cache.clear()
+    pirep_cache.clear()
+    await server.close()
+
+@pytest.mark.asyncio
+async def test_services_replay_recorded_payloads(fake_upstream):
+    fake, _ = fake_upstream
+    service = AWCMetarService()
+    try:
+        metars = await service.get_metars(["KJFK", "KPHX"])
+    finally:
+        await service.close()
+
+    assert metars["KJFK"].raw_text.startswith("KJFK 011151Z")
+    assert metars["KPHX"].wind_speed == 19
+    assert fake.stats["by_path"]["/api/data/metar"] == 1
+
+@pytest.mark.asyncio
+async def test_injected_errors_surface_as_error_responses(fake_upstream):
+    fake, _ = fake_upstream
+    fake.configure(error_rate=1.0, error_status=502)
+    service = PirepService()
+    try:
+        pireps = await service.get_pireps("KPHX")
+    finally:
+        await service.close()
+
+    assert pireps[0].raw_text.startswith("Error fetching PIREPs")
+    assert fake.stats["errors_injected"] == 1
+
+@pytest.mark.asyncio
+async def test_bbox_pireps_carry_their_positions(fake_upstream):
+    service = PirepService()
+    try:
+        pireps = await service._fetch_pireps_in_bbox((32.0, -114.0, 35.0, -110.0))
+    finally:
+        await service.close()
+
+    assert [(pirep.location, pirep.report_type) for pirep in pireps] == [("PHX", "UA"), ("PHX", "UUA")]
+    assert pireps[1].raw_text.startswith("UUA /OV PHX090030")
+    assert (pireps[1].raw_data["lat"], pireps[1].raw_data["lon"]) == (33.43, -111.41)
+
+@pytest.mark.asyncio
+async def test_rate_limit_simulation_returns_429(fake_upstream):
+    fake, server = fake_upstream
+    fake.configure(rate_limit=1, rate_window=60)
+    async with aiohttp.ClientSession() as session:
+        first = await session.get(server.make_url("/data/api/airsigmet"), params={"format": "json"})
+        second = await session.get(server.make_url("/data/api/airsigmet"), params={"format": "json"})
+
+    assert first.status == 200
+    assert second.status == 429
+    assert int(second.headers["Retry-After"]) >= 1
@@ -0,0 +1,138 @@
+import asyncio
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.api.api import app
+from app.api.compression import negotiate_encoding
+from app.api.etag import matching_etag
+from app.schemas.weather import MetarResponse, SigmetResponse, TafResponse
+from app.services import summary_policy
+
+client = TestClient(app)
+
+def _sigmets(raw_text="CONVECTIVE SIGMET 12C VALID UNTIL 1955Z"):
+    return [
+        SigmetResponse(source="AWC", id=str(index), raw_text=raw_text, phenomenon="CONVECTIVE",
+                       area=[{"lat": 30.0 + point, "lon": -100.0 + point} for point in range(8)])
+        for index in range(20)
+    ]
+
+def test_negotiate_encoding(monkeypatch):
+    monkeypatch.setattr("app.api.compression.SUPPORTED_ENCODINGS", ("br", "gzip"))
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+    assert negotiate_encoding("br;q=0.5, gzip") == "gzip"
+    assert negotiate_encoding("br;q=0, *;q=0.1") == "gzip"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding(None) is None
+
+    monkeypatch.setattr("app.api.compression.SUPPORTED_ENCODINGS", ("gzip",))
+    assert negotiate_encoding("br, gzip;q=0.2") == "gzip"
+
+def test_etag_matching_ignores_weak_prefix_and_compression_suffix():
+    assert matching_etag('"abd", W/"abc"', '"abc"') == 'W/"abc"'
+    assert matching_etag('"abc-br"', '"abc"') == '"abc-br"'
+    assert matching_etag("*", '"abc"') == '"abc"'
+    assert matching_etag('"abd"', '"abc"') is None
+
+@patch("app.services.sigmet_service.FailoverSigmetService.get_sigmets")
+def test_large_responses_are_compressed(mock_sigmets):
+    mock_sigmets.return_value = _sigmets()
+
+    response = client.get("/api/v1/sigmet", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"].endswith('-gzip"')
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()) == 20
+
+    plain = client.get("/api/v1/sigmet", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == response.json()
+    assert int(response.headers["content-length"]) < len(plain.content)
+
+@patch("app.services.metar_service.AWCMetarService.get_metar")
+def test_small_responses_are_not_compressed(mock_metar):
+    mock_metar.return_value = MetarResponse(source="AWC", station="KPHX", raw_text="KPHX 201751Z 27019KT")
+
+    response = client.get("/api/v1/metar/KPHX?fields=station", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+@patch("app.services.sigmet_service.FailoverSigmetService.get_sigmets")
+def test_unchanged_reports_are_revalidated_with_304(mock_sigmets):
+    mock_sigmets.side_effect = lambda *args, **kwargs: _sigmets()
+
+    first = client.get("/api/v1/sigmet")
+    etag = first.headers["etag"]
+
+    with patch("app.api.v1.endpoints.fast_response") as mock_fast_response:
+        repeat = client.get("/api/v1/sigmet", headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+    assert repeat.headers["etag"] == etag
+    mock_fast_response.assert_not_called()
+
+    # A different representation of the same reports has its own tag
+    assert client.get("/api/v1/sigmet?fields=id").headers["etag"] != etag
+
+    # An amended report changes the tag
+    mock_sigmets.side_effect = lambda *args, **kwargs: _sigmets("CONVECTIVE SIGMET 12C AMD")
+    changed = client.get("/api/v1/sigmet", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+@patch("app.api.v1.endpoints.summarize")
+@patch("app.services.metar_service.AWCMetarService.get_metar")
+def test_revalidation_happens_before_summaries(mock_metar, mock_summarize):
+    mock_metar.side_effect = lambda *args, **kwargs: MetarResponse(
+        source="AWC", station="KPHX", raw_text="KPHX 201751Z 27019KT 10SM FEW045 30/06 A2992")
+    mock_summarize.return_value = ("VFR, wind 270 at 19 knots", "local")
+
+    first = client.get("/api/v1/metar/KPHX?include_summary=true&summary_mode=local")
+    assert first.json()["pilot_summary"] == "VFR, wind 270 at 19 knots"
+
+    # A summary worded differently does not change the tag
+    mock_summarize.return_value = ("VFR; winds 270/19", "llm")
+    mock_summarize.reset_mock()
+    repeat = client.get("/api/v1/metar/KPHX?include_summary=true&summary_mode=local",
+                        headers={"If-None-Match": first.headers["etag"]})
+    assert repeat.status_code == 304
+    mock_summarize.assert_not_called()
+
+@patch("app.api.v1.endpoints.summarize")
+@patch("app.services.taf_service.FailoverTafService.get_taf")
+def test_cockpit_routes_are_revalidated(mock_taf, mock_summarize):
+    mock_taf.side_effect = lambda *args, **kwargs: TafResponse(
+        source="AWC", station="KPHX", raw_text="TAF KPHX 201720Z 2018/2118 27012KT P6SM FEW080")
+    mock_summarize.return_value = (None, "local")
+
+    first = client.get("/api/v1/cockpit/taf/KPHX")
+    assert first.status_code == 200
+    repeat = client.get("/api/v1/cockpit/taf/KPHX", headers={"If-None-Match": first.headers["etag"]})
+    assert repeat.status_code == 304
+    assert mock_summarize.call_count == 1
+
+@patch("app.services.metar_service.AWCMetarService.get_metar")
+def test_degraded_summaries_are_not_revalidated(mock_metar, monkeypatch):
+    mock_metar.side_effect = lambda *args, **kwargs: MetarResponse(
+        source="AWC", station="KPHX", raw_text="KPHX 201751Z 27019KT 3SM +TSRA BKN045CB", pilot_summary="Thunderstorms.")
+    delay = 5
+
+    async def llm_summary(*args, **kwargs):
+        await asyncio.sleep(delay)
+        return "AI summary"
+
+    monkeypatch.setattr(summary_policy.settings, "SUMMARY_LLM_BUDGET_SECONDS", 0.05)
+    monkeypatch.setattr(summary_policy.openai_service, "generate_summary", llm_summary)
+    url = "/api/v1/metar/KPHX?include_summary=true&summary_mode=auto"
+
+    # The AI summary missed its budget: the local one is sent without a tag to revalidate
+    degraded = client.get(url)
+    assert degraded.json()["pilot_summary"] == "Thunderstorms."
+    assert "etag" not in degraded.headers
+
+    # So the next conditional request gets the AI summary, which is tagged
+    delay = 0
+    repeat = client.get(url, headers={"If-None-Match": '"' + "0" * 32 + '"'})
+    assert repeat.status_code == 200
+    assert repeat.json()["pilot_summary"] == "AI summary"
+    assert client.get(url, headers={"If-None-Match": repeat.headers["etag"]}).status_code == 304
@@ -0,0 +1,35 @@
+import pytest
+
+from app.services.http_client import UpstreamClientRegistry
+from app.services.metar_service import AWCMetarService
+
+@pytest.mark.asyncio
+async def test_registry_reuses_session_per_host():
+    registry = UpstreamClientRegistry(limit_per_host=4)
+    try:
+        first = await registry.get_session("https://aviationweather.gov")
+        second = await registry.get_session("https://AVIATIONWEATHER.gov/api/data")
+        other = await registry.get_session("https://avwx.rest/api")
+
+        assert first is second
+        assert first is not other
+        assert first.connector.limit_per_host == 4
+    finally:
+        await registry.close()
+
+    assert first.closed
+    assert other.closed
+
+@pytest.mark.asyncio
+async def test_service_uses_pooled_session():
+    registry = UpstreamClientRegistry()
+    try:
+        service = AWCMetarService(registry=registry)
+        session = await service._get_session()
+        assert session is await registry.get_session("https://aviationweather.gov")
+
+        # Closing a pooled service must not close the shared session
+        await service.close()
+        assert not session.closed
+    finally:
+        await registry.close()
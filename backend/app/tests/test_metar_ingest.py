@@ -0,0 +1,91 @@
+import gzip
+import pytest
+from unittest.mock import patch
+
+from app.services.metar_ingest import MetarBulkIngester, MetarStationStore
+from app.services.metar_service import AWCMetarService
+
+CSV_FEED = """No errors
+No warnings
+5 ms
+data source=metars
+2 results
+raw_text,station_id,observation_time,latitude,longitude,temp_c,dewpoint_c,wind_dir_degrees,wind_speed_kt,wind_gust_kt,visibility_statute_mi,altim_in_hg,sky_cover,cloud_base_ft_agl,sky_cover,cloud_base_ft_agl,flight_category,metar_type,elevation_m
+KJFK 011151Z 18009KT 10SM FEW050 BKN250 23/17 A2987,KJFK,2024-05-01T11:51:00Z,40.64,-73.76,23.0,17.0,180,9,,10+,29.87,FEW,5000,BKN,25000,VFR,METAR,4
+KLGA 011151Z VRB03KT 2SM BR OVC006 18/17 A2990,KLGA,2024-05-01T11:51:00Z,40.78,-73.88,18.0,17.0,VRB,3,,2.0,29.90,OVC,600,,,IFR,METAR,6
+KJFK 011051Z 18007KT 10SM FEW050 22/17 A2988,KJFK,2024-05-01T10:51:00Z,40.64,-73.76,22.0,17.0,180,7,,10+,29.88,FEW,5000,,,VFR,METAR,4
+"""
+
+XML_FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<response><data num_results="1">
+<METAR><raw_text>KPHX 011151Z 27005KT 10SM CLR 30/06 A2992</raw_text><station_id>KPHX</station_id>
+<observation_time>2024-05-01T11:51:00Z</observation_time><temp_c>30.0</temp_c><wind_dir_degrees>270</wind_dir_degrees>
+<wind_speed_kt>5</wind_speed_kt><sky_condition sky_cover="CLR" /><flight_category>VFR</flight_category></METAR>
+</data></response>
+"""
+
+@pytest.mark.asyncio
+async def test_ingest_gzipped_csv(tmp_path):
+    feed = tmp_path / "metars.cache.csv.gz"
+    feed.write_bytes(gzip.compress(CSV_FEED.encode()))
+    store = MetarStationStore(max_staleness=600)
+    ingester = MetarBulkIngester(store, feed_url=f"file://{feed}")
+
+    assert await ingester.ingest_once() == 2
+
+    jfk = store.get("kjfk")
+    assert jfk["rawOb"].startswith("KJFK 011151Z")  # newest report wins
+    assert jfk["clouds"] == [{"cover": "FEW", "base": 5000}, {"cover": "BKN", "base": 25000}]
+    assert jfk["visib"] == "10+"
+    assert store.get("KLGA")["wdir"] == "VRB"
+    assert store.get("KLGA")["clouds"] == [{"cover": "OVC", "base": 600}]
+
+@pytest.mark.asyncio
+async def test_ingest_plain_xml(tmp_path):
+    feed = tmp_path / "metars.xml"
+    feed.write_text(XML_FEED)
+    store = MetarStationStore(max_staleness=600)
+
+    assert await MetarBulkIngester(store, feed_url=str(feed)).ingest_once() == 1
+    assert store.get("KPHX")["temp"] == 30
+    assert store.get("KPHX")["clouds"] == [{"cover": "CLR", "base": None}]
+
+@pytest.mark.asyncio
+async def test_metar_service_serves_from_store(tmp_path):
+    feed = tmp_path / "metars.csv"
+    feed.write_text(CSV_FEED)
+    store = MetarStationStore(max_staleness=600)
+    await MetarBulkIngester(store, feed_url=str(feed)).ingest_once()
+
+    service = AWCMetarService()
+    with patch("app.services.metar_service.metar_store", store), \
+         patch.object(AWCMetarService, "get") as mock_get:
+        metar = await service.get_metar("KLGA")
+        batch = await service.get_metars(["KJFK", "KLGA"])
+
+    mock_get.assert_not_called()
+    assert metar.flight_category == "IFR"
+    assert metar.wind_direction is None
+    assert metar.ceiling == 600
+    assert batch["KJFK"].visibility == 10.0
+
+def test_stale_store_is_not_served():
+    store = MetarStationStore(max_staleness=0)
+    store.replace({"KJFK": {"icaoId": "KJFK", "rawOb": "KJFK 011151Z 18009KT 10SM FEW050 23/17 A2987"}})
+    with patch("app.services.metar_ingest.time.monotonic", return_value=10 ** 9):
+        assert store.get("KJFK") is None
+
+def test_built_responses_are_dropped_with_their_reports():
+    store = MetarStationStore()
+    store.replace({
+        "KJFK": {"icaoId": "KJFK", "rawOb": "KJFK 011151Z 18009KT 10SM FEW050 23/17 A2987", "obsTime": 1},
+        "KLGA": {"icaoId": "KLGA", "rawOb": "KLGA 011151Z 20008KT 10SM SCT040 22/16 A2988", "obsTime": 1},
+    })
+    builder = lambda station, record: record["rawOb"]
+    assert store.get_built("KJFK", builder) and store.get_built("KLGA", builder)
+
+    # KJFK reports again and KLGA leaves the feed
+    store.replace({"KJFK": {"icaoId": "KJFK", "rawOb": "KJFK 011251Z 19010KT 10SM FEW050 24/17 A2986", "obsTime": 2}})
+    assert store._built == {}
+    assert store.get_built("KJFK", builder).startswith("KJFK 011251Z")
+    assert list(store._built) == [("KJFK", 2)]
@@ -0,0 +1,59 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.api.api import app
+from app.core.metrics import MetricsRegistry, PARSER_DURATION
+from app.services.base_client import metric_endpoint
+from app.services.metar_parser import parse_metar
+
+client = TestClient(app)
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_seconds", "Test latency", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5.0, "/a")
+
+    text = registry.render()
+    assert "# TYPE test_seconds histogram" in text
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'test_seconds_count{route="/a"} 3' in text
+    assert histogram.count("/a") == 3
+
+def test_counter_and_callback_gauge_render():
+    registry = MetricsRegistry()
+    counter = registry.counter("test_total", "Test counter", ("status",))
+    counter.inc("200")
+    counter.inc("200", amount=2)
+    registry.gauge_callback("test_size", "Test gauge", ("cache",), lambda: [(("metar",), 7)])
+
+    text = registry.render()
+    assert 'test_total{status="200"} 3' in text
+    assert 'test_size{cache="metar"} 7' in text
+
+def test_metric_endpoint_collapses_station_ids():
+    assert metric_endpoint("/taf/KPHX") == "/taf/{station}"
+    assert metric_endpoint("/api/data/metar") == "/api/data/metar"
+
+def test_parser_duration_recorded():
+    before = PARSER_DURATION.count("metar")
+    parse_metar("KPHX 201751Z 27019G35KT 10SM FEW045 30/06 A2992")
+    assert PARSER_DURATION.count("metar") == before + 1
+
+@patch("app.services.sigmet_service.FailoverSigmetService.get_sigmets")
+def test_metrics_endpoint_reports_route_latency(mock_get_sigmets):
+    mock_get_sigmets.return_value = []
+    assert client.get("/api/v1/sigmet").status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'http_requests_total{route="/api/v1/sigmet",method="GET",status="200"}' in text
+    assert 'http_request_duration_seconds_count{route="/api/v1/sigmet",method="GET"}' in text
+    assert 'http_handler_duration_seconds_count{route="/api/v1/sigmet"}' in text
+    assert "# TYPE cache_hit_ratio gauge" in text
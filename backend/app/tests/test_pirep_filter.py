@@ -0,0 +1,61 @@
+from app.schemas.weather import PirepResponse
+from app.services.pirep_filter import (
+    SEVERITY_LIGHT_MODERATE, SEVERITY_NONE, SEVERITY_SEVERE, SEVERITY_TRACE, Hazard, filter_pireps,
+)
+from app.services.pirep_service import PirepService
+
+def _pirep(raw_text, location="PHX"):
+    pirep = PirepResponse(source="AWC", location=location, raw_text=raw_text)
+    PirepService()._extract_pirep_fields(pirep, raw_text)
+    return pirep
+
+def _reports():
+    return [
+        _pirep("UA /OV PHX/TM 1800/FL080/TP C172/TB LGT-MOD"),
+        _pirep("UUA /OV PHX 090010/TM 1805/FL120/TP B737/TB SEV/IC MOD RIME", location="PHX 090010"),
+        _pirep("UA /OV TUS/TM 1810/FL250/TP A320/IC TRC", location="TUS"),
+        _pirep("UA /OV TUS/TM 1815/FLDURD/TP PA28/SK BKN030", location="TUS"),
+    ]
+
+def test_extract_sets_numeric_hazard_fields():
+    light_moderate, severe, trace, clear = _reports()
+    assert light_moderate.hazard_flags == Hazard.TURBULENCE
+    assert light_moderate.turbulence_level == SEVERITY_LIGHT_MODERATE
+    assert severe.hazard_flags == Hazard.TURBULENCE | Hazard.ICING | Hazard.URGENT
+    assert severe.turbulence_level == SEVERITY_SEVERE
+    assert trace.hazard_flags == Hazard.ICING and trace.icing_level == SEVERITY_TRACE
+    assert clear.hazard_flags == 0 and clear.turbulence_level == clear.icing_level == SEVERITY_NONE
+
+def test_severity_filter_matches_ranges_and_either_hazard():
+    def altitudes(**filters):
+        return [p.altitude for p in filter_pireps(_reports(), **filters)[0]]
+
+    # LGT-MOD counts as both light and moderate; trace icing counts as light
+    assert altitudes(severity="light") == [8000, 25000]
+    assert altitudes(severity="moderate") == [8000, 12000]
+    assert altitudes(severity="severe") == [12000]
+    assert altitudes(severity="extreme") == []
+
+def test_hazard_and_flight_level_filters():
+    def altitudes(**filters):
+        return [p.altitude for p in filter_pireps(_reports(), **filters)[0]]
+
+    assert altitudes(hazard_type="both") == [12000]
+    assert altitudes(hazard_type="any") == [8000, 12000, 25000]
+    assert altitudes(hazard_type="icing") == [12000, 25000]
+    assert altitudes(hazard_type="other") == [8000, 12000, 25000, "DURD"]
+    # Reports without a numeric altitude are dropped by flight level filters
+    assert altitudes(flight_level_min=80, flight_level_max=120) == [8000, 12000]
+
+def test_grouping_and_stats_in_one_pass():
+    kept, grouped, stats = filter_pireps(_reports())
+
+    assert len(kept) == 4
+    assert {key: len(items) for key, items in grouped.items()} == {"PHX": 2, "TUS": 2}
+    assert stats == {
+        "total_count": 4,
+        "turbulence_count": 2,
+        "icing_count": 2,
+        "urgent_count": 1,
+        "altitude_distribution": {"5-10k": 1, "10-15k": 1, "25-30k": 1},
+    }
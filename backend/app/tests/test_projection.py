@@ -0,0 +1,51 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.api.api import app
+from app.core.config import settings
+from app.schemas.weather import MetarResponse, PirepResponse
+
+client = TestClient(app)
+
+def _metar():
+    return MetarResponse(
+        source="AWC", station="KPHX", raw_text="KPHX 201751Z 27019KT 10SM FEW045 30/06 A2992",
+        flight_category="VFR", parsed_metar={"station": "KPHX", "pilot_summary": "VFR"},
+        pilot_summary="VFR", raw_data={"icaoId": "KPHX", "rawOb": "KPHX 201751Z"}
+    )
+
+@patch("app.services.metar_service.AWCMetarService.get_metar")
+def test_fields_returns_only_the_listed_fields(mock_metar, monkeypatch):
+    mock_metar.return_value = _metar()
+
+    response = client.get("/api/v1/metar/KPHX?fields=station,raw_text,flight_category")
+    assert response.status_code == 200
+    assert response.json() == {"station": "KPHX", "raw_text": _metar().raw_text, "flight_category": "VFR"}
+
+    # Projected content bypasses response_model validation even without the fast path
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+    assert client.get("/api/v1/metar/KPHX?fields=station").json() == {"station": "KPHX"}
+
+@patch("app.services.metar_service.AWCMetarService.get_metar")
+def test_exclude_drops_fields(mock_metar):
+    mock_metar.return_value = _metar()
+
+    data = client.get("/api/v1/metar/KPHX?exclude=raw_data,parsed_metar").json()
+    assert "raw_data" not in data and "parsed_metar" not in data
+    assert data["station"] == "KPHX" and data["pilot_summary"] == "VFR"
+
+def test_unknown_fields_are_rejected():
+    response = client.get("/api/v1/metar/KPHX?fields=station,bogus")
+    assert response.status_code == 400
+    assert "bogus" in response.json()["detail"]
+
+@patch("app.api.v1.endpoints.summarize_many")
+@patch("app.services.pirep_service.PirepService.get_pireps")
+def test_unrequested_summaries_are_not_computed(mock_pireps, mock_summarize):
+    mock_pireps.return_value = [PirepResponse(source="AWC", location="PHX", raw_text="UA /OV PHX/TB SEV")]
+
+    response = client.get("/api/v1/pirep/KPHX?include_summary=true&fields=location,raw_text")
+
+    assert response.json() == [{"location": "PHX", "raw_text": "UA /OV PHX/TB SEV"}]
+    mock_summarize.assert_not_called()
@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.schemas.weather import TafResponse
+from app.services.provider_router import CircuitBreaker, ProviderRouter
+from app.services.taf_service import AWCTafService, FailoverTafService, taf_cache
+
+def taf(source, raw_text="TAF KPHX 201738Z 2018/2118 27015G25KT P6SM FEW120"):
+    return TafResponse(source=source, station="KPHX", raw_text=raw_text)
+
+def error_taf(source):
+    return taf(source, raw_text="Error fetching TAF: 503")
+
+@pytest.mark.asyncio
+async def test_fails_over_when_primary_errors():
+    router = ProviderRouter("test-failover")
+
+    async def awc():
+        return error_taf("AWC")
+
+    async def avwx():
+        return taf("AVWX")
+
+    result = await router.call(("AWC", awc), ("AVWX", avwx))
+    assert result.source == "AVWX"
+    assert router.stats()["failovers"] == 1
+
+@pytest.mark.asyncio
+async def test_hedges_slow_primary():
+    router = ProviderRouter("test-hedge")
+
+    async def awc():
+        await asyncio.sleep(0.5)
+        return taf("AWC")
+
+    async def avwx():
+        return taf("AVWX")
+
+    with patch.object(settings, "HEDGE_MAX_DELAY", 0.05):
+        result = await router.call(("AWC", awc), ("AVWX", avwx))
+
+    assert result.source == "AVWX"
+    assert router.hedges == 1
+    assert router.hedge_wins == 1
+
+@pytest.mark.asyncio
+async def test_cache_hits_are_not_routed():
+    taf_cache.clear()
+    router = ProviderRouter("test-cache-hits")
+    service = FailoverTafService(router=router)
+    fetched = taf("AWC").model_copy(update={"issue_time": datetime.now(timezone.utc), "raw_data": {}})
+
+    with patch.object(AWCTafService, "_fetch_taf", return_value=fetched) as mock_fetch:
+        for _ in range(3):
+            assert (await service.get_taf("KPHX")).source == "AWC"
+
+    mock_fetch.assert_called_once()
+    health = router.health("AWC")
+    assert health.calls == 1
+    assert len(health.latency) == 1
+    assert len(health.breaker._outcomes) == 1
+    taf_cache.clear()
+
+@pytest.mark.asyncio
+async def test_open_breaker_skips_primary():
+    router = ProviderRouter("test-breaker")
+    calls = []
+
+    async def awc():
+        calls.append("AWC")
+        return error_taf("AWC")
+
+    async def avwx():
+        return taf("AVWX")
+
+    for _ in range(settings.BREAKER_MIN_CALLS):
+        await router.call(("AWC", awc), ("AVWX", avwx))
+    assert router.health("AWC").breaker.state == CircuitBreaker.OPEN
+
+    calls.clear()
+    result = await router.call(("AWC", awc), ("AVWX", avwx))
+    assert result.source == "AVWX"
+    assert calls == []
+    assert router.short_circuits == 1
+
+def test_breaker_trips_on_slow_calls_and_recovers():
+    breaker = CircuitBreaker("test", min_calls=4, slow_call_seconds=1.0, slow_call_rate=0.5, open_seconds=30)
+    for latency in (0.1, 2.0, 0.1, 2.0):
+        breaker.record(True, latency)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    with patch("app.services.provider_router.time.monotonic", return_value=10 ** 9):
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow()  # only one probe at a time
+        breaker.record(True, 0.1)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_releases_half_open_breaker():
+    router = ProviderRouter("test-cancel-probe")
+    breaker = router.health("AVWX").breaker
+    breaker._trip()
+    breaker._opened_at -= breaker.open_seconds
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    async def awc():
+        return error_taf("AWC")
+
+    async def avwx():
+        await asyncio.sleep(10)
+        return taf("AVWX")
+
+    call = asyncio.ensure_future(router.call(("AWC", awc), ("AVWX", avwx)))
+    await asyncio.sleep(0.05)
+    assert not breaker.allow()  # the failover call holds the probe
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
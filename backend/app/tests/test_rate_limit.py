@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+
+from app.services.rate_limit import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    AdaptiveLimiter,
+    UpstreamThrottled,
+)
+
+def limiter(**overrides):
+    options = dict(rate=0, burst=100, initial_limit=1, min_limit=1, max_limit=4, latency_spike=5, queue_timeout=1)
+    options.update(overrides)
+    return AdaptiveLimiter("test.example", **options)
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_in_priority_order():
+    host = limiter()
+    await host.acquire()  # occupy the only slot
+    order = []
+
+    async def request(name, priority):
+        await host.acquire(priority)
+        order.append(name)
+        host.release(200, 0.01)
+
+    tasks = [
+        asyncio.create_task(request("refresh", PRIORITY_BACKGROUND)),
+        asyncio.create_task(request("cockpit", PRIORITY_INTERACTIVE)),
+    ]
+    await asyncio.sleep(0)
+    assert host.stats()["queue_depth"] == 2
+
+    host.release(200, 0.01)
+    await asyncio.gather(*tasks)
+    assert order == ["cockpit", "refresh"]
+    assert host.stats()["queued"] == 2
+
+def test_aimd_shrinks_on_overload_and_grows_on_success():
+    host = limiter(initial_limit=4)
+    host.inflight = 1
+    host.release(429, 0.1, retry_after=0)
+    assert host.stats()["concurrency_limit"] == 2
+    assert host.stats()["throttled_429"] == 1
+
+    for _ in range(10):
+        host.inflight = 1
+        host.release(200, 0.1)
+    assert host.stats()["concurrency_limit"] == 4  # capped at max_limit
+
+@pytest.mark.asyncio
+async def test_cancelled_requests_do_not_shrink_the_limit():
+    host = limiter(initial_limit=4)
+
+    async def request():
+        async with host.slot():
+            await asyncio.sleep(10)
+
+    task = asyncio.create_task(request())
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert host.stats()["concurrency_limit"] == 4
+    assert host.stats()["inflight"] == 0
+    assert host.stats()["cancelled"] == 1
+
+    # A connection error does
+    with pytest.raises(ConnectionResetError):
+        async with host.slot():
+            raise ConnectionResetError()
+    assert host.stats()["concurrency_limit"] == 2
+
+@pytest.mark.asyncio
+async def test_token_bucket_spaces_requests():
+    host = limiter(rate=50, burst=1, initial_limit=4)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await host.acquire()
+    await host.acquire()
+    assert loop.time() - started >= 0.015
+
+@pytest.mark.asyncio
+async def test_queue_timeout_raises():
+    host = limiter(queue_timeout=0.01)
+    await host.acquire()
+    with pytest.raises(UpstreamThrottled):
+        await host.acquire()
+    assert host.stats()["queue_timeouts"] == 1
+    assert host.stats()["queue_depth"] == 0
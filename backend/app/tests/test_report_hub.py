@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app.api.api import app
+from app.schemas.weather import MetarResponse, PirepResponse, TafResponse
+from app.services.report_hub import ReportHub
+
+client = TestClient(app)
+
+POSITIONS = {"KPHX": {"lat": 33.43, "lon": -112.01}, "KSFO": {"lat": 37.62, "lon": -122.37}}
+
+class FakeMetars:
+    def __init__(self):
+        self.raw = {"KPHX": "KPHX 201751Z 27019KT 10SM FEW045 30/06 A2992",
+                    "KSFO": "KSFO 201756Z 29012KT 10SM FEW010 16/11 A3001"}
+        self.calls = []
+
+    async def _load_metar_batch(self, stations, hours):
+        self.calls.append(list(stations))
+        return {s: MetarResponse(source="AWC", station=s, raw_text=self.raw[s], raw_data=POSITIONS[s]) for s in stations}
+
+class FakeTafs:
+    def __init__(self):
+        self.raw = "TAF KPHX 201720Z 2018/2118 27012KT P6SM FEW080"
+
+    async def _load_taf_batch(self, stations, hours):
+        return {s: TafResponse(source="AWC", station=s, raw_text=self.raw.replace("KPHX", s)) for s in stations}
+
+class FakePireps:
+    def __init__(self):
+        self.pireps = [PirepResponse(source="AWC", location="PHX", raw_text="UA /OV PHX/TB LGT", report_type="UA",
+                                     raw_data={"lat": 33.5, "lon": -112.2})]
+        self.bboxes = []
+
+    async def _fetch_pireps_in_bbox(self, bbox, age=1.5):
+        self.bboxes.append(bbox)
+        return list(self.pireps)
+
+def _hub(poller=False, **kwargs):
+    hub = ReportHub(interval=60, metar_service=FakeMetars(), taf_service=FakeTafs(),
+                    pirep_service=FakePireps(), **kwargs)
+    if not poller:
+        # Tests drive poll_once() themselves
+        hub.start = lambda: None
+    return hub
+
+def _drain(subscription):
+    events = []
+    while not subscription.queue.empty():
+        event = subscription.queue.get_nowait()
+        events.append((event.event, json.loads(event.data)))
+    return events
+
+async def test_hub_publishes_only_new_reports_to_their_subscribers():
+    hub = _hub()
+    phx = hub.subscribe(["kphx"])
+    both = hub.subscribe(["KPHX", "KSFO"], kinds=["metar"])
+    try:
+        # One batch fetch for all distinct stations, whatever the number of subscribers
+        assert await hub.poll_once() == 4
+        assert hub.metar_service.calls[-1] == ["KPHX", "KSFO"]
+        # and a single PIREP query covering both stations
+        min_lat, min_lon, max_lat, max_lon = hub.pirep_service.bboxes[-1]
+        assert min_lat < 33.43 and max_lat > 37.62 and min_lon < -122.37 and max_lon > -112.01
+        assert [event for event, _ in _drain(phx)] == ["metar", "taf"]
+        assert sorted(data["station"] for _, data in _drain(both)) == ["KPHX", "KSFO"]
+
+        # Unchanged reports publish nothing
+        assert await hub.poll_once() == 0
+
+        # A SPECI, a TAF amendment and an urgent PIREP
+        hub.metar_service.raw["KPHX"] = "SPECI KPHX 201812Z 27025G35KT 3SM +TSRA BKN045CB 28/10 A2990"
+        hub.taf_service.raw = "TAF AMD KPHX 201815Z 2018/2118 27020G30KT 3SM TSRA BKN040CB"
+        hub.pirep_service.pireps += [
+            PirepResponse(source="AWC", location="PHX", raw_text="UUA /OV PHX/TB SEV", report_type="UUA",
+                          raw_data={"lat": 33.5, "lon": -112.2}),
+            # Inside the query's bounding box but far from both stations
+            PirepResponse(source="AWC", location="LAS", raw_text="UUA /OV LAS/IC SEV", report_type="UUA",
+                          raw_data={"lat": 36.1, "lon": -115.2}),
+        ]
+        assert await hub.poll_once() == 4
+        events = _drain(phx)
+        assert [(event, data.get("type"), data.get("amendment")) for event, data in events] == [
+            ("metar", "SPECI", None), ("taf", None, True), ("pirep", None, None)
+        ]
+        assert events[2][1]["report"]["raw_text"] == "UUA /OV PHX/TB SEV"
+        # The METAR-only subscriber gets the SPECI alone
+        assert [data["station"] for _, data in _drain(both)] == ["KPHX"]
+    finally:
+        await hub.stop()
+
+async def test_new_subscribers_get_the_latest_reports_and_stations_are_dropped():
+    hub = _hub()
+    first = hub.subscribe(["KPHX"], kinds=["metar"])
+    try:
+        await hub.poll_once()
+        late = hub.subscribe(["KPHX"], kinds=["metar"])
+        assert [data["report"]["raw_text"] for _, data in _drain(late)] == [FakeMetars().raw["KPHX"]]
+
+        hub.unsubscribe(first)
+        hub.unsubscribe(late)
+        assert hub.stations == []
+        assert hub.stats()["subscribers"] == 0
+        assert await hub.poll_once() == 0
+    finally:
+        await hub.stop()
+
+async def test_slow_subscribers_keep_the_newest_events():
+    hub = _hub(queue_size=1)
+    subscription = hub.subscribe(["KPHX"], kinds=["metar"])
+    try:
+        await hub.poll_once()
+        hub.metar_service.raw["KPHX"] = "KPHX 201851Z 27019KT 10SM FEW045 29/06 A2991"
+        await hub.poll_once()
+        assert [data["report"]["raw_text"] for _, data in _drain(subscription)] == [hub.metar_service.raw["KPHX"]]
+        assert subscription.dropped == 1
+    finally:
+        await hub.stop()
+
+async def test_poller_wakes_up_for_new_stations():
+    hub = _hub(poller=True)
+    subscription = hub.subscribe(["KPHX"], kinds=["metar"])
+    try:
+        event = await asyncio.wait_for(subscription.queue.get(), timeout=2)
+        assert event.station == "KPHX"
+    finally:
+        await hub.stop()
+
+def test_subscribe_rejects_unknown_types():
+    response = client.get("/api/v1/subscribe?ids=KPHX&types=metar,notam")
+    assert response.status_code == 400
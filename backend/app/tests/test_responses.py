@@ -0,0 +1,44 @@
+import json
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.api.api import app
+from app.core.config import settings
+from app.schemas.weather import PirepResponse, SigmetResponse
+from app.services import json_codec
+
+client = TestClient(app)
+
+def _pireps():
+    return [
+        PirepResponse(source="AWC", location="PHX", raw_text="UA /OV PHX/FL080/TB LGT", altitude=8000,
+                      turbulence={"intensity": "LGT"}, data_age_seconds=12.5,
+                      raw_data={"lat": 33.4, "lon": -112.0, "fltLvl": 80})
+        for _ in range(3)
+    ]
+
+def test_dumps_matches_pydantic_serialization():
+    sigmet = SigmetResponse(source="AWC", id="1", valid_from=datetime(2024, 5, 1, 12, tzinfo=timezone.utc),
+                            area=[{"lat": 1.0, "lon": 2.0}], altitude={"lower": 0, "upper": 20000})
+    content = {"sigmets": [sigmet], "pireps": _pireps(), "counts": {1: 2}}
+    expected = json.loads(json.dumps({
+        "sigmets": [sigmet.model_dump(mode="json")],
+        "pireps": [pirep.model_dump(mode="json") for pirep in _pireps()],
+        "counts": {"1": 2},
+    }))
+    assert json.loads(json_codec.dumps(content)) == expected
+
+@patch("app.services.pirep_service.PirepService.get_pireps")
+def test_fast_path_returns_the_same_body_and_headers(mock_pireps, monkeypatch):
+    mock_pireps.side_effect = lambda *args, **kwargs: _pireps()
+
+    fast = client.get("/api/v1/pirep/KPHX")
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+    validated = client.get("/api/v1/pirep/KPHX")
+
+    assert fast.status_code == validated.status_code == 200
+    assert fast.json() == validated.json()
+    assert fast.headers["content-type"] == "application/json"
+    assert fast.headers["age"] == validated.headers["age"] == "12"
@@ -0,0 +1,86 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.api import app
+from app.schemas.weather import MetarResponse, PirepResponse, SigmetResponse, TafResponse
+from app.services.flight_plan import RouteTrack, Waypoint, parse_flight_plan
+
+client = TestClient(app)
+
+POSITIONS = {"KPHX": (33.43, -112.01), "KBXK": (33.42, -112.69), "KLAX": (33.94, -118.41),
+             "KBLH": (33.62, -114.72), "KTRM": (33.63, -116.16), "KLAS": (36.08, -115.15)}
+
+def _metar(station):
+    lat, lon = POSITIONS[station]
+    return MetarResponse(source="AWC", station=station, raw_text=f"{station} 201751Z 27010KT 10SM CLR 30/06 A2992",
+                         raw_data={"icaoId": station, "lat": lat, "lon": lon})
+
+def test_parse_flight_plan():
+    assert parse_flight_plan("KPHX,1500,KBXK,12000,KLAX,50") == [
+        Waypoint("KPHX", 1500), Waypoint("KBXK", 12000), Waypoint("KLAX", 50)
+    ]
+    assert parse_flight_plan("kphx klax") == [Waypoint("KPHX", None), Waypoint("KLAX", None)]
+    for plan in ("KPHX,1500", "1500,KPHX,KLAX", "KPHX,1500,2000,KLAX", "KPHX,K#LAX"):
+        with pytest.raises(ValueError):
+            parse_flight_plan(plan)
+
+def test_route_track_locates_points_along_the_great_circle():
+    track = RouteTrack([POSITIONS["KPHX"], POSITIONS["KLAX"]])
+    cross, along = track.locate(*POSITIONS["KBLH"])
+    assert cross < 15 and 100 < along < 140
+    assert track.locate(*POSITIONS["KLAS"])[0] > 100
+    assert abs(track.locate(*POSITIONS["KLAX"])[1] - track.length_nm) < 0.1
+
+@patch("app.services.sigmet_service.FailoverSigmetService.get_sigmets")
+@patch("app.services.pirep_service.PirepService.get_pireps")
+@patch("app.services.taf_service.AWCTafService.get_tafs")
+@patch("app.services.metar_service.AWCMetarService.get_metars_in_bbox")
+@patch("app.services.metar_service.AWCMetarService.get_metars")
+def test_route_briefing_consolidates_the_corridor(mock_metars, mock_bbox, mock_tafs, mock_pireps, mock_sigmets):
+    mock_metars.side_effect = lambda stations, hours=1: {station: _metar(station) for station in stations}
+    mock_bbox.return_value = {station: _metar(station) for station in ("KBLH", "KTRM", "KLAS")}
+    mock_tafs.side_effect = lambda stations, hours=6: {
+        station: TafResponse(source="AWC", station=station, raw_text=f"TAF {station} 201720Z", raw_data={"icaoId": station})
+        for station in stations if station != "KTRM"
+    }
+    mock_pireps.return_value = [
+        PirepResponse(source="AWC", location="BLH", raw_text="UA /OV BLH/TB MOD", raw_data={"lat": 33.7, "lon": -114.8}),
+        PirepResponse(source="AWC", location="LAS", raw_text="UA /OV LAS/IC LGT", raw_data={"lat": 36.1, "lon": -115.2}),
+    ]
+    mock_sigmets.return_value = [
+        SigmetResponse(source="AWC", id="near", area=[{"lat": 33.0, "lon": -116.0}, {"lat": 34.0, "lon": -116.0},
+                                                        {"lat": 34.0, "lon": -115.5}]),
+        SigmetResponse(source="AWC", id="far", area=[{"lat": 45.0, "lon": -100.0}, {"lat": 46.0, "lon": -100.0},
+                                                       {"lat": 46.0, "lon": -99.0}]),
+    ]
+
+    response = client.post("/api/v1/route-briefing", json={"route": "KPHX,1500,KBXK,12000,KLAX,50", "corridor_nm": 30})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [waypoint["station"] for waypoint in data["route"]["waypoints"]] == ["KPHX", "KBXK", "KLAX"]
+    assert 300 < data["route"]["distance_nm"] < 340
+    # Ordered along the track; KLAS is far off the corridor
+    assert [item["station"] for item in data["stations"]] == ["KPHX", "KBXK", "KBLH", "KTRM", "KLAX"]
+    assert data["stations"][3]["taf"] is None and data["stations"][2]["taf"]["raw_text"] == "TAF KBLH 201720Z"
+    # One TAF batch for every corridor station
+    mock_tafs.assert_called_once()
+    assert [item["report"]["raw_text"] for item in data["pireps"]] == ["UA /OV BLH/TB MOD"]
+    assert [sigmet["id"] for sigmet in data["sigmets"]] == ["near"]
+    assert data["errors"] is None
+
+@patch("app.services.taf_service.AWCTafService.get_tafs")
+@patch("app.services.metar_service.AWCMetarService.get_metars")
+def test_route_briefing_rejects_bad_plans(mock_metars, mock_tafs):
+    mock_metars.side_effect = lambda stations, hours=1: {
+        station: _metar(station) if station in POSITIONS else MetarResponse(source="AWC", station=station)
+        for station in stations
+    }
+    mock_tafs.side_effect = lambda stations, hours=6: {station: TafResponse(source="AWC", station=station) for station in stations}
+
+    assert client.post("/api/v1/route-briefing", json={"route": "KPHX,1500"}).status_code == 400
+    response = client.post("/api/v1/route-briefing", json={"route": "KPHX,1500,KZZZ,9000"})
+    assert response.status_code == 400
+    assert "KZZZ" in response.json()["detail"]
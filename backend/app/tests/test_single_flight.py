@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from app.services.single_flight import SingleFlight
+from app.services.base_client import BaseApiClient
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    executions = 0
+
+    async def fetch():
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.01)
+        return {"station": "KJFK"}
+
+    results = await asyncio.gather(*(flights.do("KJFK", fetch, label="/api/data/metar") for _ in range(20)))
+
+    assert executions == 1
+    assert all(result is results[0] for result in results)
+    stats = flights.stats()
+    assert stats["calls"] == 20
+    assert stats["coalesced"] == 19
+    assert stats["coalesced_by_label"]["/api/data/metar"] == 19
+    assert stats["inflight"] == 0
+
+@pytest.mark.asyncio
+async def test_errors_propagate_and_are_not_cached():
+    flights = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(flights.do("k", failing), flights.do("k", failing), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def ok():
+        return "fresh"
+
+    assert await flights.do("k", ok) == "fresh"
+
+@pytest.mark.asyncio
+async def test_base_client_coalesces_identical_requests():
+    client = BaseApiClient(base_url="https://aviationweather.gov")
+    calls = []
+
+    async def fake_request(endpoint, params, headers, response_type, key=None):
+        calls.append(params)
+        await asyncio.sleep(0.01)
+        return [{"icaoId": "KJFK"}]
+
+    with patch.object(client, "_request", side_effect=fake_request):
+        await asyncio.gather(
+            client.get("/api/data/metar", params={"ids": "KJFK", "format": "json"}),
+            client.get("/api/data/metar", params={"format": "json", "ids": "kjfk"}),
+            client.get("/api/data/metar", params={"ids": "KLGA", "format": "json"}),
+        )
+
+    assert len(calls) == 2
@@ -0,0 +1,147 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.api.api import app
+from app.core.metrics import LLM_REQUESTS
+from app.schemas.weather import MetarResponse, TafResponse
+from app.services.openai_service import OpenAISummaryService, openai_service
+from app.services.summary_cache import SummaryCache
+
+client = TestClient(app)
+
+def _events(body):
+    """[(event, data)] from an SSE response body"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def _chunk(text=None, usage=None):
+    choices = [SimpleNamespace(delta=SimpleNamespace(content=text))] if text is not None else []
+    return SimpleNamespace(choices=choices, usage=usage)
+
+class FakeStream:
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.chunks:
+            raise StopAsyncIteration
+        return self.chunks.pop(0)
+
+    async def close(self):
+        self.closed = True
+
+def _service_with_stream(stream, monkeypatch, tmp_path):
+    service = OpenAISummaryService(api_key="sk-test")
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return stream
+
+    monkeypatch.setattr(service.client.chat.completions, "create", create)
+    monkeypatch.setattr("app.services.openai_service.summary_cache", SummaryCache(path=str(tmp_path / "s.sqlite3")))
+    return service, calls
+
+async def test_stream_summary_yields_deltas_and_caches_the_result(monkeypatch, tmp_path):
+    stream = FakeStream([_chunk("VFR"), _chunk(", winds 270 at 19"), _chunk(usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5))])
+    service, calls = _service_with_stream(stream, monkeypatch, tmp_path)
+    report = {"raw_text": "KPHX 201751Z 27019KT 10SM FEW045 30/06 A2992", "station": "KPHX"}
+
+    assert [delta async for delta in service.stream_summary("metar", report)] == ["VFR", ", winds 270 at 19"]
+    assert calls[0]["stream"] is True
+    assert stream.closed
+
+    # The joined summary is served from the cache in one piece without another completion
+    assert [delta async for delta in service.stream_summary("metar", report)] == ["VFR, winds 270 at 19"]
+    assert len(calls) == 1
+
+async def test_closing_the_stream_cancels_the_completion(monkeypatch, tmp_path):
+    stream = FakeStream([_chunk("Thunderstorms"), _chunk(" nearby")])
+    service, _ = _service_with_stream(stream, monkeypatch, tmp_path)
+    cancelled = LLM_REQUESTS.value(service.model, "metar", "cancelled")
+
+    deltas = service.stream_summary("metar", {"raw_text": "KPHX 201751Z 27019KT 3SM +TSRA"})
+    assert await deltas.__anext__() == "Thunderstorms"
+    await deltas.aclose()
+
+    assert stream.closed
+    assert LLM_REQUESTS.value(service.model, "metar", "cancelled") == cancelled + 1
+
+def test_weather_summary_stream_sends_the_decoded_report_first(monkeypatch):
+    def fake_stream(report_type, report):
+        async def deltas():
+            yield "Clear skies"
+            yield ", light winds."
+        return deltas()
+
+    monkeypatch.setattr(openai_service, "api_key", "sk-test")
+    monkeypatch.setattr(openai_service, "stream_summary", fake_stream)
+
+    response = client.post("/api/v1/weather-summary/metar/stream", json={"text": "KPHX 201751Z 27005KT 10SM CLR 30/06 A2992"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    assert [name for name, _ in events] == ["report", "token", "token", "summary", "done"]
+    assert events[0][1]["station"] == "KPHX"
+    assert events[0][1]["parsed_metar"]
+    assert events[3][1] == {"summary": "Clear skies, light winds.", "source": "llm"}
+
+def test_weather_summary_stream_falls_back_to_local_summary(monkeypatch):
+    def failing_stream(report_type, report):
+        async def deltas():
+            raise RuntimeError("upstream unavailable")
+            yield
+        return deltas()
+
+    monkeypatch.setattr(openai_service, "api_key", "sk-test")
+    monkeypatch.setattr(openai_service, "stream_summary", failing_stream)
+
+    response = client.post("/api/v1/weather-summary/pirep/stream", json={"text": "UA /OV PHX/TM 1800/FL080/TP C172/TB LGT", "location": "PHX"})
+
+    events = _events(response.text)
+    assert [name for name, _ in events] == ["report", "error", "summary", "done"]
+    assert events[0][1]["aircraft_type"] == "C172"
+    assert events[2][1]["source"] == "local"
+    assert events[2][1]["summary"].startswith("Pilot report near PHX")
+
+def test_weather_summary_stream_rejects_missing_text():
+    assert client.post("/api/v1/weather-summary/metar/stream", json={}).status_code == 400
+    assert client.post("/api/v1/weather-summary/sigmet/stream", json={"text": "x"}).status_code == 422
+
+@patch("app.services.sigmet_service.FailoverSigmetService.get_sigmets")
+@patch("app.services.pirep_service.PirepService.get_pireps")
+@patch("app.services.taf_service.FailoverTafService.get_taf")
+@patch("app.services.metar_service.AWCMetarService.get_metar")
+def test_airport_summary_stream(mock_metar, mock_taf, mock_pireps, mock_sigmets, monkeypatch):
+    def fake_stream(all_reports):
+        async def deltas():
+            yield '{"overview": '
+            yield '"VFR all day"}'
+        return deltas()
+
+    monkeypatch.setattr(openai_service, "api_key", "sk-test")
+    monkeypatch.setattr(openai_service, "stream_comprehensive_summary", fake_stream)
+    mock_metar.return_value = MetarResponse(source="AWC", station="KPHX", raw_text="KPHX 201751Z")
+    mock_taf.return_value = TafResponse(source="AWC", station="KPHX", raw_text="TAF KPHX")
+    mock_pireps.return_value = []
+    mock_sigmets.return_value = []
+
+    response = client.get("/api/v1/airport-summary/kphx/stream")
+
+    assert response.status_code == 200
+    events = _events(response.text)
+    assert [name for name, _ in events] == ["reports", "token", "token", "summary", "done"]
+    assert events[0][1]["reports"]["metar"]["station"] == "KPHX"
+    assert events[0][1]["sources"]["taf"]["status"] == "ok"
+    assert events[3][1] == {"overview": "VFR all day"}
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from app.services import summary_policy
+from app.services.openai_service import OpenAISummaryService
+from app.services.summary_policy import has_significant_weather
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.LLM_MAX_CONCURRENCY", 3)
+    return OpenAISummaryService(api_key="sk-test")
+
+async def test_generate_summaries_bounds_concurrency(service, monkeypatch):
+    active = 0
+    peak = 0
+
+    async def fake_summary(report_type, report, use_fallback=True):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return f"{report_type}:{report['id']}"
+
+    monkeypatch.setattr(service, "generate_summary", fake_summary)
+    summaries = await service.generate_summaries("pirep", [{"id": i} for i in range(10)], budget=5)
+
+    assert summaries == [f"pirep:{i}" for i in range(10)]
+    assert peak == 3
+
+async def test_generate_summaries_returns_partial_results_when_budget_runs_out(service, monkeypatch):
+    async def fake_summary(report_type, report, use_fallback=True):
+        await asyncio.sleep(0 if report["fast"] else 5)
+        return "done"
+
+    monkeypatch.setattr(service, "generate_summary", fake_summary)
+    started = asyncio.get_running_loop().time()
+    summaries = await service.generate_summaries(
+        "pirep", [{"fast": True}, {"fast": False}, {"fast": True}], budget=0.1
+    )
+
+    assert summaries == ["done", None, "done"]
+    assert asyncio.get_running_loop().time() - started < 1
+
+def test_significant_weather_detection():
+    assert has_significant_weather("metar", {"raw_text": "KPHX 201751Z 27019KT 10SM +TSRA BKN045CB 30/06 A2992"})
+    assert has_significant_weather("metar", {"raw_text": "KBOS 201751Z 04010KT 1/2SM FZFG OVC002 M01/M01 A3002"})
+    assert has_significant_weather("metar", {"raw_text": "KSFO 201751Z 00000KT 1/4SM OVC001", "flight_category": "LIFR"})
+    # Thunderstorm remarks and station ids starting with FZ are not present weather
+    assert not has_significant_weather("metar", {"raw_text": "KPHX 201751Z 27019KT 10SM FEW045 30/06 A2992 RMK AO2 TSE05"})
+    assert not has_significant_weather("metar", {"raw_text": "FZAA 201800Z 22005KT 9999 SCT020 30/22 Q1012"})
+    assert has_significant_weather("pirep", {"raw_text": "UUA /OV PHX/TB SEV", "report_type": "UUA"})
+    assert not has_significant_weather("pirep", {"raw_text": "UA /OV PHX/TB LGT", "turbulence": {"intensity": "LGT"}})
+    assert has_significant_weather("sigmet", {"raw_text": "CONVECTIVE SIGMET 12W"})
+
+async def test_auto_mode_uses_local_summary_for_routine_weather(monkeypatch):
+    async def fail(*args, **kwargs):
+        raise AssertionError("routine weather should not call the LLM")
+
+    monkeypatch.setattr(summary_policy.openai_service, "generate_summary", fail)
+    summary, source = await summary_policy.summarize(
+        "metar", {"raw_text": "KPHX 201751Z 27019KT 10SM FEW045 30/06 A2992", "pilot_summary": "VFR, winds 270 at 19."}, "auto"
+    )
+    assert (summary, source) == ("VFR, winds 270 at 19.", "local")
+
+async def test_auto_mode_falls_back_to_local_when_llm_misses_budget(monkeypatch):
+    async def slow(*args, **kwargs):
+        await asyncio.sleep(5)
+        return "AI summary"
+
+    monkeypatch.setattr(summary_policy.settings, "SUMMARY_LLM_BUDGET_SECONDS", 0.05)
+    monkeypatch.setattr(summary_policy.openai_service, "generate_summary", slow)
+    report = {"raw_text": "KPHX 201751Z 27019KT 3SM +TSRA BKN045CB", "pilot_summary": "Thunderstorms."}
+
+    assert await summary_policy.summarize("metar", report, "auto") == ("Thunderstorms.", "local")
+
+async def test_llm_mode_marks_the_generic_fallback(monkeypatch):
+    async def failing(report_type, report, use_fallback=True):
+        return summary_policy.openai_service._generate_fallback_summary(report_type, report) if use_fallback else None
+
+    monkeypatch.setattr(summary_policy.openai_service, "generate_summary", failing)
+    report = {"station": "KPHX", "raw_text": "KPHX 201751Z 27019KT 10SM FEW045 30/06 A2992", "pilot_summary": "VFR."}
+
+    summary, source = await summary_policy.summarize("metar", report, "llm")
+    assert source == "fallback"
+    assert summary_policy.degraded("metar", report, "llm", summary, source)
+    assert not summary_policy.degraded("metar", report, "auto", "VFR.", "local")
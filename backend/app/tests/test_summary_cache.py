@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.services.summary_cache import SummaryCache, summary_key, summary_ttl
+
+def test_summary_key_depends_on_every_input():
+    base = summary_key("metar", "1", "gpt-4o", "KPHX 201751Z 27019KT")
+    assert base == summary_key("metar", "1", "gpt-4o", "KPHX 201751Z 27019KT")
+    assert base != summary_key("taf", "1", "gpt-4o", "KPHX 201751Z 27019KT")
+    assert base != summary_key("metar", "2", "gpt-4o", "KPHX 201751Z 27019KT")
+    assert base != summary_key("metar", "1", "gpt-4o-mini", "KPHX 201751Z 27019KT")
+    assert base != summary_key("metar", "1", "gpt-4o", "KPHX 201851Z 27019KT")
+
+def test_summary_ttl_follows_report_validity():
+    valid_to = datetime.now(timezone.utc) + timedelta(hours=2)
+    assert 7100 < summary_ttl({"valid_to": valid_to.isoformat()}) <= 7200
+    assert summary_ttl({"valid_to": (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()}) == 0
+    assert summary_ttl({"raw_text": "KPHX"}) == settings.SUMMARY_CACHE_DEFAULT_TTL
+
+async def test_concurrent_identical_requests_share_one_call(tmp_path):
+    cache = SummaryCache(path=str(tmp_path / "summaries.sqlite3"))
+    calls = 0
+
+    async def create():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "Winds 270 at 19 gusting 35"
+
+    results = await asyncio.gather(*(cache.get_or_create("k", "metar", create, 60) for _ in range(5)))
+
+    assert results == ["Winds 270 at 19 gusting 35"] * 5
+    assert calls == 1
+    assert cache.stats()["generated"] == 1
+
+async def test_summaries_survive_restart(tmp_path):
+    path = str(tmp_path / "summaries.sqlite3")
+    first = SummaryCache(path=path)
+
+    async def create():
+        return {"overview": "VFR"}
+
+    await first.get_or_create("k", "comprehensive", create, 60)
+    first.store.close()
+
+    async def fail():
+        raise AssertionError("summary should come from disk")
+
+    second = SummaryCache(path=path)
+    assert await second.get_or_create("k", "comprehensive", fail, 60) == {"overview": "VFR"}
+    assert second.stats()["disk_hits"] == 1
+
+async def test_none_results_are_not_cached(tmp_path):
+    cache = SummaryCache(path=str(tmp_path / "summaries.sqlite3"))
+    results = iter([None, "ok"])
+
+    async def create():
+        return next(results)
+
+    assert await cache.get_or_create("k", "pirep", create, 60) is None
+    assert await cache.get_or_create("k", "pirep", create, 60) == "ok"
+
+def test_no_file_is_written_unless_a_path_is_configured(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    assert SummaryCache().store is None
+    monkeypatch.setattr(settings, "SUMMARY_CACHE_PATH", str(tmp_path / "summaries.sqlite3"))
+    assert SummaryCache().store.path == str(tmp_path / "summaries.sqlite3")
+    assert list(tmp_path.iterdir()) == []
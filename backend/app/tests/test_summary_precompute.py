@@ -0,0 +1,78 @@
+import asyncio
+
+from app.schemas.weather import MetarResponse, PirepResponse, TafResponse
+from app.services.openai_service import llm_token_usage
+from app.services.summary_precompute import SummaryPrecomputer, load_watchlist
+
+class FakeMetars:
+    def __init__(self):
+        self.raw = {"KPHX": "KPHX 201751Z 27019KT 3SM +TSRA BKN045CB 30/06 A2992",
+                    "KSFO": "KSFO 201756Z 29012KT 10SM FEW010 16/11 A3001"}
+
+    async def get_metars(self, stations, hours=1):
+        return {s: MetarResponse(source="AWC", station=s, raw_text=self.raw[s]) for s in stations}
+
+class FakeTafs:
+    async def get_tafs(self, stations, hours=6):
+        return {s: TafResponse(source="AWC", station=s, raw_text="Error fetching TAF: boom") for s in stations}
+
+class FakePireps:
+    async def get_pireps(self, station, distance=200, age=1.5):
+        # Both stations see the same urgent report; it must be summarized once
+        return [PirepResponse(source="AWC", location="PHX", raw_text="UUA /OV PHX/TB SEV", report_type="UUA")]
+
+def _precomputer(summarize, **kwargs):
+    return SummaryPrecomputer(
+        stations=["kphx", "ksfo"], metar_service=FakeMetars(), taf_service=FakeTafs(),
+        pirep_service=FakePireps(), summarize=summarize, **kwargs
+    )
+
+def test_load_watchlist(tmp_path):
+    path = tmp_path / "watchlist.txt"
+    path.write_text("KJFK  # New York\n\nklax\nKPHX\n")
+    assert load_watchlist("kphx, KSFO", str(path)) == ["KPHX", "KSFO", "KJFK", "KLAX"]
+
+async def test_precompute_summarizes_new_significant_reports_once(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.SUMMARY_MODE", "auto")
+    calls = []
+
+    async def summarize(report_type, report):
+        calls.append((report_type, report["raw_text"]))
+        return "summary"
+
+    precomputer = _precomputer(summarize)
+
+    assert await precomputer.run_once() == 2
+    # Routine weather (KSFO) and failed TAF fetches are skipped
+    assert sorted(calls) == [("metar", FakeMetars().raw["KPHX"]), ("pirep", "UUA /OV PHX/TB SEV")]
+
+    # Nothing new on the next cycle
+    assert await precomputer.run_once() == 0
+    assert len(calls) == 2
+
+    # A new METAR is summarized
+    precomputer.metar_service.raw["KPHX"] = "KPHX 201851Z 27019KT 1SM +TSRA OVC010CB 28/10 A2990"
+    assert await precomputer.run_once() == 1
+
+async def test_precompute_respects_concurrency_and_token_budget(monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.SUMMARY_MODE", "llm")
+    active = 0
+    peak = 0
+
+    async def summarize(report_type, report):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        llm_token_usage.get().append(400)
+        active -= 1
+        return "summary"
+
+    precomputer = _precomputer(summarize, concurrency=1, tokens_per_hour=700)
+
+    # Three reports need summaries, but the budget is spent after two
+    assert await precomputer.run_once() == 2
+    assert peak == 1
+    stats = precomputer.stats()
+    assert stats["tokens_last_hour"] == 800
+    assert stats["deferred_by_token_budget"] == 1
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: upstream response decoding
+
+Compares the previous str-based path (response.text(), repeated .strip(), json.loads on
+the str) with the bytes path used by BaseApiClient (first-byte sniffing, JSON decoded
+straight from the bytes) on payloads shaped like AWC airsigmet and multi-hour METAR
+responses. Reports CPU time per decode and transient allocation (tracemalloc peak minus
+the memory still held by the parsed result), i.e. the intermediate copies.
+
+Usage:
+    python benchmarks/bench_decode.py [--repeat 20]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import json_codec  # noqa: E402
+from app.services.base_client import decode_body  # noqa: E402
+
+def metar_payload(stations: int, hours: int) -> bytes:
+    """AWC /api/data/metar?format=json shaped list"""
+    reports = []
+    for index in range(stations):
+        station = f"K{index:03d}"[:4]
+        for hour in range(hours):
+            reports.append({
+                "icaoId": station,
+                "receiptTime": "2024-05-01 11:54:12",
+                "obsTime": 1714564260 - hour * 3600,
+                "reportTime": "2024-05-01 12:00:00",
+                "temp": 23.0, "dewp": 17.0, "wdir": 180, "wspd": 9, "wgst": None,
+                "visib": "10+", "altim": 1011.5, "slp": 1011.4, "qcField": 4,
+                "metarType": "METAR",
+                "rawOb": f"{station} 011151Z 18009KT 10SM FEW050 BKN250 23/17 A2987 RMK AO2 SLP114 T02280167",
+                "lat": 40.64, "lon": -73.76, "elev": 4, "name": "Sample Intl, NY, US",
+                "clouds": [{"cover": "FEW", "base": 5000}, {"cover": "BKN", "base": 25000}],
+                "fltCat": "VFR",
+            })
+    return json.dumps(reports).encode()
+
+def airsigmet_payload(count: int) -> bytes:
+    """AWC /data/api/airsigmet shaped document with polygon coordinates"""
+    items = []
+    for index in range(count):
+        items.append({
+            "airSigmetId": index,
+            "icaoId": "KKCI",
+            "alphaChar": "E",
+            "hazard": "ICE",
+            "severity": 2,
+            "validTimeFrom": 1714564260,
+            "validTimeTo": 1714578660,
+            "altitudeLow1": 0,
+            "altitudeHi1": 20000,
+            "rawAirSigmet": "SIGMET ECHO 1 VALID 250845/251245 KKCI- KZMP MINNEAPOLIS FIR SEV ICE FCST " * 4,
+            "coords": [{"lat": 42.0 + i * 0.1, "lon": -89.0 - i * 0.1} for i in range(40)],
+        })
+    return json.dumps({"data": items}, indent=1).encode()
+
+def old_path(body: bytes):
+    """The previous BaseApiClient decoding: text first, strip, then json.loads on the str"""
+    text_response = body.decode("utf-8")
+    if text_response.strip() and (text_response.strip()[0] in ['{', '[']):
+        return json.loads(text_response)
+    return text_response
+
+def new_path(body: bytes):
+    return decode_body(body, "application/json", None)
+
+def measure(fn, body: bytes, repeat: int):
+    fn(body)  # warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(body)
+    cpu_ms = (time.perf_counter() - started) / repeat * 1000
+
+    # Transient allocation: peak minus what the parsed result still holds afterwards
+    tracemalloc.start()
+    result = fn(body)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return cpu_ms, peak - retained
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    payloads = {
+        "metar 50 stations x 1h": metar_payload(50, 1),
+        "metar 400 stations x 6h": metar_payload(400, 6),
+        "airsigmet 300 polygons": airsigmet_payload(300),
+    }
+
+    print(f"JSON backend: {json_codec.backend_name}")
+    print(f"{'payload':<26}{'size':>10}  {'old ms':>8} {'new ms':>8}  {'old temp':>10} {'new temp':>10}")
+    for name, body in payloads.items():
+        old_ms, old_peak = measure(old_path, body, args.repeat)
+        new_ms, new_peak = measure(new_path, body, args.repeat)
+        print(f"{name:<26}{len(body) / 1024:>8.0f}KB  {old_ms:>8.2f} {new_ms:>8.2f}  "
+              f"{old_peak / 1024:>8.0f}KB {new_peak / 1024:>8.0f}KB")
+
+if __name__ == "__main__":
+    main()
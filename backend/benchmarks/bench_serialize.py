@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: API response serialization
+
+Compares three ways of turning route results into JSON bytes on 500-item PIREP and SIGMET
+lists and a /cockpit/pirep shaped dict:
+
+- fastapi: what FastAPI does with response_model (validate against the model, then
+  serialize with pydantic's dump_json)
+- jsonable: jsonable_encoder + json.dumps, the path FastAPI takes for routes without a
+  TypeAdapter-backed response field
+- fast: json_codec.dumps as used by fast_response() (orjson when installed)
+
+Usage:
+    python benchmarks/bench_serialize.py [--repeat 50] [--items 500]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.routing import APIRoute, serialize_response  # noqa: E402
+
+from app.schemas.weather import PirepResponse, SigmetResponse  # noqa: E402
+from app.services import json_codec  # noqa: E402
+from app.services.pirep_filter import filter_pireps  # noqa: E402
+from app.services.pirep_service import PirepService  # noqa: E402
+
+def pireps(count: int) -> List[PirepResponse]:
+    """PIREPs shaped like PirepService output, including the AWC record in raw_data"""
+    service = PirepService()
+    items = []
+    for index in range(count):
+        raw_text = f"UA /OV PHX{index % 360:03d}020/TM 1800/FL{60 + index % 300:03d}/TP B737/TB LGT-MOD/IC TRC RIME/RM SMTH"
+        pirep = PirepResponse(source="AWC", location=f"PHX {index % 360:03d}020", raw_text=raw_text, raw_data={
+            "receiptTime": "2024-05-01 18:02:11", "obsTime": 1714586400, "icaoId": "KPHX", "acType": "B737",
+            "lat": 33.4 + index / 1000, "lon": -112.0 - index / 1000, "fltLvl": 60 + index % 300,
+            "fltLvlType": "OTHER", "temp": -5, "wdir": 270, "wspd": 35, "tbInt1": "LGT-MOD", "icgInt1": "TRC",
+            "rawOb": raw_text,
+        })
+        service._extract_pirep_fields(pirep, raw_text)
+        items.append(pirep)
+    return items
+
+def sigmets(count: int) -> List[SigmetResponse]:
+    """SIGMETs with 12-point polygons and their upstream record"""
+    start = datetime(2024, 5, 1, 12)
+    items = []
+    for index in range(count):
+        area = [{"lat": 30.0 + point / 4, "lon": -100.0 + index / 10 + point / 3} for point in range(12)]
+        items.append(SigmetResponse(
+            source="AWC", id=str(index), raw_text="WSUS32 KKCI 011155 SIGC CONVECTIVE SIGMET " * 3,
+            area=area, altitude={"lower": 0, "upper": 45000}, phenomenon="CONVECTIVE",
+            valid_from=start, valid_to=start + timedelta(hours=2),
+            raw_data={"airSigmetId": index, "hazard": "CONVECTIVE", "coords": area, "rawAirSigmet": "x" * 300},
+        ))
+    return items
+
+def cockpit(items: List[PirepResponse]) -> Dict[str, Any]:
+    kept, grouped, stats = filter_pireps(items)
+    return {"pireps": kept, "grouped_pireps": grouped, "stats": stats, "summary_status": None,
+            "query_params": {"station": "KPHX", "distance": 200, "age": 1.5}}
+
+def response_field(model: Any):
+    async def endpoint():
+        return None
+    return APIRoute("/bench", endpoint, response_model=model).response_field
+
+def measure(fn, repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--items", type=int, default=500)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    pirep_list = pireps(args.items)
+    cases = {
+        f"pirep list x{args.items}": (pirep_list, List[PirepResponse]),
+        f"sigmet list x{args.items}": (sigmets(args.items), List[SigmetResponse]),
+        f"cockpit pirep x{args.items}": (cockpit(pirep_list), Dict[str, Any]),
+    }
+
+    print(f"JSON encoder: {json_codec.encoder_name}")
+    print(f"{'payload':<24}{'size':>9}  {'fastapi ms':>10} {'jsonable ms':>11} {'fast ms':>8}  {'speedup':>7}")
+    for name, (content, model) in cases.items():
+        field = response_field(model)
+        body = json_codec.dumps(content)
+
+        def fastapi_path():
+            return loop.run_until_complete(serialize_response(field=field, response_content=content, dump_json=True))
+
+        fastapi_ms = measure(fastapi_path, args.repeat)
+        jsonable_ms = measure(lambda: json.dumps(jsonable_encoder(content)).encode(), max(1, args.repeat // 5))
+        fast_ms = measure(lambda: json_codec.dumps(content), args.repeat)
+        print(f"{name:<24}{len(body) / 1024:>7.0f}KB  {fastapi_ms:>10.2f} {jsonable_ms:>11.2f} {fast_ms:>8.2f}  "
+              f"{fastapi_ms / fast_ms:>6.1f}x")
+
+if __name__ == "__main__":
+    main()